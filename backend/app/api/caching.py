@@ -0,0 +1,26 @@
+# api/caching.py
+from typing import Optional
+from fastapi import Request, Response
+
+# Revisions never change once written
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Everything else may be stored, but is revalidated with If-None-Match before reuse
+REVALIDATE = "no-cache"
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether If-None-Match names the ETag (weak comparison, as for any GET)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+def conditional(request: Request, response: Response, etag: str,
+                cache_control: str = REVALIDATE) -> Optional[Response]:
+    """Set the validator headers; return a 304 to send instead if the client's copy is current"""
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return None
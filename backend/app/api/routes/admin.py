@@ -0,0 +1,139 @@
+# api/routes/admin.py
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import get_db
+from app.schemas.admin import (
+    VectorIndexStatus, VectorIndexRebuild, VectorIndexTask, VectorRecallReport, SearchPlan,
+    EmbeddingBatchMetrics, EmbeddingCacheMetrics, EmbeddingParityReport, EmbeddingBackfillStatus,
+    NoteCacheMetrics, JobLag
+)
+from app.services.vector_index_service import vector_index_service
+from app.services.embedding_service import embedding_service
+from app.services.job_service import job_service
+from app.services.backfill_service import backfill_service
+from app.services.note_service import note_service
+from app.services.note_cache import note_cache
+
+router = APIRouter()
+
+@router.get("/vector-index", response_model=VectorIndexStatus)
+def get_vector_index_status(db: Session = Depends(get_db)):
+    """Get the notes vector index definition, size and build progress"""
+    return vector_index_service.get_index_status(db=db)
+
+@router.post("/vector-index/rebuild", response_model=VectorIndexTask, status_code=202)
+def rebuild_vector_index(
+    rebuild: VectorIndexRebuild,
+    background_tasks: BackgroundTasks
+):
+    """Build a replacement vector index (optionally with new parameters) and swap it in"""
+    index_type = rebuild.index_type or settings.VECTOR_INDEX_TYPE
+    try:
+        params = vector_index_service.build_params(
+            index_type,
+            {"m": rebuild.m, "ef_construction": rebuild.ef_construction, "lists": rebuild.lists}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Index builds can take minutes; progress is reported by GET /vector-index
+    background_tasks.add_task(
+        vector_index_service.rebuild_index,
+        index_type=index_type,
+        params=params,
+        concurrently=rebuild.concurrently
+    )
+
+    return {
+        "action": "rebuild",
+        "index_type": index_type,
+        "params": params,
+        "concurrently": rebuild.concurrently
+    }
+
+@router.post("/vector-index/reindex", response_model=VectorIndexTask, status_code=202)
+def reindex_vector_index(
+    background_tasks: BackgroundTasks,
+    concurrently: bool = True
+):
+    """Rebuild the vector index in place with its current parameters"""
+    background_tasks.add_task(vector_index_service.reindex, concurrently=concurrently)
+    return {"action": "reindex", "concurrently": concurrently}
+
+@router.get("/vector-index/report", response_model=VectorRecallReport)
+def get_vector_recall_report(
+    sample_size: int = Query(20, ge=1, le=1000),
+    k: int = Query(10, ge=1, le=100),
+    ef_search: Optional[int] = Query(None, ge=1),
+    probes: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db)
+):
+    """Compare recall and latency of exact and indexed search on the live corpus"""
+    return vector_index_service.recall_report(
+        db=db,
+        sample_size=sample_size,
+        k=k,
+        ef_search=ef_search,
+        probes=probes
+    )
+
+@router.get("/search/explain", response_model=SearchPlan)
+def explain_search(
+    query: str,
+    fuzzy: bool = False,
+    similarity_threshold: Optional[float] = Query(None, ge=0, le=1),
+    seqscan: bool = True,
+    db: Session = Depends(get_db)
+):
+    """Get the EXPLAIN plan of a text or fuzzy search and the indexes it uses"""
+    explained = note_service.explain_search(
+        db=db,
+        query=query,
+        fuzzy=fuzzy,
+        similarity_threshold=similarity_threshold,
+        seqscan=seqscan
+    )
+    return {"query": query, "fuzzy": fuzzy, "seqscan": seqscan, **explained}
+
+@router.get("/embedding/metrics", response_model=EmbeddingBatchMetrics)
+def get_embedding_metrics():
+    """Get queue depth and batch size statistics of the embedding batcher"""
+    return embedding_service.batcher.metrics()
+
+@router.get("/embedding/cache", response_model=EmbeddingCacheMetrics)
+def get_embedding_cache_metrics():
+    """Get hit and miss counts of the embedding cache"""
+    return embedding_service.cache.metrics()
+
+@router.get("/note-cache", response_model=NoteCacheMetrics)
+def get_note_cache_metrics():
+    """Get hit, miss and invalidation counts of this worker's note cache"""
+    return note_cache.metrics()
+
+@router.get("/embedding/parity", response_model=EmbeddingParityReport)
+def get_embedding_parity(
+    sample_size: int = Query(200, ge=1, le=5000),
+    inference: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Re-encode sampled notes with an inference mode and compare with their stored vectors"""
+    try:
+        return embedding_service.parity_report(db=db, sample_size=sample_size, inference=inference)
+    except (ValueError, ImportError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/embedding/backfills", response_model=List[EmbeddingBackfillStatus])
+def get_embedding_backfills(db: Session = Depends(get_db)):
+    """Get the phase and checkpoint of re-embedding backfills"""
+    return backfill_service.get_backfills(db=db)
+
+@router.get("/jobs", response_model=JobLag)
+def get_job_lag(db: Session = Depends(get_db)):
+    """Get how far the background indexing workers are behind, per job kind"""
+    return {
+        "deferred_indexing": settings.DEFERRED_INDEXING,
+        "jobs": job_service.get_lag(db=db)
+    }
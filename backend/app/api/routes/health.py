@@ -0,0 +1,31 @@
+# api/routes/health.py
+from fastapi import APIRouter, Depends, Response, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.schemas.health import HealthStatus
+from app.services.embedding_service import embedding_service
+
+router = APIRouter()
+
+@router.get("/live", response_model=HealthStatus)
+def liveness():
+    """The process is up and serving requests (never touches the model or database)"""
+    return {"status": "alive"}
+
+@router.get("/ready", response_model=HealthStatus)
+def readiness(response: Response, db: Session = Depends(get_db)):
+    """Ready for traffic once the embedding model is warm and the database answers"""
+    try:
+        db.execute(text("SELECT 1"))
+        database = True
+    except Exception:
+        database = False
+
+    checks = {"model": embedding_service.ready, "database": database}
+    if all(checks.values()):
+        return {"status": "ready", "checks": checks}
+
+    response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "starting", "checks": checks, "detail": embedding_service.warmup_error}
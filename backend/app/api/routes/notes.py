@@ -1,15 +1,19 @@
 # api/routes/notes.py
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
+from app.api.caching import conditional
+from app.core.config import settings
 from app.db.session import get_db
 from app.schemas.notes import (
-    Note, NoteCreate, NoteUpdate, NoteSearchQuery, 
-    SimilarNoteResult, TagList
+    Note, NoteCreate, NoteUpdate, NoteSearchQuery, NoteSummary, NoteFields,
+    SimilarNoteResult, TagList, TagCount, FacetedSearchResults, NoteGraph
 )
 from app.services.note_service import note_service
 from app.services.embedding_service import embedding_service
+from app.services.graph_service import graph_service
+from app.services.tag_service import tag_service
 
 router = APIRouter()
 
@@ -23,24 +27,46 @@ def create_note(note: NoteCreate, db: Session = Depends(get_db)):
         tags=note.tags
     )
 
-@router.get("/", response_model=List[Note])
+@router.get("/", response_model=Union[List[Note], List[NoteSummary]])
 def get_notes(
-    skip: int = 0, 
+    request: Request,
+    response: Response,
+    skip: int = Query(0, description="Deprecated: OFFSET paging, slow on deep pages; use cursor"),
     limit: int = 100,
     include_archived: bool = False,
+    cursor: Optional[str] = None,
+    fields: NoteFields = "full",
     db: Session = Depends(get_db)
 ):
-    """Get all notes with pagination"""
-    return note_service.get_notes(
-        db=db, 
-        skip=skip, 
-        limit=limit,
-        include_archived=include_archived
-    )
+    """Get all notes, newest first; the X-Next-Cursor header holds the cursor of the next page"""
+    try:
+        notes = note_service.get_notes(
+            db=db, 
+            skip=skip, 
+            limit=limit,
+            include_archived=include_archived,
+            cursor=cursor,
+            fields=fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    not_modified = conditional(request, response, note_service.get_page_etag(notes, fields))
+    if not_modified:
+        return not_modified
+    _set_next_cursor(response, notes, limit)
+    return [_project(note, fields) for note in notes]
 
 @router.get("/{note_id}", response_model=Note)
-def get_note(note_id: str, db: Session = Depends(get_db)):
-    """Get a specific note by ID"""
+def get_note(note_id: str, request: Request, response: Response, db: Session = Depends(get_db)):
+    """Get a specific note by ID; If-None-Match with its ETag gets a 304 without loading the body"""
+    etag = note_service.get_note_etag(db=db, note_id=note_id)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    not_modified = conditional(request, response, etag)
+    if not_modified:
+        return not_modified
+    
     db_note = note_service.get_note(db=db, note_id=note_id)
     if db_note is None:
         raise HTTPException(status_code=404, detail="Note not found")
@@ -83,35 +109,76 @@ def get_all_tags(db: Session = Depends(get_db)):
     tags = note_service.get_all_tags(db=db)
     return {"tags": tags}
 
-@router.get("/tag/{tag}", response_model=List[Note])
+@router.get("/tags/counts", response_model=List[TagCount])
+def get_tag_counts(db: Session = Depends(get_db)):
+    """Get the number of non-archived notes per tag"""
+    return tag_service.get_tag_counts(db=db)
+
+@router.get("/tag/{tag}", response_model=Union[List[Note], List[NoteSummary]])
 def get_notes_by_tag(
     tag: str,
-    skip: int = 0,
+    request: Request,
+    response: Response,
+    skip: int = Query(0, description="Deprecated: OFFSET paging, slow on deep pages; use cursor"),
     limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: NoteFields = "full",
     db: Session = Depends(get_db)
 ):
-    """Get notes by tag"""
-    return note_service.get_notes_by_tag(
-        db=db,
-        tag=tag,
-        skip=skip,
-        limit=limit
-    )
+    """Get notes by tag, newest first; the X-Next-Cursor header holds the cursor of the next page"""
+    try:
+        notes = note_service.get_notes_by_tag(
+            db=db,
+            tag=tag,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            fields=fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    not_modified = conditional(request, response, note_service.get_page_etag(notes, fields))
+    if not_modified:
+        return not_modified
+    _set_next_cursor(response, notes, limit)
+    return [_project(note, fields) for note in notes]
 
-@router.post("/search", response_model=List[SimilarNoteResult])
+@router.post("/search", response_model=Union[FacetedSearchResults, List[SimilarNoteResult]])
 def search_notes(
     search_query: NoteSearchQuery,
     db: Session = Depends(get_db)
 ):
     """Search for notes by text and/or tags, with optional semantic search"""
-    return note_service.search_notes(
+    if search_query.facets:
+        if search_query.semantic or search_query.hybrid:
+            raise HTTPException(status_code=400, detail="Facets are not supported for semantic or hybrid search")
+        faceted = note_service.faceted_search(
+            db=db,
+            query=search_query.query,
+            tags=search_query.tags,
+            limit=search_query.limit,
+            archived=search_query.archived,
+            fuzzy=search_query.fuzzy,
+            similarity_threshold=search_query.similarity_threshold,
+            fields=search_query.fields
+        )
+        faceted["results"] = _project_results(faceted["results"], search_query.fields)
+        return faceted
+    
+    results = note_service.search_notes(
         db=db,
         query=search_query.query,
         tags=search_query.tags,
         semantic=search_query.semantic,
         limit=search_query.limit,
-        archived=search_query.archived
+        archived=search_query.archived,
+        fuzzy=search_query.fuzzy,
+        similarity_threshold=search_query.similarity_threshold,
+        hybrid=search_query.hybrid,
+        fields=search_query.fields
     )
+    return _project_results(results, search_query.fields)
 
 @router.get("/{note_id}/similar", response_model=List[SimilarNoteResult])
 def get_similar_notes(
@@ -131,6 +198,25 @@ def get_similar_notes(
         limit=limit
     )
 
+@router.get("/{note_id}/graph", response_model=NoteGraph)
+def get_note_graph(
+    note_id: str,
+    request: Request,
+    response: Response,
+    depth: int = Query(1, ge=1, le=settings.GRAPH_MAX_DEPTH),
+    limit: int = Query(100, ge=1, le=settings.GRAPH_MAX_NODES),
+    similar: bool = Query(False, description="Also return similarity edges between the nodes"),
+    db: Session = Depends(get_db)
+):
+    """Get the notes within `depth` links of a note, in either direction, and the links between them"""
+    graph = graph_service.get_graph(db=db, note_id=note_id, depth=depth, limit=limit, similar=similar)
+    if graph is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    not_modified = conditional(request, response, graph["etag"])
+    if not_modified:
+        return not_modified
+    return graph
+
 @router.post("/merge", response_model=Note)
 def merge_notes(
     note_ids: List[str],
@@ -149,4 +235,19 @@ def merge_notes(
     if merged_note is None:
         raise HTTPException(status_code=404, detail="No valid notes to merge")
     
-    return merged_note
\ No newline at end of file
+    return merged_note
+
+def _set_next_cursor(response: Response, notes: List[Note], limit: int) -> None:
+    # In a header so the body stays the plain list existing clients expect
+    next_cursor = note_service.next_cursor(notes, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+def _project(note, fields: str):
+    # Serialize with the requested schema here, so a summary never touches deferred bodies
+    if fields == "summary":
+        return NoteSummary.model_validate(note)
+    return Note.model_validate(note)
+
+def _project_results(results: List[dict], fields: str) -> List[dict]:
+    return [{**result, "note": _project(result["note"], fields)} for result in results]
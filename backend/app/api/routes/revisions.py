@@ -1,9 +1,10 @@
 # api/routes/revisions.py
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
+from app.api.caching import IMMUTABLE, REVALIDATE, conditional
 from app.db.session import get_db
 from app.schemas.revisions import Revision, DiffView
 from app.schemas.notes import Note
@@ -12,19 +13,31 @@ from app.services.note_service import note_service
 
 router = APIRouter()
 
+# Bumped whenever get_diff_view renders differently, so clients holding an old rendering miss
+DIFF_VIEW_VERSION = 1
+
 @router.get("/{note_id}/revisions", response_model=List[Revision])
-def get_note_revisions(note_id: str, db: Session = Depends(get_db)):
+def get_note_revisions(note_id: str, request: Request, response: Response, db: Session = Depends(get_db)):
     """Get all revisions for a note"""
     # Verify note exists
-    db_note = note_service.get_note(db=db, note_id=note_id)
-    if db_note is None:
+    if note_service.get_note_etag(db=db, note_id=note_id) is None:
         raise HTTPException(status_code=404, detail="Note not found")
-        
+    
+    not_modified = conditional(request, response, revision_service.get_revisions_etag(db=db, note_id=note_id))
+    if not_modified:
+        return not_modified
     return revision_service.get_revisions(db=db, note_id=note_id)
 
 @router.get("/revision/{revision_id}", response_model=Revision)
-def get_revision(revision_id: UUID, db: Session = Depends(get_db)):
+def get_revision(revision_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     """Get a specific revision by ID"""
+    # Revisions are immutable, so a matching ETag only needs the revision to still exist
+    if not revision_service.revision_exists(db=db, revision_id=revision_id):
+        raise HTTPException(status_code=404, detail="Revision not found")
+    not_modified = conditional(request, response, f'"{revision_id}"', IMMUTABLE)
+    if not_modified:
+        return not_modified
+    
     revision = revision_service.get_revision(db=db, revision_id=revision_id)
     if revision is None:
         raise HTTPException(status_code=404, detail="Revision not found")
@@ -32,8 +45,18 @@ def get_revision(revision_id: UUID, db: Session = Depends(get_db)):
     return revision
 
 @router.get("/revision/{revision_id}/diff", response_model=DiffView)
-def get_revision_diff(revision_id: UUID, db: Session = Depends(get_db)):
+def get_revision_diff(revision_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     """Get diff view for a revision"""
+    if not revision_service.revision_exists(db=db, revision_id=revision_id):
+        raise HTTPException(status_code=404, detail="Revision not found")
+    # The rendering is still a placeholder (see RevisionService.get_diff_view), so unlike the
+    # revision itself it is revalidated rather than cached for good
+    not_modified = conditional(
+        request, response, f'"{revision_id}-diff-v{DIFF_VIEW_VERSION}"', REVALIDATE
+    )
+    if not_modified:
+        return not_modified
+    
     diff_view = revision_service.get_diff_view(db=db, revision_id=revision_id)
     if diff_view is None:
         raise HTTPException(status_code=404, detail="Revision not found")
@@ -61,12 +84,21 @@ def revert_to_revision(
     return reverted_note
 
 @router.get("/{note_id}/revision/{revision_number}/content")
-def get_note_at_revision(note_id: str, revision_number: int, db: Session = Depends(get_db)):
+def get_note_at_revision(
+    note_id: str,
+    revision_number: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
     """Get a note's content at a specific revision"""
-    # Verify note exists
-    db_note = note_service.get_note(db=db, note_id=note_id)
-    if db_note is None:
+    # Bodies at a revision are fixed, but title and tags come from the current note
+    etag = note_service.get_note_etag(db=db, note_id=note_id, variant=f"-r{revision_number}")
+    if etag is None:
         raise HTTPException(status_code=404, detail="Note not found")
+    not_modified = conditional(request, response, etag)
+    if not_modified:
+        return not_modified
     
     reconstructed = revision_service.reconstruct_note_at_revision(
         db=db,
@@ -0,0 +1,41 @@
+# backfill.py
+"""Re-embed every note after EMBEDDING_MODEL or VECTOR_DIMENSIONS changes.
+
+Run with the new settings while the API keeps serving the old ones. Progress is checkpointed
+in embedding_backfills, so an interrupted run resumes where it stopped:
+
+    EMBEDDING_MODEL=all-mpnet-base-v2 VECTOR_DIMENSIONS=768 python -m app.backfill --shadow
+    EMBEDDING_MODEL=all-mpnet-base-v2 VECTOR_DIMENSIONS=768 python -m app.backfill --shadow --swap
+"""
+import argparse
+import logging
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.backfill_service import backfill_service
+
+logger = logging.getLogger("app.backfill")
+
+def run(shadow: bool, swap: bool, batch_size: int) -> None:
+    """Carry the backfill of the configured model as far as the options allow"""
+    db = SessionLocal()
+    try:
+        backfill = backfill_service.run(db, shadow=shadow, swap=swap, batch_size=batch_size)
+        logger.info("Backfill %s is %s (%d notes written)", backfill.name, backfill.phase,
+                    backfill.processed)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute notes.vector_data with the configured model")
+    parser.add_argument("--shadow", action="store_true",
+                        help="write to a shadow column so search stays on the old vectors")
+    parser.add_argument("--swap", action="store_true",
+                        help="swap the finished shadow column in for vector_data")
+    parser.add_argument("--batch-size", type=int, default=settings.BACKFILL_BATCH_SIZE)
+    args = parser.parse_args()
+    if args.swap and not args.shadow:
+        parser.error("--swap requires --shadow")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    run(args.shadow, args.swap, args.batch_size)
@@ -1,6 +1,7 @@
 # core/config.py
 import os
 from pathlib import Path
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -18,6 +19,77 @@ class Settings(BaseSettings):
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"  # Sentence transformer model
     VECTOR_DIMENSIONS: int = 384  # Dimensions for vector embeddings (all-MiniLM-L6-v2 produces 384-dim vectors)
 
+    # Embedding inference backend
+    EMBEDDING_BACKEND: str = "local"  # "local" (in-process) or "process_pool" (model replicas in worker processes)
+    EMBEDDING_POOL_WORKERS: int = 2  # Model replicas for the process_pool backend
+    EMBEDDING_TORCH_THREADS: int = 1  # Intra-op torch threads per replica (pool process or gunicorn worker)
+    EMBEDDING_POOL_PIN_CPUS: bool = False  # Pin each replica to its own CPU cores (Linux only)
+    EMBEDDING_INFERENCE: str = "torch"  # "torch" (fp32), "torch_int8" (quantized) or "onnx" (exported graph)
+    EMBEDDING_ONNX_FILE: Optional[str] = None  # ONNX export to load, e.g. "onnx/model_qint8_avx512.onnx"
+    EMBEDDING_WARMUP_BLOCKING: bool = False  # Finish model warm-up before startup completes
+
+    # Embedding micro-batching (concurrent generate_embedding calls share a forward pass)
+    EMBEDDING_BATCHING: bool = True
+    EMBEDDING_MAX_BATCH_SIZE: int = 32  # Texts per model call
+    EMBEDDING_MAX_WAIT_MS: float = 5.0  # How long the first queued text waits for company
+
+    # Embedding cache (keyed by hash of model name + text)
+    EMBEDDING_CACHE_SIZE: int = 10000  # In-process LRU entries (~1.5 KB each at 384 dims)
+    EMBEDDING_CACHE_PERSIST: bool = True  # Also keep vectors in the embedding_cache table
+
+    # Note cache (serialized notes behind get_note, invalidated across workers via LISTEN/NOTIFY)
+    NOTE_CACHE_SIZE: int = 2000  # In-process LRU entries; 0 disables the cache
+    NOTE_CACHE_TTL: float = 60.0  # Seconds an entry is served; bounds staleness if a NOTIFY is missed
+    NOTE_CACHE_RECONNECT_DELAY: float = 5.0  # Seconds before the listener reconnects after an error
+
+    # Revision history keyframes (full-content snapshots bounding reconstruction)
+    REVISION_KEYFRAME_INTERVAL: int = 50  # Revisions between keyframes; 0 disables this trigger
+    # Or sooner, once this much diff text accumulated (patch text is URL-encoded ASCII); 0 disables
+    REVISION_KEYFRAME_DELTA_BYTES: int = 256 * 1024
+
+    # Link graph neighbourhoods (/notes/{id}/graph)
+    GRAPH_MAX_DEPTH: int = 3  # Hops a request may ask for
+    GRAPH_MAX_NODES: int = 500  # Nodes a request may ask for
+    GRAPH_SIMILARITY_THRESHOLD: float = 0.6  # Minimum cosine similarity of overlay edges
+    GRAPH_CACHE_SIZE: int = 500  # Cached neighbourhoods per worker; 0 disables the cache
+    GRAPH_CACHE_TTL: float = 300.0  # Seconds a cached neighbourhood is served
+
+    # Background indexing (embeddings and backlinks maintained by `python -m app.worker`)
+    DEFERRED_INDEXING: bool = False  # Commit writes immediately and leave derived fields to workers
+    WORKER_BATCH_SIZE: int = 64  # Jobs claimed per batch
+    WORKER_POLL_INTERVAL: float = 1.0  # Seconds to sleep when the queue is empty
+    JOB_MAX_ATTEMPTS: int = 5  # Failed jobs are retried with backoff up to this many times
+
+    # Re-embedding backfills (`python -m app.backfill` after changing the model or dimensions)
+    BACKFILL_BATCH_SIZE: int = 256  # Notes encoded and written back per checkpoint
+
+    # Summary projections (fields=summary on listings and search)
+    NOTE_EXCERPT_LENGTH: int = 200  # Leading characters of raw_content returned as the excerpt
+
+    # Full-text search (non-semantic /notes/search)
+    SEARCH_TEXT_CONFIG: str = "english"  # Postgres text search configuration (stemming, stop words)
+    SEARCH_HEADLINE_OPTIONS: str = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=8"
+
+    # Hybrid search (full-text and vector candidates fused with reciprocal rank fusion)
+    HYBRID_CANDIDATES: int = 100  # Candidates taken from each side before fusing
+    HYBRID_RRF_K: int = 60  # Rank offset k in 1 / (k + rank); larger flattens the head of each list
+
+    # Fuzzy title search (pg_trgm)
+    TRIGRAM_SIMILARITY_THRESHOLD: float = 0.3  # Minimum similarity() for a typo-tolerant title match
+    TRIGRAM_INDEX_CONTENT: bool = False  # Also index raw_content, so fuzzy mode matches substrings of bodies
+
+    # Vector Index (pgvector approximate nearest neighbour)
+    VECTOR_INDEX_TYPE: str = "hnsw"  # "hnsw", "ivfflat" or "none" (exact sequential scans)
+    HNSW_M: int = 16  # Build: max connections per graph layer
+    HNSW_EF_CONSTRUCTION: int = 64  # Build: candidate list size while inserting
+    HNSW_EF_SEARCH: int = 40  # Query: candidate list size (higher = better recall, slower)
+    IVFFLAT_LISTS: int = 100  # Build: number of inverted lists (~rows / 1000 up to 1M rows)
+    IVFFLAT_PROBES: int = 10  # Query: lists scanned per query (higher = better recall, slower)
+    VECTOR_ITERATIVE_SCAN: str = "relaxed_order"  # Keep scanning past filtered-out rows: "relaxed_order", "strict_order" or "off" (forced off at startup on pgvector < 0.8)
+    HNSW_MAX_SCAN_TUPLES: int = 20000  # Query: cap on tuples an iterative HNSW scan visits
+    VECTOR_FILTER_OVERFETCH: int = 4  # Growth factor of the candidate count when filters leave too few results
+    VECTOR_FILTER_MAX_CANDIDATES: int = 2000  # Beyond this, filtered searches rank the matching rows exactly
+
     # Security (for POC, simplified)
     SECRET_KEY: str = os.getenv("SECRET_KEY", "dev_secret_key")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 1 week
@@ -27,4 +99,13 @@ class Settings(BaseSettings):
     
     model_config = SettingsConfigDict(env_file=".env")
 
+    def vector_index_params(self, index_type: Optional[str] = None) -> Dict[str, int]:
+        """Build parameters (the index WITH clause) for the given vector index type"""
+        index_type = index_type or self.VECTOR_INDEX_TYPE
+        if index_type == "hnsw":
+            return {"m": self.HNSW_M, "ef_construction": self.HNSW_EF_CONSTRUCTION}
+        if index_type == "ivfflat":
+            return {"lists": self.IVFFLAT_LISTS}
+        return {}
+
 settings = Settings()
\ No newline at end of file
@@ -5,4 +5,6 @@ def init_db(db: Session) -> None:
     """Initialize database with required extensions and settings"""
     # Create pgvector extension if it doesn't exist
     db.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
+    # Trigram matching for fuzzy and substring title search
+    db.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
     db.commit() 
\ No newline at end of file
@@ -1,11 +1,13 @@
 # db/models.py
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, Integer, ARRAY
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, Integer, BigInteger, ARRAY, Index, Computed, DDL, event, select
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
+from sqlalchemy.orm import column_property, deferred
 from pgvector.sqlalchemy import Vector
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
+from app.core.config import settings
 import uuid
 
 Base = declarative_base()
@@ -14,16 +16,212 @@ class Note(Base):
     __tablename__ = "notes"
     
     id = Column(String, primary_key=True)  # Content hash as ID
-    raw_content = Column(Text, nullable=False)  # Original markdown
+    # Bodies (group "body") and the embedding are loaded only when a query undefers them
+    raw_content = deferred(Column(Text, nullable=False), group="body")  # Original markdown
     title = Column(String, nullable=False)  # Note title
-    content = Column(Text, nullable=False)  # Processed content
+    content = deferred(Column(Text, nullable=False), group="body")  # Processed content
     created_at = Column(DateTime, nullable=False, server_default=func.now())
     updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
     archived = Column(Boolean, nullable=False, default=False)  # Soft delete flag
     tags = Column(ARRAY(String), default=[])  # Array of tags
-    links_to = Column(ARRAY(String), default=[])  # Outgoing links
-    links_from = Column(ARRAY(String), default=[])  # Incoming links
-    vector_data = Column(Vector(384))  # Embedding vector for similarity search
+    vector_data = deferred(Column(Vector(settings.VECTOR_DIMENSIONS)))  # Embedding vector for similarity search
+    stale = Column(ARRAY(String), nullable=False, default=list, server_default="{}")  # Derived fields awaiting background jobs
+    # Full-text document (title weighted above body), kept up to date by Postgres; never loaded by default
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        f"setweight(to_tsvector('{settings.SEARCH_TEXT_CONFIG}', title), 'A') || "
+        f"setweight(to_tsvector('{settings.SEARCH_TEXT_CONFIG}', raw_content), 'B')",
+        persisted=True
+    )))
+
+# Leading characters of raw_content, computed by Postgres for summary projections
+Note.excerpt = column_property(
+    func.left(Note.__table__.c.raw_content, settings.NOTE_EXCERPT_LENGTH), deferred=True
+)
+
+# Approximate nearest neighbour index for cosine-distance (<=>) ordering on vector_data.
+# Existing databases get it from migrations; rebuilds go through vector_index_service.
+VECTOR_INDEX_NAME = "ix_notes_vector_data"
+
+if settings.VECTOR_INDEX_TYPE in ("hnsw", "ivfflat"):
+    Index(
+        VECTOR_INDEX_NAME,
+        Note.vector_data,
+        postgresql_using=settings.VECTOR_INDEX_TYPE,
+        postgresql_with=settings.vector_index_params(),
+        postgresql_ops={"vector_data": "vector_cosine_ops"},
+    )
+
+# Listings page by (updated_at DESC, id) keyset; archived leads so the default listing seeks into it
+Index("ix_notes_archived_updated_at_id", Note.archived, Note.updated_at.desc(), Note.id)
+
+# GIN index serving full-text (@@) search on the generated document
+Index("ix_notes_search_vector", Note.search_vector, postgresql_using="gin")
+
+# Trigram indexes serving fuzzy (%) and substring (ILIKE) matches
+Index(
+    "ix_notes_title_trgm",
+    Note.title,
+    postgresql_using="gin",
+    postgresql_ops={"title": "gin_trgm_ops"},
+)
+
+if settings.TRIGRAM_INDEX_CONTENT:
+    Index(
+        "ix_notes_raw_content_trgm",
+        Note.raw_content,
+        postgresql_using="gin",
+        postgresql_ops={"raw_content": "gin_trgm_ops"},
+    )
+
+class NoteTag(Base):
+    __tablename__ = "note_tags"
+    
+    note_id = Column(String, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True)
+    tag = Column(String, primary_key=True)  # Lowercased; notes.tags keeps the spelling as entered
+    
+    __table_args__ = (
+        Index("ix_note_tags_tag_note_id", "tag", "note_id"),
+    )
+
+class NoteAlias(Base):
+    __tablename__ = "note_aliases"
+    
+    alias = Column(String, primary_key=True)  # Normalized (link_service.normalize) id or title
+    note_id = Column(String, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True)
+    # Which alias a link resolves to when several notes share it: lowest kind, then oldest note
+    kind = Column(Integer, nullable=False)  # ALIAS_ID, ALIAS_TITLE or ALIAS_FORMER_TITLE
+    
+    __table_args__ = (
+        Index("ix_note_aliases_note_id", "note_id"),
+    )
+
+ALIAS_ID = 0
+ALIAS_TITLE = 1
+ALIAS_FORMER_TITLE = 2  # Kept on rename so existing title links follow the note
+
+class NoteLink(Base):
+    __tablename__ = "note_links"
+    
+    source_id = Column(String, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True)
+    target_alias = Column(String, primary_key=True)  # Link text as written, normalized
+    # The note the alias resolves to, or the alias itself while no note has it. Not a foreign
+    # key: links may name notes not written yet
+    target_id = Column(String, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_note_links_target_id_source_id", "target_id", "source_id"),
+        # Finds the links to re-resolve when a note is created or renamed
+        Index("ix_note_links_target_alias", "target_alias"),
+    )
+
+# links_to/links_from are read from note_links (each direction has its own index) by correlated
+# subqueries, so a page of notes gets its links in the same statement; writes go through
+# link_service, never through these attributes
+Note.links_to = column_property(
+    func.array(
+        select(NoteLink.target_id)
+        .distinct()
+        .where(NoteLink.source_id == Note.id)
+        .order_by(NoteLink.target_id)
+        .correlate_except(NoteLink)
+        .scalar_subquery(),
+        type_=ARRAY(String)
+    ),
+    deferred=True, group="links"
+)
+Note.links_from = column_property(
+    func.array(
+        select(NoteLink.source_id)
+        .distinct()
+        .where(NoteLink.target_id == Note.id)
+        .order_by(NoteLink.source_id)
+        .correlate_except(NoteLink)
+        .scalar_subquery(),
+        type_=ARRAY(String)
+    ),
+    deferred=True, group="links"
+)
+
+class TagStat(Base):
+    __tablename__ = "tag_stats"
+    
+    tag = Column(String, primary_key=True)  # Lowercased
+    note_count = Column(Integer, nullable=False, default=0)  # Non-archived notes carrying the tag
+
+# note_tags and tag_stats follow notes.tags/archived in the writing transaction, whatever the
+# write path. Stats rows are updated in tag order so concurrent writers cannot deadlock.
+NOTES_SYNC_TAGS_FUNCTION = """
+CREATE OR REPLACE FUNCTION notes_sync_tags() RETURNS trigger AS $$
+DECLARE
+    old_tags text[] := '{}';
+    new_tags text[] := '{}';
+    counted_old text[] := '{}';
+    counted_new text[] := '{}';
+    t text;
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        old_tags := ARRAY(SELECT DISTINCT lower(x) FROM unnest(OLD.tags) x WHERE x IS NOT NULL ORDER BY 1);
+        IF NOT OLD.archived THEN counted_old := old_tags; END IF;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        new_tags := ARRAY(SELECT DISTINCT lower(x) FROM unnest(NEW.tags) x WHERE x IS NOT NULL ORDER BY 1);
+        IF NOT NEW.archived THEN counted_new := new_tags; END IF;
+    END IF;
+
+    IF TG_OP <> 'INSERT' AND old_tags <> new_tags THEN
+        DELETE FROM note_tags WHERE note_id = OLD.id AND NOT (tag = ANY(new_tags));
+    END IF;
+    IF TG_OP <> 'DELETE' AND old_tags <> new_tags THEN
+        INSERT INTO note_tags (note_id, tag)
+        SELECT NEW.id, x FROM unnest(new_tags) x
+        ON CONFLICT DO NOTHING;
+    END IF;
+
+    FOREACH t IN ARRAY ARRAY(
+        SELECT x FROM unnest(counted_old || counted_new) x GROUP BY x ORDER BY x
+    ) LOOP
+        IF t = ANY(counted_new) AND NOT (t = ANY(counted_old)) THEN
+            INSERT INTO tag_stats (tag, note_count) VALUES (t, 1)
+            ON CONFLICT (tag) DO UPDATE SET note_count = tag_stats.note_count + 1;
+        ELSIF t = ANY(counted_old) AND NOT (t = ANY(counted_new)) THEN
+            UPDATE tag_stats SET note_count = note_count - 1 WHERE tag = t;
+            -- Keep the table as small as the set of tags in use
+            DELETE FROM tag_stats WHERE tag = t AND note_count <= 0;
+        END IF;
+    END LOOP;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# Installs the trigger and fills note_tags/tag_stats from existing notes, once
+NOTES_SYNC_TAGS_TRIGGER = """
+DO $do$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_trigger WHERE tgname = 'notes_sync_tags' AND tgrelid = 'notes'::regclass
+    ) THEN
+        CREATE TRIGGER notes_sync_tags
+        AFTER INSERT OR DELETE OR UPDATE OF tags, archived ON notes
+        FOR EACH ROW EXECUTE FUNCTION notes_sync_tags();
+
+        INSERT INTO note_tags (note_id, tag)
+        SELECT DISTINCT n.id, lower(x) FROM notes n, unnest(n.tags) x WHERE x IS NOT NULL
+        ON CONFLICT DO NOTHING;
+
+        DELETE FROM tag_stats;
+        INSERT INTO tag_stats (tag, note_count)
+        SELECT nt.tag, count(*) FROM note_tags nt JOIN notes n ON n.id = nt.note_id
+        WHERE NOT n.archived
+        GROUP BY nt.tag;
+    END IF;
+END
+$do$
+"""
+
+# Runs after create_all has created every table (existing databases get it from migrations)
+event.listen(Base.metadata, "after_create", DDL(NOTES_SYNC_TAGS_FUNCTION))
+event.listen(Base.metadata, "after_create", DDL(NOTES_SYNC_TAGS_TRIGGER))
 
 class NoteRevision(Base):
     __tablename__ = "notes_revision"
@@ -32,8 +230,60 @@ class NoteRevision(Base):
     revision_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)  # Unique revision ID
     content_raw_diff = Column(Text, nullable=False)  # Diff of raw content
     content_diff = Column(Text, nullable=False)  # Diff of processed content
+    # The same diffs inverted (new to old), so history is walked backwards by patching alone;
+    # loaded only by backward reconstruction
+    content_raw_reverse_diff = deferred(Column(Text, nullable=False), group="reverse")
+    content_reverse_diff = deferred(Column(Text, nullable=False), group="reverse")
     created_at = Column(DateTime, nullable=False, server_default=func.now())
     revision_name = Column(String, nullable=True)  # Optional revision name
     revision_note = Column(String, nullable=True)  # Optional note about changes
     revision_number = Column(Integer, nullable=False)  # Sequential revision number
-    parent_revision_id = Column(UUID(as_uuid=True), ForeignKey("notes_revision.revision_id"), nullable=True)  # For revision hierarchy
\ No newline at end of file
+    parent_revision_id = Column(UUID(as_uuid=True), ForeignKey("notes_revision.revision_id"), nullable=True)  # For revision hierarchy
+    # Keyframes: full contents after this revision, so reconstruction replays only nearby diffs.
+    # Null on other revisions; loaded only when reconstruction starts from them
+    raw_content_snapshot = deferred(Column(Text, nullable=True), group="snapshot")
+    content_snapshot = deferred(Column(Text, nullable=True), group="snapshot")
+    
+    __table_args__ = (
+        # Revision ranges and keyframe lookups of one note
+        Index("ix_notes_revision_note_id_revision_number", "note_id", "revision_number"),
+    )
+
+class NoteJob(Base):
+    __tablename__ = "note_jobs"
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=True)  # Also the processing order
+    note_id = Column(String, ForeignKey("notes.id"), nullable=False)
+    kind = Column(String, nullable=False)  # Derived field to recompute: "embedding" or "links"
+    payload = Column(JSONB, nullable=True)  # Kind-specific input (e.g. links before the edit)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    run_after = Column(DateTime, nullable=False, server_default=func.now())  # Retry backoff
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_note_jobs_kind_id", "kind", "id"),
+    )
+
+class EmbeddingCacheEntry(Base):
+    __tablename__ = "embedding_cache"
+    
+    key = Column(String, primary_key=True)  # sha256(model name + text)
+    model = Column(String, nullable=False)  # Model that produced the vector
+    vector = Column(Vector(), nullable=False)  # Dimensions vary by model
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+class EmbeddingBackfill(Base):
+    __tablename__ = "embedding_backfills"
+    
+    name = Column(String, primary_key=True)  # Model identity, dimensions and target column
+    model = Column(String, nullable=False)
+    dimensions = Column(Integer, nullable=False)
+    target_column = Column(String, nullable=False)  # vector_data, or the shadow column
+    phase = Column(String, nullable=False, default="streaming")  # streaming, catch_up, ready, completed
+    last_id = Column(String, nullable=False, default="")  # Keyset checkpoint: notes up to here are done
+    processed = Column(Integer, nullable=False, default=0)
+    watermark = Column(DateTime, nullable=True)  # Notes edited since then are re-encoded by the catch-up
+    started_at = Column(DateTime, nullable=False, server_default=func.now())
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+    completed_at = Column(DateTime, nullable=True)
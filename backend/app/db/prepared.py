@@ -0,0 +1,43 @@
+# db/prepared.py
+from typing import Dict, List, Any, Sequence, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Result
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
+
+class PreparedStatementCache:
+    """Server-side prepared statements (PREPARE/EXECUTE), prepared once per pooled connection.
+
+    psycopg2 interpolates parameters client-side, so Postgres sees a new statement text for
+    every call. Preparing lets the server parse once and reuse (generic) plans per connection.
+    """
+
+    def __init__(self):
+        # name -> (parameter names, parameter types, SQL with $n placeholders)
+        self._statements: Dict[str, Tuple[List[str], List[str], str]] = {}
+
+    def register(self, name: str, params: Sequence[Tuple[str, str]], sql: str) -> None:
+        """Register a statement; params are (name, postgres type) pairs in $1..$n order"""
+        self._statements[name] = ([p[0] for p in params], [p[1] for p in params], sql)
+
+    def statement(self, db: Session, name: str) -> TextClause:
+        """Return an EXECUTE clause for the statement, preparing it on this connection if needed"""
+        param_names, param_types, sql = self._statements[name]
+
+        # connection.info lives as long as the DBAPI connection, matching PREPARE's lifetime
+        connection = db.connection()
+        prepared = connection.info.setdefault("prepared_statements", set())
+        if name not in prepared:
+            connection.exec_driver_sql(
+                f"PREPARE {name} ({', '.join(param_types)}) AS {sql}"
+            )
+            prepared.add(name)
+
+        return text(f"EXECUTE {name}({', '.join(':' + p for p in param_names)})")
+
+    def execute(self, db: Session, name: str, params: Dict[str, Any]) -> Result:
+        """Execute a registered statement with bound parameters"""
+        return db.execute(self.statement(db, name), params)
+
+# Singleton instance
+prepared_statements = PreparedStatementCache()
@@ -1,5 +1,5 @@
 # db/session.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -9,6 +9,39 @@ engine = create_engine(
     settings.DATABASE_URI,
     pool_pre_ping=True,  # Verify connection before using from pool
 )
+
+@event.listens_for(engine, "connect")
+def set_vector_search_settings(dbapi_connection, connection_record):
+    """Apply query-time ANN settings once per connection instead of once per query"""
+    # Outside a transaction, so the pool's reset-on-return rollback keeps them
+    autocommit = dbapi_connection.autocommit
+    dbapi_connection.autocommit = True
+    cursor = dbapi_connection.cursor()
+    cursor.execute(
+        "SELECT set_config('hnsw.ef_search', %s, false), set_config('ivfflat.probes', %s, false)",
+        (str(settings.HNSW_EF_SEARCH), str(settings.IVFFLAT_PROBES))
+    )
+    if settings.VECTOR_ITERATIVE_SCAN != "off":
+        # pgvector >= 0.8: filtered ANN scans continue until enough rows pass the filters
+        cursor.execute(
+            "SELECT set_config('hnsw.iterative_scan', %s, false), "
+            "set_config('ivfflat.iterative_scan', %s, false), "
+            "set_config('hnsw.max_scan_tuples', %s, false)",
+            (settings.VECTOR_ITERATIVE_SCAN,
+             # ivfflat only supports relaxed ordering
+             "relaxed_order",
+             str(settings.HNSW_MAX_SCAN_TUPLES))
+        )
+    cursor.close()
+    dbapi_connection.autocommit = autocommit
+
+def warm_up_pool() -> None:
+    """Open the pool's connections ahead of traffic (runs the connect hook on each)"""
+    connections = [engine.connect() for _ in range(engine.pool.size())]
+    for connection in connections:
+        connection.exec_driver_sql("SELECT 1")
+        connection.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Dependency to get DB session
@@ -1,25 +1,65 @@
 # main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.db.models import Base
-from app.db.session import engine, SessionLocal
+from app.db.session import engine, SessionLocal, warm_up_pool
 from app.core.config import settings
-from app.api.routes import notes, revisions
+from app.api.routes import notes, revisions, admin, health
 from app.db.init_db import init_db
+from app.services.embedding_service import embedding_service
+from app.services.note_cache import note_cache
+from app.services.vector_index_service import vector_index_service
 
-# Initialize database with required extensions
-db = SessionLocal()
-try:
-    init_db(db)
-finally:
-    db.close()
+_database_prepared = False
 
-# Create tables if they don't exist
-Base.metadata.create_all(bind=engine)
+def prepare_database() -> None:
+    """Create extensions and tables once per process tree
+
+    Under gunicorn the master calls this before forking, so workers inherit the flag and do
+    not race each other through the DDL.
+    """
+    global _database_prepared
+    if _database_prepared:
+        return
+
+    # Initialize database with required extensions
+    db = SessionLocal()
+    try:
+        init_db(db)
+        iterative_scan_disabled = vector_index_service.check_iterative_scan(db)
+    finally:
+        db.close()
+    if iterative_scan_disabled:
+        # Pooled connections were opened with the iterative scan settings
+        engine.dispose()
+
+    # Create tables if they don't exist
+    Base.metadata.create_all(bind=engine)
+    _database_prepared = True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    prepare_database()
+    warm_up_pool()
+
+    # /health/ready reports 503 until the model has been loaded and run once
+    if settings.EMBEDDING_WARMUP_BLOCKING:
+        embedding_service.warm_up()
+    else:
+        embedding_service.start_warm_up()
+
+    # Per worker: each process keeps its own note cache and its own listening connection
+    note_cache.start_listener(engine)
+
+    yield
+
+    note_cache.stop_listener()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Set up CORS
@@ -29,6 +69,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -44,6 +85,18 @@ app.include_router(
     tags=["revisions"]
 )
 
+app.include_router(
+    admin.router,
+    prefix=f"{settings.API_V1_STR}/admin",
+    tags=["admin"]
+)
+
+app.include_router(
+    health.router,
+    prefix="/health",
+    tags=["health"]
+)
+
 @app.get("/")
 def root():
     return {"message": f"Welcome to {settings.PROJECT_NAME} API"}
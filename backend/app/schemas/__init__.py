@@ -1,3 +1,12 @@
 # app/schemas/__init__.py
-from .notes import Note, NoteCreate, NoteUpdate, NoteSearchQuery, SimilarNoteResult, TagList
-from .revisions import Revision, RevisionCreate, DiffView
\ No newline at end of file
+from .notes import (
+    Note, NoteCreate, NoteUpdate, NoteSearchQuery, SimilarNoteResult, TagList, TagCount,
+    NoteSummary, NoteFields, FacetCount, SearchFacets, FacetedSearchResults
+)
+from .revisions import Revision, RevisionCreate, DiffView
+from .admin import (
+    VectorIndexStatus, VectorIndexRebuild, VectorIndexTask, VectorRecallReport, SearchPlan,
+    EmbeddingBatchMetrics, EmbeddingCacheMetrics, EmbeddingParityReport, EmbeddingBackfillStatus,
+    NoteCacheMetrics, JobKindLag, JobLag
+)
+from .health import HealthStatus
@@ -0,0 +1,122 @@
+# app/schemas/admin.py
+from datetime import datetime
+from typing import List, Optional, Dict, Any
+from pydantic import BaseModel
+
+# Vector Index Schemas
+class VectorIndexStatus(BaseModel):
+    name: str
+    exists: bool
+    index_type: Optional[str] = None
+    definition: Optional[str] = None
+    options: List[str] = []
+    is_valid: Optional[bool] = None
+    size_bytes: Optional[int] = None
+    build_progress: Optional[Dict[str, Any]] = None
+    ef_search: int
+    probes: int
+
+class VectorIndexRebuild(BaseModel):
+    index_type: Optional[str] = None  # Defaults to settings.VECTOR_INDEX_TYPE
+    m: Optional[int] = None  # hnsw only
+    ef_construction: Optional[int] = None  # hnsw only
+    lists: Optional[int] = None  # ivfflat only
+    concurrently: bool = True
+
+class VectorIndexTask(BaseModel):
+    action: str
+    index_type: Optional[str] = None
+    params: Dict[str, int] = {}
+    concurrently: bool
+    status: str = "scheduled"
+
+class LatencyStats(BaseModel):
+    p50: float
+    p95: float
+    mean: float
+
+class VectorRecallReport(BaseModel):
+    index: VectorIndexStatus
+    sample_size: int
+    k: int
+    ef_search: int
+    probes: int
+    mean_recall: Optional[float] = None
+    min_recall: Optional[float] = None
+    exact_latency_ms: Optional[LatencyStats] = None
+    indexed_latency_ms: Optional[LatencyStats] = None
+
+# Search Schemas
+class SearchPlan(BaseModel):
+    query: str
+    fuzzy: bool
+    seqscan: bool
+    plan: List[str] = []
+    indexes: List[str] = []  # Indexes read by the plan
+
+# Embedding Schemas
+class EmbeddingBatchMetrics(BaseModel):
+    queue_depth: int
+    max_queue_depth: int
+    batches: int
+    items: int
+    mean_batch_size: float
+    last_batch_size: int
+    max_batch_size: int
+    batch_size_histogram: Dict[int, int] = {}
+    max_wait_ms: float
+    max_batch_size_limit: int
+
+class EmbeddingCacheMetrics(BaseModel):
+    model: str
+    entries: int
+    max_entries: int
+    memory_hits: int
+    db_hits: int
+    misses: int
+    hit_rate: float
+
+class NoteCacheMetrics(BaseModel):
+    entries: int
+    max_entries: int
+    ttl: float
+    hits: int
+    misses: int
+    invalidations: int
+    hit_rate: float
+    listening: bool  # Following invalidations from other workers
+
+class EmbeddingParityReport(BaseModel):
+    model: str
+    inference: str
+    sample_size: int
+    encode_ms_per_note: Optional[float] = None
+    mean_cosine: Optional[float] = None
+    min_cosine: Optional[float] = None
+    p05_cosine: Optional[float] = None
+    above_0_99: Optional[float] = None
+
+class EmbeddingBackfillStatus(BaseModel):
+    name: str
+    model: str
+    dimensions: int
+    target_column: str
+    phase: str
+    last_id: str
+    processed: int
+    total_notes: int
+    started_at: datetime
+    updated_at: datetime
+    completed_at: Optional[datetime] = None
+
+# Background Job Schemas
+class JobKindLag(BaseModel):
+    kind: str
+    pending: int
+    failed: int
+    oldest_created_at: Optional[datetime] = None
+    lag_seconds: Optional[float] = None
+
+class JobLag(BaseModel):
+    deferred_indexing: bool
+    jobs: List[JobKindLag] = []
@@ -0,0 +1,8 @@
+# schemas/health.py
+from typing import Dict, Optional
+from pydantic import BaseModel
+
+class HealthStatus(BaseModel):
+    status: str
+    checks: Dict[str, bool] = {}
+    detail: Optional[str] = None
@@ -1,6 +1,6 @@
 # app/schemas/note.py
 from datetime import datetime
-from typing import List, Optional, Any
+from typing import List, Literal, Optional, Any, Union
 from pydantic import BaseModel, Field, ConfigDict
 from uuid import UUID
 
@@ -27,26 +27,87 @@ class NoteInDB(NoteBase):
     archived: bool
     links_to: List[str] = []
     links_from: List[str] = []
+    stale: List[str] = []  # Derived fields (e.g. "embedding") still being recomputed
     
     model_config = ConfigDict(from_attributes=True)
 
 class Note(NoteInDB):
     pass
 
+# Projection of listing and search results: every field, or a summary without the bodies
+NoteFields = Literal["full", "summary"]
+
+class NoteSummary(BaseModel):
+    id: str
+    title: str
+    tags: Optional[List[str]] = []
+    created_at: datetime
+    updated_at: datetime
+    archived: bool
+    stale: List[str] = []
+    excerpt: Optional[str] = None  # Leading characters of raw_content
+    
+    model_config = ConfigDict(from_attributes=True)
+
 # Search Schemas
 class NoteSearchQuery(BaseModel):
     query: str = ""
     tags: Optional[List[str]] = None
     semantic: bool = False
+    hybrid: bool = False  # Full-text and semantic results fused; takes precedence over semantic
+    fuzzy: bool = False  # Typo-tolerant and substring title matching
+    similarity_threshold: Optional[float] = Field(None, ge=0, le=1)  # Fuzzy only; defaults to settings
     limit: int = 10
     archived: bool = False
+    fields: NoteFields = "full"
+    facets: bool = False  # Also count all matches per tag and per updated_at month; not semantic/hybrid
 
 class SimilarNoteResult(BaseModel):
-    note: Note
+    note: Union[Note, NoteSummary]
     similarity_score: float
+    highlight: Optional[str] = None  # Matching fragments of full-text results, terms in <mark>
     
     model_config = ConfigDict(from_attributes=True)
 
+class FacetCount(BaseModel):
+    value: str  # Tag, or updated_at month as YYYY-MM
+    count: int
+
+class SearchFacets(BaseModel):
+    tags: List[FacetCount] = []  # Most frequent first
+    months: List[FacetCount] = []  # Newest first
+
+class FacetedSearchResults(BaseModel):
+    results: List[SimilarNoteResult]
+    facets: SearchFacets
+
+# Link graph neighbourhood
+class GraphNode(BaseModel):
+    id: str
+    title: Optional[str] = None  # None for a link target that names no existing note
+    depth: int  # Hops from the requested note, links followed in either direction
+    archived: bool = False
+
+class GraphEdge(BaseModel):
+    source: str  # Linking note
+    target: str
+
+class SimilarityEdge(BaseModel):
+    source: str
+    target: str
+    score: float  # Cosine similarity of the two notes' embeddings
+
+class NoteGraph(BaseModel):
+    note_id: str
+    nodes: List[GraphNode]  # Nearest first
+    edges: List[GraphEdge]  # Every link between two returned nodes
+    similar: List[SimilarityEdge] = []  # Only when requested; most similar first
+    truncated: bool = False  # More notes were in reach than the node limit
+
 # Tag Schema
 class TagList(BaseModel):
-    tags: List[str] = []
\ No newline at end of file
+    tags: List[str] = []
+
+class TagCount(BaseModel):
+    tag: str
+    note_count: int  # Non-archived notes carrying the tag
\ No newline at end of file
@@ -0,0 +1,261 @@
+# services/backfill_service.py
+import io
+import logging
+from typing import List, Dict, Any, Optional
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.models import EmbeddingBackfill, VECTOR_INDEX_NAME
+from app.services.embedding_backends import model_identity
+from app.services.embedding_service import embedding_service
+from app.services.vector_index_service import vector_index_service
+
+logger = logging.getLogger(__name__)
+
+# Shadow column (and its ANN index) filled while search keeps reading vector_data
+SHADOW_COLUMN = "vector_data_shadow"
+SHADOW_INDEX_NAME = f"{VECTOR_INDEX_NAME}_shadow"
+
+# An edit whose transaction started before a watermark can commit after it; look back this far
+WATERMARK_SLACK = "5 minutes"
+
+class BackfillService:
+    """Recomputes every note's embedding with the configured model, resumably.
+
+    Notes are streamed in id (keyset) order through a server-side cursor, encoded in batches
+    and written back with COPY; each batch commits together with its checkpoint. Phases:
+    streaming -> catch_up (re-encode notes edited meanwhile) -> ready -> completed. Writing to
+    the shadow column keeps search on the old vectors until swap() renames it into place.
+    """
+
+    def target_name(self, shadow: bool) -> str:
+        """Checkpoint name for the configured model, dimensions and target column"""
+        identity = model_identity(
+            settings.EMBEDDING_MODEL, settings.EMBEDDING_INFERENCE, settings.EMBEDDING_ONNX_FILE
+        )
+        column = SHADOW_COLUMN if shadow else "vector_data"
+        return f"{identity}:{settings.VECTOR_DIMENSIONS}:{column}"
+
+    def run(self, db: Session, shadow: bool = False, swap: bool = False,
+            batch_size: Optional[int] = None) -> EmbeddingBackfill:
+        """Start or resume the backfill for the configured model and carry it as far as allowed"""
+        batch_size = batch_size or settings.BACKFILL_BATCH_SIZE
+        backfill = self._checkpoint(db, shadow)
+
+        if backfill.phase == "streaming":
+            self._stream(db, backfill, batch_size)
+            backfill.phase = "catch_up"
+            db.commit()
+
+        if backfill.phase == "catch_up":
+            self._catch_up(db, backfill, batch_size)
+            if shadow:
+                self._build_shadow_index(db)
+                backfill.phase = "ready"
+            else:
+                # In place there is nothing to swap: search already reads the new vectors
+                backfill.phase = "completed"
+                backfill.completed_at = db.execute(text("SELECT now()")).scalar()
+            db.commit()
+
+        if backfill.phase == "ready" and swap:
+            self.swap(db, backfill, batch_size)
+
+        return backfill
+
+    def swap(self, db: Session, backfill: EmbeddingBackfill, batch_size: int) -> None:
+        """Re-encode the last edits and rename the shadow column over vector_data atomically"""
+        # Blocks writers (and waits for in-flight ones) while searches keep running
+        db.execute(text("LOCK TABLE notes IN SHARE ROW EXCLUSIVE MODE"))
+        self._catch_up(db, backfill, batch_size, commit=False)
+
+        # Column and index renames are catalog-only; the old column is dropped without a rewrite
+        db.execute(text(f"DROP INDEX IF EXISTS {VECTOR_INDEX_NAME}"))
+        db.execute(text("ALTER TABLE notes DROP COLUMN vector_data"))
+        db.execute(text(f"ALTER TABLE notes RENAME COLUMN {SHADOW_COLUMN} TO vector_data"))
+        db.execute(text(f"ALTER INDEX IF EXISTS {SHADOW_INDEX_NAME} RENAME TO {VECTOR_INDEX_NAME}"))
+
+        backfill.phase = "completed"
+        backfill.completed_at = db.execute(text("SELECT now()")).scalar()
+        backfill.updated_at = backfill.completed_at
+        db.commit()
+        logger.info("Swapped %s into notes.vector_data", SHADOW_COLUMN)
+
+    def get_backfills(self, db: Session) -> List[Dict[str, Any]]:
+        """Checkpoints of all backfills, with the number of notes to cover"""
+        total = db.execute(text("SELECT count(*) FROM notes")).scalar()
+        backfills = db.query(EmbeddingBackfill).order_by(EmbeddingBackfill.started_at.desc()).all()
+        return [
+            {
+                "name": backfill.name,
+                "model": backfill.model,
+                "dimensions": backfill.dimensions,
+                "target_column": backfill.target_column,
+                "phase": backfill.phase,
+                "last_id": backfill.last_id,
+                "processed": backfill.processed,
+                "total_notes": total,
+                "started_at": backfill.started_at,
+                "updated_at": backfill.updated_at,
+                "completed_at": backfill.completed_at,
+            }
+            for backfill in backfills
+        ]
+
+    def _checkpoint(self, db: Session, shadow: bool) -> EmbeddingBackfill:
+        """Load the checkpoint of the configured target, creating it (and the shadow column) if new"""
+        name = self.target_name(shadow)
+        backfill = db.get(EmbeddingBackfill, name)
+        if backfill is not None:
+            return backfill
+
+        column = SHADOW_COLUMN if shadow else "vector_data"
+        if shadow:
+            # A shadow column left by an abandoned backfill may hold another model's vectors
+            db.query(EmbeddingBackfill).filter(
+                EmbeddingBackfill.target_column == SHADOW_COLUMN,
+                EmbeddingBackfill.phase != "completed"
+            ).delete()
+            db.execute(text(f"ALTER TABLE notes DROP COLUMN IF EXISTS {SHADOW_COLUMN}"))
+            db.execute(text(
+                f"ALTER TABLE notes ADD COLUMN {SHADOW_COLUMN} vector({int(settings.VECTOR_DIMENSIONS)})"
+            ))
+        else:
+            current = self._column_type(db, "vector_data")
+            if current != f"vector({settings.VECTOR_DIMENSIONS})":
+                raise ValueError(
+                    f"notes.vector_data is {current}; re-embed into the shadow column "
+                    f"to change dimensions to {settings.VECTOR_DIMENSIONS}"
+                )
+
+        backfill = EmbeddingBackfill(
+            name=name,
+            model=settings.EMBEDDING_MODEL,
+            dimensions=settings.VECTOR_DIMENSIONS,
+            target_column=column,
+            phase="streaming",
+            last_id="",
+            processed=0,
+        )
+        db.add(backfill)
+        db.flush()
+        # Everything edited from here on is revisited by the catch-up phase
+        backfill.watermark = db.execute(
+            text(f"SELECT now() - interval '{WATERMARK_SLACK}'")
+        ).scalar()
+        db.commit()
+        return backfill
+
+    def _stream(self, db: Session, backfill: EmbeddingBackfill, batch_size: int) -> None:
+        """Encode all notes after the checkpoint in id order, committing progress per batch"""
+        # A second connection holds the cursor open across the writer's commits
+        with db.get_bind().connect() as reader:
+            result = reader.execution_options(stream_results=True, max_row_buffer=batch_size).execute(
+                text("""
+                SELECT id, title, raw_content, md5(title || ' ' || raw_content) AS text_hash
+                FROM notes
+                WHERE id > :last_id
+                ORDER BY id
+                """),
+                {"last_id": backfill.last_id}
+            )
+            for rows in result.partitions(batch_size):
+                self._write(db, backfill, rows)
+                backfill.last_id = rows[-1].id
+                backfill.processed += len(rows)
+                backfill.updated_at = db.execute(text("SELECT now()")).scalar()
+                db.commit()
+                logger.info("Re-embedded %d notes (up to %s)", backfill.processed, backfill.last_id)
+
+    def _catch_up(self, db: Session, backfill: EmbeddingBackfill, batch_size: int,
+                  commit: bool = True) -> None:
+        """Re-encode notes created or edited since the watermark"""
+        next_watermark = db.execute(text(f"SELECT now() - interval '{WATERMARK_SLACK}'")).scalar()
+        last_id = ""
+        while True:
+            rows = db.execute(
+                text("""
+                SELECT id, title, raw_content, md5(title || ' ' || raw_content) AS text_hash
+                FROM notes
+                WHERE updated_at >= :watermark AND id > :last_id
+                ORDER BY id
+                LIMIT :batch_size
+                """),
+                {"watermark": backfill.watermark, "last_id": last_id, "batch_size": batch_size}
+            ).fetchall()
+            if not rows:
+                break
+            self._write(db, backfill, rows)
+            last_id = rows[-1].id
+            backfill.processed += len(rows)
+            if commit:
+                db.commit()
+
+        backfill.watermark = next_watermark
+        if commit:
+            db.commit()
+
+    def _write(self, db: Session, backfill: EmbeddingBackfill, rows: List[Any]) -> None:
+        """Encode a batch and COPY its vectors into the target column (caller commits)"""
+        vectors = embedding_service.generate_embeddings(
+            [row.title + " " + row.raw_content for row in rows], db=db
+        )
+        if len(vectors) and len(vectors[0]) != backfill.dimensions:
+            raise ValueError(
+                f"{backfill.model} produces {len(vectors[0])}-dimensional vectors, "
+                f"not {backfill.dimensions}"
+            )
+
+        buffer = io.StringIO()
+        for row, vector in zip(rows, vectors):
+            values = ",".join(repr(float(x)) for x in np.asarray(vector, dtype=np.float32))
+            buffer.write(f"{row.id}\t{row.text_hash}\t[{values}]\n")
+        buffer.seek(0)
+
+        db.execute(text("""
+            CREATE TEMP TABLE IF NOT EXISTS embedding_backfill_batch
+                (id text PRIMARY KEY, text_hash text, vector text)
+            ON COMMIT DELETE ROWS
+        """))
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.execute("TRUNCATE embedding_backfill_batch")
+            cursor.copy_expert(
+                "COPY embedding_backfill_batch (id, text_hash, vector) FROM STDIN", buffer
+            )
+        finally:
+            cursor.close()
+
+        # Notes edited since they were read keep their vector; the catch-up phase revisits them
+        db.execute(text(f"""
+            UPDATE notes n SET {backfill.target_column} = CAST(b.vector AS vector)
+            FROM embedding_backfill_batch b
+            WHERE n.id = b.id AND md5(n.title || ' ' || n.raw_content) = b.text_hash
+        """))
+
+    def _build_shadow_index(self, db: Session) -> None:
+        """Build the ANN index on the shadow column without blocking writes"""
+        if settings.VECTOR_INDEX_TYPE not in ("hnsw", "ivfflat"):
+            return
+        ddl = vector_index_service.index_ddl(
+            SHADOW_INDEX_NAME, settings.VECTOR_INDEX_TYPE, settings.vector_index_params(),
+            concurrently=True, column=SHADOW_COLUMN
+        )
+        # CONCURRENTLY cannot run inside a transaction block
+        with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            # A failed concurrent build leaves an invalid index behind; clear it first
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {SHADOW_INDEX_NAME}"))
+            conn.execute(text(ddl))
+
+    def _column_type(self, db: Session, column: str) -> Optional[str]:
+        return db.execute(
+            text("""
+            SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+            WHERE attrelid = 'notes'::regclass AND attname = :column AND NOT attisdropped
+            """),
+            {"column": column}
+        ).scalar()
+
+# Singleton instance
+backfill_service = BackfillService()
@@ -21,12 +21,19 @@ class DiffService:
         result, _ = self.dmp.patch_apply(patches, text)
         return result
     
+    def invert_diff(self, patch_text: str) -> str:
+        """The patch turning a diff's new text back into its old text, without re-diffing"""
+        patches = self.dmp.patch_fromText(patch_text)
+        for patch in patches:
+            # Deletions become insertions and vice versa; old and new coordinates swap
+            patch.diffs = [(-op, data) for op, data in patch.diffs]
+            patch.start1, patch.start2 = patch.start2, patch.start1
+            patch.length1, patch.length2 = patch.length2, patch.length1
+        return self.dmp.patch_toText(patches)
+    
     def revert_diff(self, text: str, patch_text: str) -> str:
-        """Revert a diff (apply it backwards)"""
-        # For our simple purposes, we'll create a diff in the other direction
-        # This is a simplification - a more robust approach would parse and invert the diff
-        old_text = self.apply_diff(text, patch_text)
-        return self.create_diff(text, old_text)
+        """Revert a diff (apply it backwards): the old text, given the new one"""
+        return self.apply_diff(text, self.invert_diff(patch_text))
     
     def render_diff(self, old_text: str, new_text: str) -> Dict[str, Any]:
         """Render a human-readable diff between old and new text"""
@@ -47,7 +54,7 @@ class DiffService:
         }
     
     def extract_linked_notes(self, content: str) -> list:
-        """Extract links to other notes from content using a simple Markdown link pattern"""
+        """Extract [[...]] link texts (note ids or titles; link_service resolves them)"""
         # This is a simplified implementation - would need more robust parsing
         import re
         # Look for [[ ]] style wiki links which might link to other notes
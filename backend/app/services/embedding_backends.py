@@ -0,0 +1,210 @@
+# services/embedding_backends.py
+"""Inference backends behind EmbeddingService.
+
+Every backend exposes encode(texts) -> float32 array of shape (len(texts), dimensions).
+This module avoids importing torch at module level so spawned pool workers can pin their
+thread counts before the library initializes.
+"""
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+import numpy as np
+from app.core.config import settings
+
+# "torch": fp32 weights; "torch_int8": dynamically quantized Linear layers;
+# "onnx": exported graph on onnxruntime (needs the sentence-transformers[onnx] extra)
+EMBEDDING_INFERENCE_MODES = ("torch", "torch_int8", "onnx")
+
+def load_sentence_transformer(model_name: str, inference: str = "torch",
+                              onnx_file: Optional[str] = None):
+    """Load the model for an inference mode"""
+    if inference not in EMBEDDING_INFERENCE_MODES:
+        raise ValueError(f"Unknown embedding inference mode: {inference}")
+
+    from sentence_transformers import SentenceTransformer
+    if inference == "onnx":
+        # onnx_file selects a specific export, e.g. a pre-quantized "onnx/model_qint8_avx512.onnx"
+        model_kwargs = {"file_name": onnx_file} if onnx_file else None
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs=model_kwargs)
+
+    model = SentenceTransformer(model_name, device="cpu" if inference == "torch_int8" else None)
+    if inference == "torch_int8":
+        import torch
+        # In place, so the fp32 Linear weights are released rather than kept alongside
+        torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+    return model
+
+def model_identity(model_name: str, inference: str = "torch",
+                   onnx_file: Optional[str] = None) -> str:
+    """Name under which a model's vectors are cached (vectors differ slightly per mode)"""
+    if inference == "torch":
+        return model_name
+    return f"{model_name}@{inference}" + (f":{onnx_file}" if onnx_file else "")
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """Row-wise cosine similarity between two sets of vectors for the same texts"""
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    cosines = (reference * candidate).sum(axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1) + 1e-12
+    )
+    return {
+        "mean_cosine": float(np.mean(cosines)),
+        "min_cosine": float(np.min(cosines)),
+        "p05_cosine": float(np.percentile(cosines, 5)),
+        "above_0_99": float(np.mean(cosines >= 0.99)),
+    }
+
+class LocalEmbeddingBackend:
+    """Runs the sentence-transformers model in the calling process"""
+
+    concurrency = 1
+
+    def __init__(self, model_name: str, batch_size: int = 32, inference: str = "torch",
+                 onnx_file: Optional[str] = None):
+        self.model = load_sentence_transformer(model_name, inference, onnx_file)
+        self.batch_size = batch_size
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(
+            self.model.encode(texts, batch_size=self.batch_size, show_progress_bar=False),
+            dtype=np.float32
+        )
+
+    def dimensions(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+# State of a pool worker process (set by _init_pool_worker)
+_worker_model = None
+
+def _init_pool_worker(model_name: str, inference: str, onnx_file: Optional[str],
+                      torch_threads: int, pin_cpus: bool, next_slot) -> None:
+    """Load one model replica with a fixed number of intra-op threads"""
+    global _worker_model
+
+    # Must be set before torch initializes its thread pools
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[variable] = str(torch_threads)
+
+    if pin_cpus and hasattr(os, "sched_setaffinity"):
+        with next_slot.get_lock():
+            slot = next_slot.value
+            next_slot.value += 1
+        cpus = sorted(os.sched_getaffinity(0))
+        first = (slot * torch_threads) % len(cpus)
+        os.sched_setaffinity(0, {cpus[(first + i) % len(cpus)] for i in range(torch_threads)})
+
+    import torch
+    torch.set_num_threads(torch_threads)
+    torch.set_num_interop_threads(1)
+
+    _worker_model = load_sentence_transformer(model_name, inference, onnx_file)
+
+def _pool_dimensions() -> int:
+    return _worker_model.get_sentence_embedding_dimension()
+
+def _pool_encode_into(texts: List[str], shm_name: str, offset: int, dimensions: int,
+                      batch_size: int) -> int:
+    """Encode texts and write them into rows [offset, offset + len(texts)) of a shared block"""
+    vectors = _worker_model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+
+    # Spawned workers share the parent's resource tracker, so attaching here does not make
+    # this process responsible for unlinking; the parent unlinks once all chunks are in
+    block = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray((offset + len(texts), dimensions), dtype=np.float32, buffer=block.buf)
+        out[offset:offset + len(texts)] = vectors
+        del out
+    finally:
+        block.close()
+    return len(texts)
+
+class ProcessPoolEmbeddingBackend:
+    """Runs N model replicas in worker processes, off the API process's GIL.
+
+    A batch is split across replicas; each writes its rows straight into one shared memory
+    block allocated by the caller, so vectors are never pickled on the way back.
+    """
+
+    def __init__(self, model_name: str, workers: int = 2, torch_threads: int = 1,
+                 batch_size: int = 32, pin_cpus: bool = False, min_chunk: int = 4,
+                 inference: str = "torch", onnx_file: Optional[str] = None):
+        self.workers = workers
+        self.concurrency = workers
+        self.batch_size = batch_size
+        self.min_chunk = min_chunk
+        # spawn: forking a process that already initialized torch thread pools is unsafe
+        context = multiprocessing.get_context("spawn")
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_pool_worker,
+            initargs=(model_name, inference, onnx_file, torch_threads, pin_cpus,
+                      context.Value("i", 0)),
+        )
+        self._dimensions: Optional[int] = None
+
+    def dimensions(self) -> int:
+        if self._dimensions is None:
+            self._dimensions = self._pool.submit(_pool_dimensions).result()
+        return self._dimensions
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        dimensions = self.dimensions()
+        if not texts:
+            return np.zeros((0, dimensions), dtype=np.float32)
+
+        chunk = max(self.min_chunk, math.ceil(len(texts) / self.workers))
+        block = shared_memory.SharedMemory(create=True, size=len(texts) * dimensions * 4)
+        try:
+            futures = [
+                self._pool.submit(
+                    _pool_encode_into, texts[start:start + chunk], block.name, start,
+                    dimensions, self.batch_size
+                )
+                for start in range(0, len(texts), chunk)
+            ]
+            for future in futures:
+                future.result()
+
+            shared = np.ndarray((len(texts), dimensions), dtype=np.float32, buffer=block.buf)
+            vectors = shared.copy()
+            del shared
+            return vectors
+        finally:
+            block.close()
+            block.unlink()
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
+
+def backend_concurrency(backend: Optional[str] = None) -> int:
+    """Batches a backend can encode at once, known without loading it"""
+    backend = backend or settings.EMBEDDING_BACKEND
+    return settings.EMBEDDING_POOL_WORKERS if backend == "process_pool" else 1
+
+def create_embedding_backend(backend: Optional[str] = None, inference: Optional[str] = None):
+    """Instantiate the backend selected by settings.EMBEDDING_BACKEND and EMBEDDING_INFERENCE"""
+    backend = backend or settings.EMBEDDING_BACKEND
+    inference = inference or settings.EMBEDDING_INFERENCE
+    if backend == "local":
+        return LocalEmbeddingBackend(
+            settings.EMBEDDING_MODEL, batch_size=settings.EMBEDDING_MAX_BATCH_SIZE,
+            inference=inference, onnx_file=settings.EMBEDDING_ONNX_FILE
+        )
+    if backend == "process_pool":
+        return ProcessPoolEmbeddingBackend(
+            settings.EMBEDDING_MODEL,
+            workers=settings.EMBEDDING_POOL_WORKERS,
+            torch_threads=settings.EMBEDDING_TORCH_THREADS,
+            batch_size=settings.EMBEDDING_MAX_BATCH_SIZE,
+            pin_cpus=settings.EMBEDDING_POOL_PIN_CPUS,
+            inference=inference,
+            onnx_file=settings.EMBEDDING_ONNX_FILE,
+        )
+    raise ValueError(f"Unknown embedding backend: {backend}")
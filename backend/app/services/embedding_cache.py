@@ -0,0 +1,99 @@
+# services/embedding_cache.py
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+from sqlalchemy import text, bindparam
+from sqlalchemy.orm import Session
+from pgvector.sqlalchemy import Vector
+
+class EmbeddingCache:
+    """Content-addressed embedding cache: an in-process LRU in front of the embedding_cache table.
+
+    Keys hash the model name together with the input text, so identical text (re-created notes,
+    reverts, merges) is only ever encoded once per model. Persistent writes join the caller's
+    transaction; lookups without a session only consult the LRU.
+    """
+
+    def __init__(self, model_name: str, max_entries: int = 10000, persist: bool = True):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.persist = persist
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+    def key(self, text: str) -> str:
+        """Cache key for a text under the current model"""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode()).hexdigest()
+
+    def get_many(self, db: Optional[Session], keys: List[str]) -> Dict[str, np.ndarray]:
+        """Look up keys in memory, then in the database; returns only the hits"""
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+            self._counters["memory_hits"] += len(found)
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing and db is not None and self.persist:
+            rows = db.execute(
+                text("SELECT key, vector FROM embedding_cache WHERE key = ANY(:keys)").columns(
+                    vector=Vector()
+                ),
+                {"keys": missing}
+            ).fetchall()
+            for row in rows:
+                found[row.key] = np.asarray(row.vector, dtype=np.float32)
+            self._remember({row.key: found[row.key] for row in rows})
+            with self._lock:
+                self._counters["db_hits"] += len(rows)
+
+        with self._lock:
+            self._counters["misses"] += len([key for key in missing if key not in found])
+        return found
+
+    def put_many(self, db: Optional[Session], vectors: Dict[str, np.ndarray]) -> None:
+        """Store freshly computed vectors (the caller commits the persistent copies)"""
+        if not vectors:
+            return
+        self._remember(vectors)
+        if db is not None and self.persist:
+            db.execute(
+                text("""
+                INSERT INTO embedding_cache (key, model, vector)
+                VALUES (:key, :model, :vector)
+                ON CONFLICT (key) DO NOTHING
+                """).bindparams(bindparam("vector", type_=Vector())),
+                [{"key": key, "model": self.model_name, "vector": vector}
+                 for key, vector in vectors.items()]
+            )
+
+    def metrics(self) -> Dict[str, Any]:
+        """Hit and miss counters"""
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self._counters)
+            snapshot["entries"] = len(self._entries)
+        lookups = snapshot["memory_hits"] + snapshot["db_hits"] + snapshot["misses"]
+        snapshot["hit_rate"] = (
+            (snapshot["memory_hits"] + snapshot["db_hits"]) / lookups if lookups else 0.0
+        )
+        snapshot["max_entries"] = self.max_entries
+        snapshot["model"] = self.model_name
+        return snapshot
+
+    def clear(self) -> None:
+        """Drop the in-process entries (the table is left alone)"""
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, vectors: Dict[str, np.ndarray]) -> None:
+        with self._lock:
+            for key, vector in vectors.items():
+                self._entries[key] = vector
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
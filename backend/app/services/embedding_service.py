@@ -1,84 +1,537 @@
 # services/embedding_service.py
+import logging
+import os
+import queue
+import threading
+import time
 import numpy as np
-from typing import List, Dict, Any
-from sentence_transformers import SentenceTransformer
-from sqlalchemy.orm import Session
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from sqlalchemy.orm import Session, set_committed_value, undefer_group
+from sqlalchemy import bindparam, column, select, text, Float, Integer
+from pgvector.sqlalchemy import Vector
 from app.core.config import settings
 from app.db.models import Note
-from sqlalchemy import text
+from app.db.prepared import prepared_statements
+from app.services.embedding_backends import (
+    EMBEDDING_INFERENCE_MODES, backend_concurrency, cosine_agreement, create_embedding_backend,
+    model_identity
+)
+from app.services.embedding_cache import EmbeddingCache
+from app.services.link_service import link_service
+from app.services.tag_service import tag_service
+from app.services.vector_index_service import vector_index_service
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingBatcher:
+    """Collects concurrent single-text encode requests into batched model calls.
+
+    Callers block in submit() until their own vector is ready. A dispatcher thread takes the
+    first waiting request, keeps collecting until max_batch_size texts are queued or
+    max_wait_ms has passed, then encodes them in one forward pass. With max_in_flight > 1
+    (a backend with several model replicas) up to that many batches are encoded at once.
+    """
+
+    def __init__(self, encode_batch: Callable[[List[str]], np.ndarray],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0, max_in_flight: int = 1):
+        self.encode_batch = encode_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_in_flight = max(1, max_in_flight)
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._executor = None
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._metrics = {
+            "batches": 0,
+            "items": 0,
+            "max_queue_depth": 0,
+            "max_batch_size": 0,
+            "last_batch_size": 0,
+            "batch_size_histogram": {},
+        }
+    
+    def submit(self, text: str) -> np.ndarray:
+        """Queue a text for the next batch and wait for its vector"""
+        self._ensure_dispatcher()
+        future: Future = Future()
+        self._queue.put((text, future))
+        
+        depth = self._queue.qsize()
+        with self._lock:
+            self._metrics["max_queue_depth"] = max(self._metrics["max_queue_depth"], depth)
+        
+        return future.result()
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of queue depth and batch size statistics"""
+        with self._lock:
+            snapshot = dict(self._metrics)
+            snapshot["batch_size_histogram"] = dict(self._metrics["batch_size_histogram"])
+        snapshot["queue_depth"] = self._queue.qsize()
+        snapshot["mean_batch_size"] = (
+            snapshot["items"] / snapshot["batches"] if snapshot["batches"] else 0.0
+        )
+        snapshot["max_wait_ms"] = self.max_wait * 1000
+        snapshot["max_batch_size_limit"] = self.max_batch_size
+        return snapshot
+    
+    def _ensure_dispatcher(self) -> None:
+        """Start the dispatcher thread on first use (and again in forked children)"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                # Requests queued by the parent process can never be answered here
+                self._queue = queue.Queue()
+            self._pid = os.getpid()
+            if self.max_in_flight > 1:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_in_flight, thread_name_prefix="embedding-batch"
+                )
+            self._thread = threading.Thread(
+                target=self._run, name="embedding-batcher", daemon=True
+            )
+            self._thread.start()
+    
+    def _run(self) -> None:
+        while True:
+            # Wait for a free replica before collecting, so batches keep filling meanwhile
+            self._slots.acquire()
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            if self._executor is None:
+                self._dispatch(batch)
+            else:
+                self._executor.submit(self._dispatch, batch)
+    
+    def _dispatch(self, batch: List[tuple]) -> None:
+        texts = [text for text, _ in batch]
+        try:
+            vectors = self.encode_batch(texts)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        
+        with self._lock:
+            size = len(batch)
+            self._metrics["batches"] += 1
+            self._metrics["items"] += size
+            self._metrics["last_batch_size"] = size
+            self._metrics["max_batch_size"] = max(self._metrics["max_batch_size"], size)
+            histogram = self._metrics["batch_size_histogram"]
+            histogram[size] = histogram.get(size, 0) + 1
+        
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+WARMUP_TEXT = "NoteSync warm-up: markdown notes with version history"
 
 class EmbeddingService:
     def __init__(self):
-        self.model = SentenceTransformer(settings.EMBEDDING_MODEL)
+        # The model is loaded on first use or by warm_up(), never at import time
+        self._backend = None
+        self._backend_lock = threading.Lock()
+        # Local replicas of other inference modes, built on the first parity report for each
+        self._parity_backends: Dict[str, Any] = {}
+        self._parity_lock = threading.Lock()
+        self.ready = False
+        self.warmup_error: Optional[str] = None
+        self.batcher = EmbeddingBatcher(
+            self._encode,
+            max_batch_size=settings.EMBEDDING_MAX_BATCH_SIZE,
+            max_wait_ms=settings.EMBEDDING_MAX_WAIT_MS,
+            max_in_flight=backend_concurrency()
+        )
+        self.cache = EmbeddingCache(
+            model_identity(
+                settings.EMBEDDING_MODEL, settings.EMBEDDING_INFERENCE, settings.EMBEDDING_ONNX_FILE
+            ),
+            max_entries=settings.EMBEDDING_CACHE_SIZE,
+            persist=settings.EMBEDDING_CACHE_PERSIST
+        )
+    
+    @property
+    def backend(self):
+        """The inference backend, loaded on first access"""
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = create_embedding_backend()
+        return self._backend
+    
+    def warm_up(self) -> None:
+        """Load the model and run a dummy encode so the first request does not pay for it"""
+        try:
+            start = time.perf_counter()
+            # One text per replica chunk, so pool backends load every replica
+            self.backend.encode([WARMUP_TEXT] * (self.batcher.max_in_flight * 4))
+            self.warmup_error = None
+            self.ready = True
+            logger.info("Embedding model warm in %.1fs", time.perf_counter() - start)
+        except Exception as e:
+            self.warmup_error = repr(e)
+            logger.exception("Embedding model warm-up failed")
+    
+    def start_warm_up(self) -> threading.Thread:
+        """Warm up in a background thread (readiness is reported via self.ready)"""
+        thread = threading.Thread(target=self.warm_up, name="embedding-warmup", daemon=True)
+        thread.start()
+        return thread
     
-    def generate_embedding(self, text: str) -> np.ndarray:
-        """Generate vector embedding for the given text"""
-        # Combine title and content for better semantic representation
-        embedding = self.model.encode(text, show_progress_bar=False)
+    def generate_embedding(self, text: str, db: Optional[Session] = None) -> np.ndarray:
+        """Generate vector embedding for the given text
+
+        With a session, the persistent cache is consulted and filled as part of its transaction.
+        """
+        key = self.cache.key(text)
+        cached = self.cache.get_many(db, [key])
+        if key in cached:
+            return cached[key]
+        
+        # Concurrent callers (API threads) share forward passes through the batcher
+        if settings.EMBEDDING_BATCHING:
+            embedding = self.batcher.submit(text)
+        else:
+            embedding = self._encode([text])[0]
+        
+        self.cache.put_many(db, {key: embedding})
         return embedding
     
-    def find_similar_notes(self, db: Session, note_id: str, limit: int = 5) -> List[Dict[str, Any]]:
-        """Find notes similar to the specified note using vector similarity"""
-        # Get the source note
-        source_note = db.query(Note).filter(Note.id == note_id).first()
-        if not source_note or source_note.vector_data is None:
-            return []
+    def generate_embeddings(self, texts: List[str], db: Optional[Session] = None) -> List[np.ndarray]:
+        """Generate vector embeddings for several texts, encoding cache misses in one model call"""
+        keys = [self.cache.key(text) for text in texts]
+        vectors = self.cache.get_many(db, keys)
         
-        # Convert vector to string format with square brackets for pgvector
-        vector_str = str(source_note.vector_data.tolist()) if hasattr(source_note.vector_data, 'tolist') else str(source_note.vector_data)
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if missing:
+            encoded = dict(zip(missing, self._encode(list(missing.values()))))
+            self.cache.put_many(db, encoded)
+            vectors.update(encoded)
         
-        # Use PostgreSQL's vector similarity search
-        similar_notes = db.execute(
-            text(f"""
-            SELECT id, title, 1 - (vector_data <=> '{vector_str}'::vector) as score 
-            FROM notes 
-            WHERE id != '{note_id}' AND archived = false
-            ORDER BY vector_data <=> '{vector_str}'::vector 
-            LIMIT {limit}
-            """)
+        return [vectors[key] for key in keys]
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Run the model on a batch of texts"""
+        return self.backend.encode(texts)
+    
+    def parity_report(self, db: Session, sample_size: int = 200,
+                      inference: Optional[str] = None) -> Dict[str, Any]:
+        """Compare an inference mode's vectors with the ones stored in notes.vector_data"""
+        inference = inference or settings.EMBEDDING_INFERENCE
+        if inference not in EMBEDDING_INFERENCE_MODES:
+            raise ValueError(f"Unknown embedding inference mode: {inference}")
+        notes = db.execute(
+            text("""
+            SELECT title, raw_content, vector_data FROM notes
+            WHERE vector_data IS NOT NULL AND NOT ('embedding' = ANY(stale))
+            ORDER BY random()
+            LIMIT :sample_size
+            """).columns(vector_data=Vector(settings.VECTOR_DIMENSIONS)),
+            {"sample_size": sample_size}
         ).fetchall()
         
-        # Format results
-        results = []
-        for note in similar_notes:
-            note_data = db.query(Note).filter(Note.id == note.id).first()
-            results.append({
-                "note": note_data,
-                "similarity_score": float(note.score)
-            })
+        report: Dict[str, Any] = {
+            "model": settings.EMBEDDING_MODEL,
+            "inference": inference,
+            "sample_size": len(notes),
+        }
+        if not notes:
+            return report
         
-        return results
+        # The cache is bypassed either way, so stored vectors are compared with fresh ones
+        backend = self._parity_backend(inference)
+        
+        start = time.perf_counter()
+        encoded = backend.encode([note.title + " " + note.raw_content for note in notes])
+        report["encode_ms_per_note"] = (time.perf_counter() - start) * 1000 / len(notes)
+        report.update(cosine_agreement(np.stack([note.vector_data for note in notes]), encoded))
+        return report
+    
+    def _parity_backend(self, inference: str):
+        """The backend for an inference mode: the serving one, or an in-process replica"""
+        if inference == settings.EMBEDDING_INFERENCE:
+            return self.backend
+        backend = self._parity_backends.get(inference)
+        if backend is None:
+            with self._parity_lock:
+                backend = self._parity_backends.get(inference)
+                if backend is None:
+                    backend = create_embedding_backend("local", inference=inference)
+                    self._parity_backends[inference] = backend
+        return backend
     
-    def semantic_search(self, db: Session, query_text: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Search for notes semantically using vector similarity to query"""
+    def find_similar_notes(self, db: Session, note_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Find notes similar to the specified note using vector similarity"""
+        # The source vector is resolved server-side, so ranking and hydration is one query
+        statement = prepared_statements.statement(db, "notes_similar_to_note")
+        return self._fetch_results(db, statement, {"note_id": note_id, "limit": limit})
+    
+    def semantic_search(self, db: Session, query_text: str, limit: int = 10,
+                        tags: Optional[List[str]] = None, archived: bool = False) -> List[Dict[str, Any]]:
+        """Search for notes semantically using vector similarity to query
+
+        Tag and archive filters are applied inside the ANN scan. Fewer than limit results are
+        final when the scan produced every row passing the filters (small corpora, pending
+        embeddings, selective tags): one round trip. Otherwise the scan stopped short. With
+        pgvector iterative scans that means it hit hnsw.max_scan_tuples; without them, the
+        scan is repeated with VECTOR_FILTER_OVERFETCH times more candidates. Either way an
+        exact search over the filtered rows comes last.
+        """
         # Generate embedding for the query text
         query_embedding = self.generate_embedding(query_text)
         
-        # Convert the embedding to a string format with square brackets for pgvector
-        embedding_str = str(query_embedding.tolist())  # Already has square brackets
+        params = {
+            "query": query_embedding,
+            "tags": tag_service.normalize(tags),
+            "include_archived": archived,
+            "limit": limit,
+        }
         
-        # Build the SQL query
-        sql_query = f"""
-            SELECT id, title, 1 - (vector_data <=> '{embedding_str}'::vector) as score 
-            FROM notes 
-            WHERE archived = false
-            ORDER BY vector_data <=> '{embedding_str}'::vector 
-            LIMIT {limit}
-        """
+        # With pgvector iterative scans the index keeps going past filtered-out rows by itself
+        iterative = settings.VECTOR_ITERATIVE_SCAN != "off"
+        candidates = limit if iterative else limit * settings.VECTOR_FILTER_OVERFETCH
+        
+        while True:
+            if candidates > limit:
+                # Candidates beyond ef_search/probes are never produced by the index
+                factor = -(-candidates // limit)
+                vector_index_service.apply_search_settings(
+                    db,
+                    ef_search=max(settings.HNSW_EF_SEARCH, candidates),
+                    probes=min(settings.IVFFLAT_LISTS, settings.IVFFLAT_PROBES * factor)
+                )
+            results, cut_short = self._scan(
+                db, self._filtered_search_statement(db), {**params, "candidates": candidates}
+            )
+            if not cut_short:
+                return results
+            if iterative or candidates >= settings.VECTOR_FILTER_MAX_CANDIDATES:
+                break
+            candidates = min(candidates * settings.VECTOR_FILTER_OVERFETCH,
+                             settings.VECTOR_FILTER_MAX_CANDIDATES)
+        
+        # The index cannot reach enough filtered rows: rank the rows that pass them exactly.
+        # Not prepared, since a cached plan would ignore the planner setting.
+        statement = text(_semantic_search_sql(
+            "CAST(:query AS vector)", "CAST(:tags AS text[])", ":include_archived",
+            ":candidates", ":limit"
+        )).bindparams(bindparam("query", type_=Vector(settings.VECTOR_DIMENSIONS)))
+        db.execute(text("SELECT set_config('enable_indexscan', 'off', true)"))
+        try:
+            return self._scan(db, statement, {**params, "candidates": limit})[0]
+        finally:
+            db.execute(text("SELECT set_config('enable_indexscan', 'on', true)"))
+    
+    def _scan(self, db: Session, statement, params: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], bool]:
+        """Results of a filtered ANN pass, and whether rows passing the filters were left out"""
+        statement = statement.columns(
+            *NOTE_RESULT_COLUMNS, column("score", Float),
+            column("candidate_count", Integer), column("matching", Integer)
+        )
+        rows = db.execute(
+            select(Note, statement.selected_columns.score,
+                   statement.selected_columns.candidate_count, statement.selected_columns.matching)
+            .from_statement(statement)
+            .options(undefer_group("body")),
+            params
+        ).all()
+        results = self._hydrate(db, [(note, score) for note, score, _, _ in rows])
         
-        # Use text() to declare this as a textual SQL expression
-        similar_notes = db.execute(text(sql_query)).fetchall()
+        if len(rows) >= params["limit"]:
+            return results, False
+        if rows:
+            # Set whenever the scan produced fewer candidates than asked for
+            _, _, candidate_count, matching = rows[0]
+            return results, matching > candidate_count
+        # No row to carry the counts: any embedded row passing the filters was missed
+        return results, db.execute(
+            text(f"""
+            SELECT EXISTS (
+                SELECT 1 FROM notes n
+                WHERE n.vector_data IS NOT NULL {_candidate_filters("CAST(:tags AS text[])", ":include_archived")}
+            )
+            """),
+            {"tags": params["tags"], "include_archived": params["include_archived"]}
+        ).scalar()
+    
+    def _filtered_search_statement(self, db: Session):
+        return prepared_statements.statement(db, "notes_semantic_search").bindparams(
+            bindparam("query", type_=Vector(settings.VECTOR_DIMENSIONS))
+        )
+    
+    def hybrid_search(self, db: Session, query_text: str, tags: Optional[List[str]] = None,
+                      limit: int = 10, archived: bool = False) -> List[Dict[str, Any]]:
+        """Fuse full-text and vector search with reciprocal rank fusion, in one statement
+
+        Both candidate sets honour the tag and archive filters; a note's score is
+        sum(1 / (k + rank)) over the sets it appears in, scaled so that ranking first in
+        both gives 1.0.
+        """
+        query_embedding = self.generate_embedding(query_text)
         
-        # Format results
-        results = []
-        for note in similar_notes:
-            note_data = db.query(Note).filter(Note.id == note.id).first()
-            results.append({
-                "note": note_data,
-                "similarity_score": float(note.score)
-            })
+        statement = prepared_statements.statement(db, "notes_hybrid_search").bindparams(
+            bindparam("query", type_=Vector(settings.VECTOR_DIMENSIONS))
+        )
+        return self._fetch_results(db, statement, {
+            "query": query_embedding,
+            "query_text": query_text,
+            "text_config": settings.SEARCH_TEXT_CONFIG,
+            "tags": tag_service.normalize(tags),
+            "include_archived": archived,
+            "candidates": max(limit, settings.HYBRID_CANDIDATES),
+            "rrf_k": settings.HYBRID_RRF_K,
+            "limit": limit,
+        })
+    
+    def _fetch_results(self, db: Session, statement, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Hydrate Note objects and scores from a ranked search statement"""
+        statement = statement.columns(*NOTE_RESULT_COLUMNS, column("score", Float))
+        rows = db.execute(
+            select(Note, statement.selected_columns.score)
+            .from_statement(statement)
+            .options(undefer_group("body")),
+            params
+        ).all()
+        return self._hydrate(db, rows)
+    
+    def _hydrate(self, db: Session, rows: List[Tuple[Note, float]]) -> List[Dict[str, Any]]:
+        """Search result dicts from (note, score) rows, with excerpts and links loaded"""
+        for note, _ in rows:
+            # Summary projections read the excerpt; derive it from the body already loaded
+            set_committed_value(note, "excerpt", note.raw_content[:settings.NOTE_EXCERPT_LENGTH])
+        link_service.load(db, [note for note, _ in rows])
         
-        return results
+        return [
+            {"note": note, "similarity_score": float(score)}
+            for note, score in rows
+        ]
+
+# Search results carry every note column except the embedding and full-text document
+NOTE_RESULT_COLUMNS = [
+    c for c in Note.__table__.c if c.name not in ("vector_data", "search_vector")
+]
+_NOTE_SELECT_LIST = ", ".join(f"n.{c.name}" for c in NOTE_RESULT_COLUMNS)
+
+prepared_statements.register(
+    "notes_similar_to_note",
+    [("note_id", "text"), ("limit", "integer")],
+    f"""
+    SELECT {_NOTE_SELECT_LIST},
+           1 - (n.vector_data <=> (SELECT vector_data FROM notes WHERE id = $1)) AS score
+    FROM notes n
+    WHERE n.id != $1 AND n.archived = false AND n.vector_data IS NOT NULL
+      AND (SELECT vector_data FROM notes WHERE id = $1) IS NOT NULL
+    ORDER BY n.vector_data <=> (SELECT vector_data FROM notes WHERE id = $1)
+    LIMIT $2
+    """
+)
+
+def _candidate_filters(tags: str, include_archived: str) -> str:
+    """Tag (normalized text[]) and archive filters on notes n, given their placeholders"""
+    return f"""
+      AND ({include_archived} OR n.archived = false)
+      AND (cardinality({tags}) = 0 OR n.id IN (
+          SELECT nt.note_id FROM note_tags nt
+          WHERE nt.tag = ANY({tags})
+          GROUP BY nt.note_id
+          HAVING count(*) = cardinality({tags})
+      ))
+    """
+
+def _semantic_search_sql(query: str, tags: str, include_archived: str, candidates: str,
+                         limit: str) -> str:
+    """Filtered vector search: ANN candidates re-sorted by exact distance (relaxed scans)
+
+    When the scan yields fewer candidates than asked for, "matching" counts the rows passing
+    the filters (up to the candidate count): more than "candidate_count" means the index
+    stopped short of them. Both counts are InitPlans; "matching" only runs in that case.
+    """
+    return f"""
+    WITH candidates AS MATERIALIZED (
+        SELECT n.id, n.vector_data <=> {query} AS distance
+        FROM notes n
+        WHERE n.vector_data IS NOT NULL {_candidate_filters(tags, include_archived)}
+        ORDER BY n.vector_data <=> {query}
+        LIMIT {candidates}
+    )
+    SELECT {_NOTE_SELECT_LIST}, 1 - c.distance AS score,
+           (SELECT count(*) FROM candidates) AS candidate_count,
+           CASE WHEN (SELECT count(*) FROM candidates) < {candidates} THEN (
+               SELECT count(*) FROM (
+                   SELECT 1 FROM notes n
+                   WHERE n.vector_data IS NOT NULL {_candidate_filters(tags, include_archived)}
+                   LIMIT {candidates}
+               ) matching
+           ) END AS matching
+    FROM candidates c
+    JOIN notes n ON n.id = c.id
+    ORDER BY c.distance, n.id
+    LIMIT {limit}
+    """
+
+prepared_statements.register(
+    "notes_semantic_search",
+    [("query", "vector"), ("tags", "text[]"), ("include_archived", "boolean"),
+     ("candidates", "integer"), ("limit", "integer")],
+    _semantic_search_sql("$1", "$2", "$3", "$4", "$5")
+)
+
+prepared_statements.register(
+    "notes_hybrid_search",
+    [("query", "vector"), ("query_text", "text"), ("text_config", "regconfig"),
+     ("tags", "text[]"), ("include_archived", "boolean"), ("candidates", "integer"),
+     ("rrf_k", "integer"), ("limit", "integer")],
+    f"""
+    WITH lexical AS (
+        SELECT id, row_number() OVER (ORDER BY score DESC, id) AS rank
+        FROM (
+            SELECT n.id, ts_rank_cd(n.search_vector, q.tsquery, 32) AS score
+            FROM notes n, websearch_to_tsquery($3, $2) AS q(tsquery)
+            WHERE n.search_vector @@ q.tsquery {_candidate_filters("$4", "$5")}
+            ORDER BY score DESC
+            LIMIT $6
+        ) ranked
+    ),
+    semantic AS (
+        SELECT id, row_number() OVER (ORDER BY distance, id) AS rank
+        FROM (
+            SELECT n.id, n.vector_data <=> $1 AS distance
+            FROM notes n
+            WHERE n.vector_data IS NOT NULL {_candidate_filters("$4", "$5")}
+            ORDER BY n.vector_data <=> $1
+            LIMIT $6
+        ) ranked
+    ),
+    fused AS (
+        SELECT id, sum(1.0 / ($7 + rank)) * ($7 + 1) / 2 AS score
+        FROM (SELECT id, rank FROM lexical UNION ALL SELECT id, rank FROM semantic) candidates
+        GROUP BY id
+        ORDER BY score DESC, id
+        LIMIT $8
+    )
+    SELECT {_NOTE_SELECT_LIST}, f.score
+    FROM fused f
+    JOIN notes n ON n.id = f.id
+    ORDER BY f.score DESC, n.id
+    """
+)
 
 # Singleton instance
 embedding_service = EmbeddingService()
\ No newline at end of file
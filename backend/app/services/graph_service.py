@@ -0,0 +1,163 @@
+# services/graph_service.py
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.services.note_cache import note_cache
+
+# Breadth-first walk of note_links in both directions, then every link and (optionally)
+# every similar pair among the notes reached, aggregated into one row
+GRAPH_QUERY = text("""
+WITH RECURSIVE walk(id, depth) AS (
+    SELECT CAST(:note_id AS text), 0
+    UNION
+    SELECT CASE WHEN l.source_id = walk.id THEN l.target_id ELSE l.source_id END, walk.depth + 1
+    FROM walk
+    JOIN note_links l ON l.source_id = walk.id OR l.target_id = walk.id
+    WHERE walk.depth < :depth
+),
+reached AS (
+    SELECT id, min(depth) AS depth FROM walk GROUP BY id
+),
+nodes AS (
+    SELECT id, depth FROM reached ORDER BY depth, id LIMIT :limit
+),
+edges AS (
+    SELECT DISTINCT l.source_id, l.target_id
+    FROM note_links l
+    JOIN nodes s ON s.id = l.source_id
+    JOIN nodes t ON t.id = l.target_id
+),
+similar AS (
+    SELECT a.id AS source_id, b.id AS target_id,
+           1 - (a.vector_data <=> b.vector_data) AS score
+    FROM nodes x
+    JOIN nodes y ON x.id < y.id
+    JOIN notes a ON a.id = x.id
+    JOIN notes b ON b.id = y.id
+    WHERE :similar
+      AND a.vector_data IS NOT NULL AND b.vector_data IS NOT NULL
+      AND 1 - (a.vector_data <=> b.vector_data) >= :min_similarity
+)
+SELECT
+    (SELECT json_agg(json_build_object(
+                'id', nodes.id, 'title', n.title, 'depth', nodes.depth,
+                'archived', coalesce(n.archived, false)
+            ) ORDER BY nodes.depth, nodes.id)
+     FROM nodes LEFT JOIN notes n ON n.id = nodes.id) AS nodes,
+    (SELECT json_agg(json_build_object('source', source_id, 'target', target_id)
+            ORDER BY source_id, target_id)
+     FROM edges) AS edges,
+    (SELECT json_agg(json_build_object('source', source_id, 'target', target_id, 'score', score)
+            ORDER BY score DESC, source_id, target_id)
+     FROM similar) AS similar,
+    (SELECT count(*) FROM reached) AS reachable
+""")
+
+GraphKey = Tuple[str, int, int, bool]
+
+class GraphService:
+    """Link neighbourhoods of notes, cached until any note in them changes.
+
+    A cached graph depends on the titles, links and embeddings of all its nodes, so it is
+    indexed by node and dropped whenever the note cache drops one of them: every write path
+    already invalidates the notes it touches (and link_service the notes whose backlinks
+    change), and the NOTIFY listener relays those invalidations from other workers.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[GraphKey, Tuple[float, Dict[str, Any], FrozenSet[str]]]" = OrderedDict()
+        self._by_note: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        note_cache.subscribe(self.evict)
+
+    def get_graph(self, db: Session, note_id: str, depth: int = 1, limit: int = 100,
+                  similar: bool = False) -> Optional[Dict[str, Any]]:
+        """Notes within `depth` links of a note, the links between them and, with `similar`,
+        pairs of them whose embeddings are close. None if the note does not exist.
+
+        The payload carries an "etag" for conditional requests.
+        """
+        key = (note_id, depth, limit, similar)
+        graph = self._get(key)
+        if graph is not None:
+            return graph
+
+        row = db.execute(GRAPH_QUERY, {
+            "note_id": note_id,
+            "depth": depth,
+            "limit": limit,
+            "similar": similar,
+            "min_similarity": settings.GRAPH_SIMILARITY_THRESHOLD,
+        }).one()
+        nodes = row.nodes or []
+        # The walk always starts at the requested id; no title means no such note
+        if not nodes or nodes[0]["title"] is None:
+            return None
+
+        graph = {
+            "note_id": note_id,
+            "nodes": nodes,
+            "edges": row.edges or [],
+            "similar": row.similar or [],
+            "truncated": row.reachable > len(nodes),
+        }
+        digest = hashlib.sha256(json.dumps(graph, sort_keys=True).encode()).hexdigest()
+        graph["etag"] = f'"{digest[:32]}"'
+        self._put(key, graph, frozenset(node["id"] for node in nodes))
+        return graph
+
+    def evict(self, note_ids: Optional[List[str]]) -> None:
+        """Drop graphs containing any of the notes; all graphs if note_ids is None"""
+        with self._lock:
+            if note_ids is None:
+                self._entries.clear()
+                self._by_note.clear()
+                return
+            for note_id in note_ids:
+                for key in self._by_note.pop(note_id, ()):
+                    self._remove(key)
+
+    def _get(self, key: GraphKey) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def _put(self, key: GraphKey, graph: Dict[str, Any], node_ids: FrozenSet[str]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic(), graph, node_ids)
+            for node_id in node_ids:
+                self._by_note.setdefault(node_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: GraphKey) -> None:
+        # Caller holds the lock
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for node_id in entry[2]:
+            keys = self._by_note.get(node_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_note[node_id]
+
+# Singleton instance
+graph_service = GraphService(settings.GRAPH_CACHE_SIZE, settings.GRAPH_CACHE_TTL)
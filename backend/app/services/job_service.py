@@ -0,0 +1,162 @@
+# services/job_service.py
+from typing import List, Dict, Any, Optional
+from sqlalchemy import text, bindparam
+from sqlalchemy.orm import Session
+from pgvector.sqlalchemy import Vector
+from app.core.config import settings
+from app.db.models import Note, NoteJob
+from app.services.diff_service import diff_service
+from app.services.embedding_service import embedding_service
+from app.services.link_service import link_service
+from app.services.note_cache import note_cache
+
+JOB_KINDS = ("embedding", "links")
+
+class JobService:
+    def enqueue(self, db: Session, note: Note, kind: str,
+                payload: Optional[Dict[str, Any]] = None) -> None:
+        """Queue recomputation of a derived field and mark it stale (caller commits)"""
+        db.add(NoteJob(note_id=note.id, kind=kind, payload=payload))
+        if kind not in (note.stale or []):
+            # Reassign rather than append so SQLAlchemy sees the ARRAY change
+            note.stale = list(note.stale or []) + [kind]
+
+    def run_batch(self, db: Session, kind: str, batch_size: int = None) -> int:
+        """Claim and process one batch of jobs of a kind, returning the number claimed"""
+        batch_size = batch_size or settings.WORKER_BATCH_SIZE
+
+        # Claimed rows stay locked until commit; concurrent workers skip past them
+        jobs = db.execute(
+            text("""
+            SELECT id, note_id, payload FROM note_jobs
+            WHERE kind = :kind AND run_after <= now() AND attempts < :max_attempts
+            ORDER BY id
+            LIMIT :batch_size
+            FOR UPDATE SKIP LOCKED
+            """),
+            {"kind": kind, "max_attempts": settings.JOB_MAX_ATTEMPTS, "batch_size": batch_size}
+        ).fetchall()
+
+        if not jobs:
+            db.rollback()
+            return 0
+
+        job_ids = [job.id for job in jobs]
+        note_ids = sorted({job.note_id for job in jobs})
+
+        try:
+            if kind == "embedding":
+                self._refresh_embeddings(db, note_ids)
+            elif kind == "links":
+                self._refresh_links(db, jobs)
+            else:
+                raise ValueError(f"Unknown job kind: {kind}")
+        except Exception as e:
+            db.rollback()
+            self._record_failure(db, job_ids, e)
+            return len(jobs)
+
+        db.execute(text("DELETE FROM note_jobs WHERE id = ANY(:ids)"), {"ids": job_ids})
+
+        # Note rows are locked by now, so jobs queued by concurrent edits are visible here
+        db.execute(
+            text("""
+            UPDATE notes SET stale = array_remove(stale, :kind)
+            WHERE id = ANY(:note_ids)
+              AND NOT EXISTS (
+                  SELECT 1 FROM note_jobs j WHERE j.note_id = notes.id AND j.kind = :kind
+              )
+            """),
+            {"kind": kind, "note_ids": note_ids}
+        )
+        note_cache.invalidate(db, note_ids)
+        db.commit()
+
+        return len(jobs)
+
+    def get_lag(self, db: Session) -> List[Dict[str, Any]]:
+        """How far behind the workers are, per job kind"""
+        rows = db.execute(
+            text("""
+            SELECT kind,
+                   count(*) FILTER (WHERE attempts < :max_attempts) AS pending,
+                   count(*) FILTER (WHERE attempts >= :max_attempts) AS failed,
+                   min(created_at) FILTER (WHERE attempts < :max_attempts) AS oldest_created_at,
+                   EXTRACT(EPOCH FROM now() - min(created_at) FILTER (WHERE attempts < :max_attempts))
+                       AS lag_seconds
+            FROM note_jobs
+            GROUP BY kind
+            """),
+            {"max_attempts": settings.JOB_MAX_ATTEMPTS}
+        ).fetchall()
+
+        lag = {row.kind: dict(row._mapping) for row in rows}
+        return [
+            lag.get(kind, {"kind": kind, "pending": 0, "failed": 0,
+                           "oldest_created_at": None, "lag_seconds": None})
+            for kind in JOB_KINDS
+        ]
+
+    def _refresh_embeddings(self, db: Session, note_ids: List[str]) -> None:
+        """Encode claimed notes in one model call and write back vectors for unchanged notes"""
+        notes = db.execute(
+            text("SELECT id, title, raw_content FROM notes WHERE id = ANY(:ids)"),
+            {"ids": note_ids}
+        ).fetchall()
+        if not notes:
+            return
+
+        # Inference runs without holding note row locks
+        vectors = embedding_service.generate_embeddings(
+            [note.title + " " + note.raw_content for note in notes], db=db
+        )
+
+        # Notes edited meanwhile already have a newer job queued; leave them to it
+        current = {
+            row.id: (row.title, row.raw_content)
+            for row in db.execute(
+                text("SELECT id, title, raw_content FROM notes WHERE id = ANY(:ids) ORDER BY id FOR UPDATE"),
+                {"ids": note_ids}
+            )
+        }
+        updates = [
+            {"id": note.id, "vector_data": vector}
+            for note, vector in zip(notes, vectors)
+            if current.get(note.id) == (note.title, note.raw_content)
+        ]
+        if updates:
+            db.execute(
+                text("UPDATE notes SET vector_data = :vector_data WHERE id = :id").bindparams(
+                    bindparam("vector_data", type_=Vector(settings.VECTOR_DIMENSIONS))
+                ),
+                updates
+            )
+
+    def _refresh_links(self, db: Session, jobs: List[Any]) -> None:
+        """Re-derive the link edges of queued notes from their current content
+
+        Edits write their edges inline now; this drains jobs queued by older versions.
+        """
+        rows = db.execute(
+            text("SELECT id, raw_content FROM notes WHERE id = ANY(:ids)"),
+            {"ids": sorted({job.note_id for job in jobs})}
+        )
+        for row in rows:
+            link_service.sync(db, row.id, diff_service.extract_linked_notes(row.raw_content))
+
+    def _record_failure(self, db: Session, job_ids: List[int], error: Exception) -> None:
+        """Count a failed attempt and back off exponentially before the next one"""
+        db.execute(
+            text("""
+            UPDATE note_jobs
+            SET attempts = attempts + 1,
+                last_error = :error,
+                run_after = now() + make_interval(secs => power(2, attempts + 1))
+            WHERE id = ANY(:ids)
+            """),
+            {"ids": job_ids, "error": repr(error)}
+        )
+        db.commit()
+
+# Singleton instance
+job_service = JobService()
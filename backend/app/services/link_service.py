@@ -0,0 +1,179 @@
+# services/link_service.py
+from typing import Dict, Iterable, List, Set
+from sqlalchemy import text
+from sqlalchemy.orm import Session, attributes
+from app.db.models import Note, ALIAS_ID, ALIAS_TITLE, ALIAS_FORMER_TITLE
+from app.services.note_cache import note_cache
+
+# The note each alias resolves to: lowest alias kind (id, title, former title), then oldest note
+RESOLVE_ALIASES = """
+SELECT DISTINCT ON (a.alias) a.alias, a.note_id
+FROM note_aliases a JOIN notes n ON n.id = a.note_id
+WHERE a.alias = ANY(CAST(:aliases AS text[]))
+ORDER BY a.alias, a.kind, n.created_at, n.id
+"""
+
+def normalize(link: str) -> str:
+    """Alias form of a note id, title or [[link]] text: case and whitespace runs don't matter"""
+    return " ".join(link.split()).casefold()
+
+class LinkService:
+    """Writes and batch reads of the note_links edge table behind links_to/links_from.
+
+    Links are stored with the alias they were written as and the note it resolves to through
+    note_aliases (ids and titles). A link naming no note yet keeps the alias as its target until
+    a note created or renamed to it claims it; those links are found by alias, never by
+    reading note bodies.
+    """
+
+    def sync(self, db: Session, source_id: str, targets: List[str]) -> Set[str]:
+        """Make the note's outgoing links exactly `targets` (link texts: ids or titles),
+        returning the target notes added or removed
+
+        One resolving SELECT, one DELETE and one INSERT ... ON CONFLICT per edit, whatever the
+        number of links; no linked note's row is read or locked. The source note must be
+        flushed; caller commits.
+        """
+        aliases = sorted({normalize(target) for target in targets} - {""})
+        resolved = self.resolve(db, aliases)
+        removed = db.execute(
+            text("""
+            DELETE FROM note_links
+            WHERE source_id = :source_id AND target_alias <> ALL(CAST(:aliases AS text[]))
+            RETURNING target_id
+            """),
+            {"source_id": source_id, "aliases": aliases}
+        ).scalars().all()
+        added = []
+        if aliases:
+            added = db.execute(
+                text("""
+                INSERT INTO note_links (source_id, target_alias, target_id)
+                SELECT :source_id, alias, target_id
+                FROM unnest(CAST(:aliases AS text[]), CAST(:targets AS text[])) AS t(alias, target_id)
+                ON CONFLICT DO NOTHING
+                RETURNING target_id
+                """),
+                {
+                    "source_id": source_id,
+                    "aliases": aliases,
+                    "targets": [resolved.get(alias, alias) for alias in aliases],
+                }
+            ).scalars().all()
+
+        # Their backlinks changed although their rows did not
+        changed = set(removed) | set(added)
+        note_cache.invalidate(db, changed)
+        return changed
+
+    def resolve(self, db: Session, aliases: List[str]) -> Dict[str, str]:
+        """Note ids of the normalized aliases that name a note, in one query"""
+        if not aliases:
+            return {}
+        rows = db.execute(text(RESOLVE_ALIASES), {"aliases": aliases})
+        return {row.alias: row.note_id for row in rows}
+
+    def register(self, db: Session, note_id: str, title: str) -> None:
+        """Give a new note its id and title aliases and let pending links claim it.
+
+        The note must be flushed; caller commits.
+        """
+        db.execute(
+            text("""
+            INSERT INTO note_aliases (alias, note_id, kind)
+            VALUES (:id_alias, :note_id, :id_kind), (:title_alias, :note_id, :title_kind)
+            ON CONFLICT DO NOTHING
+            """),
+            {
+                "note_id": note_id,
+                "id_alias": normalize(note_id), "id_kind": ALIAS_ID,
+                "title_alias": normalize(title), "title_kind": ALIAS_TITLE,
+            }
+        )
+        self._reresolve(db, [normalize(note_id), normalize(title)])
+
+    def rename(self, db: Session, note_id: str, old_title: str, new_title: str) -> None:
+        """Move a note's title alias, keeping the old title as a fallback alias.
+
+        Links written as the old title keep pointing at the note unless another note has it
+        as its current title; links written as the new title, dangling or resolved to a
+        former title, move to the note. Caller commits.
+        """
+        old, new = normalize(old_title), normalize(new_title)
+        if old == new:
+            return
+        db.execute(
+            text("""
+            UPDATE note_aliases SET kind = :former
+            WHERE note_id = :note_id AND alias = :old AND kind = :title
+            """),
+            {"note_id": note_id, "old": old, "title": ALIAS_TITLE, "former": ALIAS_FORMER_TITLE}
+        )
+        db.execute(
+            text("""
+            INSERT INTO note_aliases (alias, note_id, kind) VALUES (:new, :note_id, :title)
+            ON CONFLICT (alias, note_id) DO UPDATE SET kind = LEAST(note_aliases.kind, EXCLUDED.kind)
+            """),
+            {"note_id": note_id, "new": new, "title": ALIAS_TITLE}
+        )
+        self._reresolve(db, [old, new])
+
+    def _reresolve(self, db: Session, aliases: Iterable[str]) -> None:
+        # Re-point the links written as these aliases; ix_note_links_target_alias finds them
+        aliases = sorted(set(aliases) - {""})
+        rows = db.execute(
+            text(f"""
+            WITH resolved AS (
+                SELECT t.alias, coalesce(r.note_id, t.alias) AS target_id
+                FROM unnest(CAST(:aliases AS text[])) AS t(alias)
+                LEFT JOIN ({RESOLVE_ALIASES}) r ON r.alias = t.alias
+            ),
+            changed AS (
+                SELECT l.source_id, l.target_alias, l.target_id AS old_target_id,
+                       resolved.target_id AS new_target_id
+                FROM note_links l JOIN resolved ON resolved.alias = l.target_alias
+                WHERE l.target_id <> resolved.target_id
+                ORDER BY l.source_id, l.target_alias
+                FOR UPDATE OF l
+            )
+            UPDATE note_links l SET target_id = changed.new_target_id
+            FROM changed
+            WHERE l.source_id = changed.source_id AND l.target_alias = changed.target_alias
+            RETURNING changed.source_id, changed.old_target_id, changed.new_target_id
+            """),
+            {"aliases": aliases}
+        ).all()
+
+        # Linking notes' links_to and both targets' links_from changed
+        note_cache.invalidate(db, {
+            note_id for row in rows
+            for note_id in (row.source_id, row.old_target_id, row.new_target_id)
+        })
+
+    def load(self, db: Session, notes: List[Note]) -> None:
+        """Fill links_to/links_from of already loaded notes with a single query"""
+        if not notes:
+            return
+        links_to: Dict[str, List[str]] = {note.id: [] for note in notes}
+        links_from: Dict[str, List[str]] = {note.id: [] for note in notes}
+        rows = db.execute(
+            text("""
+            -- DISTINCT: a note may link to another by both its id and its title
+            SELECT DISTINCT source_id, target_id FROM note_links
+            WHERE source_id = ANY(:ids) OR target_id = ANY(:ids)
+            ORDER BY source_id, target_id
+            """),
+            {"ids": list(links_to)}
+        )
+        for row in rows:
+            if row.source_id in links_to:
+                links_to[row.source_id].append(row.target_id)
+            if row.target_id in links_from:
+                links_from[row.target_id].append(row.source_id)
+
+        for note in notes:
+            attributes.set_committed_value(note, "links_to", links_to[note.id])
+            attributes.set_committed_value(note, "links_from", links_from[note.id])
+
+# Singleton instance
+link_service = LinkService()
@@ -0,0 +1,182 @@
+# services/note_cache.py
+import copy
+import logging
+import select
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Postgres channel carrying the ids of notes whose cached copies must be dropped
+CHANNEL = "note_cache"
+
+class NoteCache:
+    """Read-through LRU of serialized notes (column dicts), bounded in size and age.
+
+    Writers call invalidate() inside their transaction: the local copy is dropped at once,
+    and a NOTIFY that Postgres delivers on commit drops it in every worker's listener,
+    including this one's. A reader whose query started before that commit can still hold the
+    old row when the eviction arrives, so readers take sequence() before querying and pass it
+    to put(), which discards the row if the note was evicted in between.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0}
+        self._listener: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._subscribers: List[Callable[[Optional[List[str]]], None]] = []
+        # Bumped by every eviction; note id -> sequence of its latest eviction, bounded like
+        # the entries, with the newest sequence dropped from it kept as a floor
+        self._sequence = 0
+        self._evicted: "OrderedDict[str, int]" = OrderedDict()
+        self._evicted_floor = 0
+
+    def get(self, note_id: str) -> Optional[Dict[str, Any]]:
+        """A copy of the cached columns of a note, or None"""
+        with self._lock:
+            entry = self._entries.get(note_id)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[note_id]
+                entry = None
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(note_id)
+            self._counters["hits"] += 1
+        # Callers get their own lists; ORM instances built from them may be mutated
+        return copy.deepcopy(entry[1])
+
+    def sequence(self) -> int:
+        """Current eviction sequence, taken before reading a note that is to be put()"""
+        with self._lock:
+            return self._sequence
+
+    def put(self, note_id: str, columns: Dict[str, Any], sequence: Optional[int] = None) -> None:
+        """Cache a note read after sequence(); dropped if it was evicted since"""
+        if self.max_entries <= 0:
+            return
+        columns = copy.deepcopy(columns)
+        with self._lock:
+            if sequence is not None and (
+                sequence < self._evicted_floor or self._evicted.get(note_id, 0) > sequence
+            ):
+                return
+            self._entries[note_id] = (time.monotonic(), columns)
+            self._entries.move_to_end(note_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, db: Optional[Session], note_ids: Iterable[str]) -> None:
+        """Drop notes here now, and in all workers once the session's transaction commits"""
+        note_ids = sorted(set(note_ids))
+        if not note_ids:
+            return
+        self.evict(note_ids)
+        if db is not None:
+            db.execute(
+                text("SELECT pg_notify(:channel, id) FROM unnest(CAST(:ids AS text[])) AS id"),
+                {"channel": CHANNEL, "ids": note_ids}
+            )
+
+    def subscribe(self, callback: Callable[[Optional[List[str]]], None]) -> None:
+        """Also pass every eviction to callback: the note ids, or None when all are dropped
+
+        Lets caches of data derived from several notes ride on the same invalidations.
+        """
+        self._subscribers.append(callback)
+
+    def evict(self, note_ids: Iterable[str]) -> None:
+        note_ids = list(note_ids)
+        with self._lock:
+            for note_id in note_ids:
+                if self._entries.pop(note_id, None) is not None:
+                    self._counters["invalidations"] += 1
+                self._sequence += 1
+                self._evicted[note_id] = self._sequence
+                self._evicted.move_to_end(note_id)
+            while len(self._evicted) > max(self.max_entries, 1):
+                self._evicted_floor = self._evicted.popitem(last=False)[1]
+        for callback in self._subscribers:
+            callback(note_ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sequence += 1
+            self._evicted.clear()
+            self._evicted_floor = self._sequence
+        for callback in self._subscribers:
+            callback(None)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Hit, miss and invalidation counters"""
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self._counters)
+            snapshot["entries"] = len(self._entries)
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_rate"] = snapshot["hits"] / lookups if lookups else 0.0
+        snapshot["max_entries"] = self.max_entries
+        snapshot["ttl"] = self.ttl
+        snapshot["listening"] = self._listener is not None and self._listener.is_alive()
+        return snapshot
+
+    def start_listener(self, engine: Engine) -> None:
+        """Follow invalidations from other processes on a dedicated connection"""
+        if self.max_entries <= 0 or self._listener is not None:
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(
+            target=self._listen, args=(engine,), name="note-cache-listener", daemon=True
+        )
+        self._listener.start()
+
+    def stop_listener(self) -> None:
+        if self._listener is None:
+            return
+        self._stop.set()
+        self._listener.join(timeout=5)
+        self._listener = None
+
+    def _listen(self, engine: Engine) -> None:
+        while not self._stop.is_set():
+            conn = None
+            try:
+                # Taken out of the pool for good; a listening connection is never returned
+                raw = engine.raw_connection()
+                raw.detach()
+                conn = raw.dbapi_connection
+                conn.autocommit = True
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {CHANNEL}")
+                cursor.close()
+                # Writes committed while nobody was listening may have been cached
+                self.clear()
+                logger.info("Listening for note cache invalidations")
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    note_ids = [notify.payload for notify in conn.notifies]
+                    conn.notifies.clear()
+                    self.evict(note_ids)
+            except Exception:
+                logger.exception("Note cache listener failed; reconnecting")
+                self.clear()
+                self._stop.wait(settings.NOTE_CACHE_RECONNECT_DELAY)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+# Singleton instance
+note_cache = NoteCache(settings.NOTE_CACHE_SIZE, settings.NOTE_CACHE_TTL)
@@ -1,15 +1,33 @@
 # services/note_service.py
+import base64
 import hashlib
+import json
+import re
 import markdown
+from datetime import datetime
+from types import SimpleNamespace
 from typing import List, Dict, Any, Optional, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import any_
+from sqlalchemy.orm import Session, make_transient_to_detached, undefer, undefer_group
+from sqlalchemy import and_, distinct, literal, literal_column, null, or_, select, text, tuple_
 from sqlalchemy.sql import func
-from app.db.models import Note
+from app.core.config import settings
+from app.db.models import Note, NoteTag
 from app.services.embedding_service import embedding_service
 from app.services.diff_service import diff_service
+from app.services.job_service import job_service
+from app.services.link_service import link_service
+from app.services.note_cache import note_cache
+from app.services.tag_service import tag_service
 import uuid
 
+# Plan nodes that read an index, e.g. "Bitmap Index Scan on ix_notes_title_trgm"
+INDEX_SCAN_PATTERN = re.compile(r"Index (?:Only )?Scan(?: Backward)? (?:using|on) (\w+)")
+
+# Attributes kept in the note cache: everything but the embedding and derived search columns
+CACHED_COLUMNS = [
+    c.key for c in Note.__table__.c if c.key not in ("vector_data", "search_vector")
+] + ["links_to", "links_from"]
+
 class NoteService:
     def create_note(self, db: Session, title: str, raw_content: str, tags: List[str] = None) -> Note:
         """Create a new note with the given content"""
@@ -48,8 +66,10 @@ class NoteService:
         # Detect links to other notes
         links_to = diff_service.extract_linked_notes(raw_content)
         
-        # Create vector embedding
-        vector_data = embedding_service.generate_embedding(title + " " + raw_content)
+        # Create vector embedding (left to background workers in deferred mode)
+        vector_data = None
+        if not settings.DEFERRED_INDEXING:
+            vector_data = embedding_service.generate_embedding(title + " " + raw_content, db=db)
         
         # Create new note
         db_note = Note(
@@ -58,31 +78,90 @@ class NoteService:
             raw_content=raw_content,
             content=content,
             tags=tags,
-            links_to=links_to,
-            vector_data=vector_data
+            vector_data=vector_data,
+            stale=[]
         )
         
         db.add(db_note)
+        
+        if settings.DEFERRED_INDEXING:
+            job_service.enqueue(db, db_note, "embedding")
+        
+        # Edges reference the note row, so it is inserted first
+        db.flush()
+        # Aliases first, so links from elsewhere (and to itself) resolve to the new note
+        link_service.register(db, db_note.id, title)
+        link_service.sync(db, db_note.id, links_to)
+        # Cached link graphs may show this id as a dangling link target
+        note_cache.invalidate(db, [db_note.id])
+        
         db.commit()
         db.refresh(db_note)
         
-        # Update links_from for all notes that this note links to
-        self._update_links_from(db, db_note.id, links_to)
-        
         return db_note
     
-    def get_note(self, db: Session, note_id: str) -> Optional[Note]:
-        """Get a note by its ID"""
-        return db.query(Note).filter(Note.id == note_id).first()
+    def get_note(self, db: Session, note_id: str, cached: bool = True) -> Optional[Note]:
+        """Get a note by its ID, through the note cache unless the caller is about to modify it"""
+        if cached:
+            # A note this session already holds may have unflushed changes that merging the
+            # cached columns would overwrite
+            note = db.identity_map.get(db.identity_key(Note, note_id))
+            if note is not None:
+                return note
+            columns = note_cache.get(note_id)
+            if columns is not None:
+                # Attached to the session without a query; vector_data still loads on access
+                note = Note(**columns)
+                make_transient_to_detached(note)
+                return db.merge(note, load=False)
+        
+        # Taken before the query, so an eviction racing this read keeps the row out of the cache
+        sequence = note_cache.sequence()
+        note = db.query(Note).options(*self._projection("full")).filter(Note.id == note_id).first()
+        if note is not None and cached:
+            note_cache.put(note_id, {key: getattr(note, key) for key in CACHED_COLUMNS}, sequence)
+        return note
+    
+    def get_note_etag(self, db: Session, note_id: str, variant: str = "") -> Optional[str]:
+        """Strong ETag of a note (or a variant of its representation), read without its body
+
+        Body edits always bump updated_at; background jobs change stale, and other notes' edits
+        change links_from, without touching updated_at.
+        """
+        columns = note_cache.get(note_id)
+        if columns is not None:
+            state = SimpleNamespace(**columns)
+        else:
+            state = db.query(
+                Note.id, Note.updated_at, Note.archived, Note.tags, Note.links_to, Note.links_from, Note.stale
+            ).filter(Note.id == note_id).first()
+        if state is None:
+            return None
+        return f'"{note_id}{variant}-{self._state_digest([state])}"'
+    
+    def get_page_etag(self, notes: List[Note], fields: str = "full") -> str:
+        """Strong ETag of a listing page in the given projection"""
+        return f'"{fields}-{self._state_digest(notes, links=fields != "summary")}"'
+    
+    def _state_digest(self, notes, links: bool = True) -> str:
+        digest = hashlib.sha256()
+        for note in notes:
+            state = (note.id, note.updated_at.isoformat(), note.archived, note.tags, note.stale)
+            if links:
+                # Summaries carry no links, and do not load them
+                state += (note.links_to, note.links_from)
+            digest.update(repr(state).encode())
+        return digest.hexdigest()[:20]
     
-    def get_notes(self, db: Session, skip: int = 0, limit: int = 100, include_archived: bool = False) -> List[Note]:
-        """Get all notes with pagination"""
-        query = db.query(Note)
+    def get_notes(self, db: Session, skip: int = 0, limit: int = 100, include_archived: bool = False,
+                  cursor: Optional[str] = None, fields: str = "full") -> List[Note]:
+        """Get all notes, newest first, after the cursor (and/or skipping `skip` notes)"""
+        query = db.query(Note).options(*self._projection(fields))
         
         if not include_archived:
             query = query.filter(Note.archived == False)
             
-        return query.order_by(Note.updated_at.desc()).offset(skip).limit(limit).all()
+        return self._paginate(query, skip, limit, cursor).all()
     
     def update_note(self, db: Session, note_id: str, 
                     title: Optional[str] = None, 
@@ -90,13 +169,15 @@ class NoteService:
                     tags: Optional[List[str]] = None,
                     archived: Optional[bool] = None) -> Tuple[Note, bool]:
         """Update a note, return updated note and whether content changed"""
-        db_note = self.get_note(db, note_id)
+        db_note = self.get_note(db, note_id, cached=False)
         if not db_note:
             return None, False
         
         content_changed = False
         
         if title is not None and title != db_note.title:
+            # Links written as either title are re-pointed through the link index
+            link_service.rename(db, db_note.id, db_note.title, title)
             db_note.title = title
             content_changed = True
             
@@ -105,13 +186,8 @@ class NoteService:
             db_note.content = markdown.markdown(raw_content)
             content_changed = True
             
-            # Update links
-            old_links = db_note.links_to
-            new_links = diff_service.extract_linked_notes(raw_content)
-            db_note.links_to = new_links
-            
-            # Update links_from for affected notes
-            self._update_links_from(db, db_note.id, new_links, old_links)
+            # Update links (and so the backlinks of the notes gained or lost) in one go
+            link_service.sync(db, db_note.id, diff_service.extract_linked_notes(raw_content))
         
         if tags is not None:
             db_note.tags = tags
@@ -121,10 +197,14 @@ class NoteService:
         
         # If content changed, update vector embedding
         if content_changed:
-            db_note.vector_data = embedding_service.generate_embedding(
-                db_note.title + " " + db_note.raw_content
-            )
+            if settings.DEFERRED_INDEXING:
+                job_service.enqueue(db, db_note, "embedding")
+            else:
+                db_note.vector_data = embedding_service.generate_embedding(
+                    db_note.title + " " + db_note.raw_content, db=db
+                )
         
+        note_cache.invalidate(db, [db_note.id])
         db.commit()
         db.refresh(db_note)
         
@@ -132,30 +212,147 @@ class NoteService:
     
     def archive_note(self, db: Session, note_id: str) -> Note:
         """Archive a note (soft delete)"""
-        db_note = self.get_note(db, note_id)
+        db_note = self.get_note(db, note_id, cached=False)
         if not db_note:
             return None
             
         db_note.archived = True
+        note_cache.invalidate(db, [db_note.id])
         db.commit()
         db.refresh(db_note)
         
         return db_note
     
-    def get_notes_by_tag(self, db: Session, tag: str, skip: int = 0, limit: int = 100) -> List[Note]:
-        """Get notes by tag"""
-        return db.query(Note).filter(
-            tag.lower() == any_(func.lower(Note.tags)),
+    def get_notes_by_tag(self, db: Session, tag: str, skip: int = 0, limit: int = 100,
+                         cursor: Optional[str] = None, fields: str = "full") -> List[Note]:
+        """Get notes by tag, newest first, after the cursor (and/or skipping `skip` notes)"""
+        query = db.query(Note).options(*self._projection(fields)).filter(
+            tag_service.filter([tag]),
             Note.archived == False
-        ).order_by(Note.updated_at.desc()).offset(skip).limit(limit).all()
+        )
+        return self._paginate(query, skip, limit, cursor).all()
+    
+    def next_cursor(self, notes: List[Note], limit: int) -> Optional[str]:
+        """Opaque token for the page after `notes`, or None if this was the last page"""
+        if not notes or len(notes) < limit:
+            return None
+        last = notes[-1]
+        position = {"updated_at": last.updated_at.isoformat(), "id": last.id}
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+    
+    def _paginate(self, query, skip: int, limit: int, cursor: Optional[str]):
+        """Order by (updated_at DESC, id) and apply the keyset cursor, offset and limit
+
+        The cursor seeks straight to its position on ix_notes_archived_updated_at_id; OFFSET
+        still reads and discards every skipped row. Edits never make a walk repeat notes or
+        skip unedited ones, but a note edited mid-walk moves in front of the cursor: if it was
+        not returned yet, it appears only when the client restarts from the first page.
+        """
+        if cursor:
+            updated_at, note_id = self._decode_cursor(cursor)
+            query = query.filter(or_(
+                Note.updated_at < updated_at,
+                and_(Note.updated_at == updated_at, Note.id > note_id)
+            ))
+        
+        return query.order_by(Note.updated_at.desc(), Note.id).offset(skip).limit(limit)
+    
+    def _projection(self, fields: str) -> Tuple:
+        """Loader options for a fields= projection: bodies and links, or only the excerpt"""
+        if fields == "summary":
+            return (undefer(Note.excerpt),)
+        return (undefer_group("body"), undefer_group("links"))
+    
+    def _decode_cursor(self, cursor: str) -> Tuple[datetime, str]:
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            return datetime.fromisoformat(position["updated_at"]), str(position["id"])
+        except (ValueError, TypeError, KeyError) as e:
+            raise ValueError("Invalid cursor") from e
     
     def search_notes(self, db: Session, query: str, tags: List[str] = None, 
-                     semantic: bool = False, limit: int = 10, archived: bool = False) -> List[Dict[str, Any]]:
+                     semantic: bool = False, limit: int = 10, archived: bool = False,
+                     fuzzy: bool = False, similarity_threshold: Optional[float] = None,
+                     hybrid: bool = False, fields: str = "full") -> List[Dict[str, Any]]:
         """Search for notes by text and/or tags"""
+        if hybrid and query:
+            # Full-text and vector candidates fused in one statement, both filtered
+            return embedding_service.hybrid_search(db, query, tags, limit, archived)
+        
         if semantic and query:
             # Semantic search using vector similarity
-            return embedding_service.semantic_search(db, query, limit)
+            return embedding_service.semantic_search(db, query, limit, tags, archived)
+        
+        rows = self._search_query(
+            db, query, tags, limit, archived, fuzzy, similarity_threshold, fields=fields
+        ).all()
+        
+        return [
+            {"note": note, "similarity_score": float(score), "highlight": snippet}
+            for note, score, snippet in rows
+        ]
+    
+    def explain_search(self, db: Session, query: str, tags: List[str] = None,
+                       limit: int = 10, archived: bool = False, fuzzy: bool = False,
+                       similarity_threshold: Optional[float] = None,
+                       seqscan: bool = True) -> Dict[str, Any]:
+        """EXPLAIN plan of a text or fuzzy search, with the indexes it scans"""
+        statement = self._search_query(
+            db, query, tags, limit, archived, fuzzy, similarity_threshold
+        ).statement
+        compiled = statement.compile(dialect=db.get_bind().dialect)
+        try:
+            if not seqscan:
+                # Tiny tables are cheaper to scan; forbid that to see the plan a large one gets
+                db.execute(text("SELECT set_config('enable_seqscan', 'off', true)"))
+            plan = [
+                row[0] for row in
+                db.connection().exec_driver_sql(f"EXPLAIN {compiled}", compiled.params)
+            ]
+            indexes = []
+            for line in plan:
+                match = INDEX_SCAN_PATTERN.search(line)
+                if match and match.group(1) not in indexes:
+                    indexes.append(match.group(1))
+            return {"plan": plan, "indexes": indexes}
+        finally:
+            # Drop the transaction-local planner settings
+            db.rollback()
+    
+    def faceted_search(self, db: Session, query: str, tags: List[str] = None,
+                       limit: int = 10, archived: bool = False, fuzzy: bool = False,
+                       similarity_threshold: Optional[float] = None, fields: str = "full") -> Dict[str, Any]:
+        """Text, fuzzy or tag-only search with tag and month counts over all matches
+
+        Counts are computed by the same statement as the hits (an uncorrelated subquery
+        Postgres evaluates once), so a faceted search is still one round trip.
+        """
+        rows = self._search_query(
+            db, query, tags, limit, archived, fuzzy, similarity_threshold, facets=True, fields=fields
+        ).all()
         
+        facets: Dict[str, List[Dict[str, Any]]] = {"tags": [], "months": []}
+        # No hits means no matches, and so no counts either
+        for facet in (rows[0][3] or []) if rows else []:
+            if facet["by_month"]:
+                facets["months"].append({"value": facet["month"], "count": facet["count"]})
+            elif facet["tag"] is not None:
+                facets["tags"].append({"value": facet["tag"], "count": facet["count"]})
+        facets["tags"].sort(key=lambda f: (-f["count"], f["value"]))
+        facets["months"].sort(key=lambda f: f["value"], reverse=True)
+        
+        return {
+            "results": [
+                {"note": note, "similarity_score": float(score), "highlight": snippet}
+                for note, score, snippet, _ in rows
+            ],
+            "facets": facets,
+        }
+    
+    def _search_query(self, db: Session, query: str, tags: Optional[List[str]], limit: int,
+                      archived: bool, fuzzy: bool, similarity_threshold: Optional[float],
+                      facets: bool = False, fields: str = "full"):
+        """Query yielding (note, score, highlight[, facet counts]) rows for text, fuzzy or tag-only search"""
         # Text-based search
         db_query = db.query(Note)
         
@@ -163,34 +360,92 @@ class NoteService:
         if not archived:
             db_query = db_query.filter(Note.archived == False)
         
-        # Text search
-        if query:
-            # Simple case-insensitive search - in production, use full-text search
-            db_query = db_query.filter(
-                Note.title.ilike(f'%{query}%') | 
-                Note.raw_content.ilike(f'%{query}%')
-            )
-        
         # Tag filtering
         if tags:
-            for tag in tags:
-                db_query = db_query.filter(tag.lower() == any_(func.lower(Note.tags)))
+            db_query = db_query.filter(tag_service.filter(tags))
         
-        # Get results
-        results = db_query.order_by(Note.updated_at.desc()).limit(limit).all()
+        if not query:
+            extra = [self._facet_counts(db_query)] if facets else []
+            return (
+                db_query.add_columns(literal(1.0), null(), *extra)
+                .options(*self._projection(fields))
+                .order_by(Note.updated_at.desc())
+                .limit(limit)
+            )
         
-        # Format results
-        return [{"note": note, "similarity_score": 1.0} for note in results]
+        if fuzzy:
+            # Typo-tolerant (%) and substring (ILIKE) matches, both served by trigram indexes
+            threshold = settings.TRIGRAM_SIMILARITY_THRESHOLD
+            if similarity_threshold is not None:
+                threshold = similarity_threshold
+            db.execute(
+                text("SELECT set_config('pg_trgm.similarity_threshold', :threshold, true)"),
+                {"threshold": str(threshold)}
+            )
+            pattern = "%" + re.sub(r"([\\%_])", r"\\\1", query) + "%"
+            match = Note.title.op("%")(query) | Note.title.ilike(pattern, escape="\\")
+            if settings.TRIGRAM_INDEX_CONTENT:
+                match = match | Note.raw_content.ilike(pattern, escape="\\")
+            matches = db_query.filter(match)
+            extra = [self._facet_counts(matches)] if facets else []
+            score = func.similarity(Note.title, query)
+            return (
+                matches.add_columns(score, null(), *extra)
+                .options(*self._projection(fields))
+                .order_by(score.desc(), Note.updated_at.desc())
+                .limit(limit)
+            )
+        
+        # Full-text search on the GIN-indexed search_vector, best matches first
+        tsquery = func.websearch_to_tsquery(settings.SEARCH_TEXT_CONFIG, query)
+        matches = db_query.filter(Note.search_vector.op("@@")(tsquery))
+        extra = [self._facet_counts(matches)] if facets else []
+        # Normalization 32 maps the rank into [0, 1) as rank / (rank + 1)
+        rank = func.ts_rank_cd(Note.search_vector, tsquery, 32)
+        ranked = (
+            matches.with_entities(Note.id.label("id"), rank.label("rank"))
+            .order_by(rank.desc(), Note.updated_at.desc())
+            .limit(limit)
+            .subquery()
+        )
+        
+        # Snippets are only rendered for the page of results, not every match
+        headline = func.ts_headline(
+            settings.SEARCH_TEXT_CONFIG, Note.raw_content, tsquery, settings.SEARCH_HEADLINE_OPTIONS
+        )
+        return (
+            db.query(Note, ranked.c.rank, headline, *extra)
+            .options(*self._projection(fields))
+            .join(ranked, Note.id == ranked.c.id)
+            .order_by(ranked.c.rank.desc(), Note.updated_at.desc())
+        )
+    
+    def _facet_counts(self, matches):
+        """Scalar subquery: JSON array of per-tag and per-month (updated_at) counts over matches"""
+        matched = matches.with_entities(Note.id.label("id"), Note.updated_at.label("updated_at")).subquery()
+        # One expression object, so SELECT and GROUP BY render identically
+        month = func.to_char(matched.c.updated_at, literal_column("'YYYY-MM'"))
+        counts = (
+            select(
+                func.grouping(NoteTag.tag).label("by_month"),
+                NoteTag.tag.label("tag"),
+                month.label("month"),
+                func.count(distinct(matched.c.id)).label("count"),
+            )
+            .select_from(matched.outerjoin(NoteTag, NoteTag.note_id == matched.c.id))
+            .group_by(func.grouping_sets(tuple_(NoteTag.tag), tuple_(month)))
+            .subquery()
+        )
+        return select(func.json_agg(func.json_build_object(
+            "by_month", counts.c.by_month,
+            "tag", counts.c.tag,
+            "month", counts.c.month,
+            "count", counts.c.count,
+        ))).scalar_subquery()
     
     def get_all_tags(self, db: Session) -> List[str]:
         """Get all unique tags across notes"""
-        notes = db.query(Note.tags).filter(Note.archived == False).all()
-        # Flatten and get unique tags
-        all_tags = []
-        for note_tags in notes:
-            all_tags.extend(note_tags[0])
-        
-        return list(set(all_tags))
+        return tag_service.get_all_tags(db)
     
     def merge_notes(self, db: Session, note_ids: List[str], 
                    new_title: str, separator: str = "\n\n---\n\n") -> Optional[Note]:
@@ -198,7 +453,7 @@ class NoteService:
         # Get all source notes
         notes = []
         for note_id in note_ids:
-            note = self.get_note(db, note_id)
+            note = self.get_note(db, note_id, cached=False)
             if note:
                 notes.append(note)
         
@@ -227,30 +482,6 @@ class NoteService:
     def _generate_hash(self, content: str) -> str:
         """Generate a hash from content for use as ID"""
         return hashlib.sha256(content.encode()).hexdigest()[:16]
-    
-    def _update_links_from(self, db: Session, source_id: str, 
-                          new_links: List[str], old_links: List[str] = None) -> None:
-        """Update links_from for notes that this note links to"""
-        # If no old links provided, assume empty list
-        if old_links is None:
-            old_links = []
-        
-        # Notes that are no longer linked to (remove this note from their links_from)
-        removed_links = set(old_links) - set(new_links)
-        for link in removed_links:
-            linked_note = self.get_note(db, link)
-            if linked_note and source_id in linked_note.links_from:
-                linked_note.links_from.remove(source_id)
-        
-        # Notes that are newly linked to (add this note to their links_from)
-        added_links = set(new_links) - set(old_links)
-        for link in added_links:
-            linked_note = self.get_note(db, link)
-            if linked_note and source_id not in linked_note.links_from:
-                linked_note.links_from.append(source_id)
-        
-        if removed_links or added_links:
-            db.commit()
 
 # Singleton instance
 note_service = NoteService()
\ No newline at end of file
@@ -2,9 +2,16 @@
 import markdown
 from typing import List, Optional, Dict, Any
 from uuid import UUID
-from sqlalchemy.orm import Session
+from sqlalchemy import and_
+from sqlalchemy.orm import Session, undefer_group
+from sqlalchemy.sql import func
+from app.core.config import settings
 from app.db.models import Note, NoteRevision
 from app.services.diff_service import diff_service
+from app.services.embedding_service import embedding_service
+from app.services.job_service import job_service
+from app.services.link_service import link_service
+from app.services.note_cache import note_cache
 
 class RevisionService:
     def save_revision(self, db: Session, note_id: str, old_raw_content: str, 
@@ -25,11 +32,17 @@ class RevisionService:
             note_id=note_id,
             content_raw_diff=content_raw_diff,
             content_diff=content_diff,
+            content_raw_reverse_diff=diff_service.invert_diff(content_raw_diff),
+            content_reverse_diff=diff_service.invert_diff(content_diff),
             revision_name=revision_name,
             revision_note=revision_note,
             revision_number=revision_number,
             parent_revision_id=parent_revision_id
         )
+        if self._is_keyframe_due(db, note_id, revision_number,
+                                 len(content_raw_diff) + len(content_diff)):
+            db_revision.raw_content_snapshot = new_raw_content
+            db_revision.content_snapshot = new_content
         
         db.add(db_revision)
         db.commit()
@@ -43,27 +56,52 @@ class RevisionService:
             NoteRevision.note_id == note_id
         ).order_by(NoteRevision.revision_number.desc()).all()
     
+    def get_revisions_etag(self, db: Session, note_id: str) -> str:
+        """ETag of a note's revision list; revisions are only ever appended"""
+        count, latest = db.query(
+            func.count(NoteRevision.revision_id), func.max(NoteRevision.revision_number)
+        ).filter(NoteRevision.note_id == note_id).one()
+        return f'"{note_id}-revisions-{count}-{latest or 0}"'
+    
     def get_revision(self, db: Session, revision_id: UUID) -> Optional[NoteRevision]:
         """Get a specific revision by ID"""
         return db.query(NoteRevision).filter(
             NoteRevision.revision_id == revision_id
         ).first()
     
+    def revision_exists(self, db: Session, revision_id: UUID) -> bool:
+        """Whether a revision exists, without loading its diffs"""
+        return db.query(
+            db.query(NoteRevision.revision_id).filter(NoteRevision.revision_id == revision_id).exists()
+        ).scalar()
+    
     def reconstruct_note_at_revision(self, db: Session, note_id: str, 
                                     target_revision_number: int) -> Dict[str, Any]:
-        """Reconstruct a note's content at a specific revision"""
-        # Get the current note
+        """Reconstruct a note's content at a specific revision.
+
+        Starts from the nearest full state around the target (a keyframe on either side, or
+        the current note after the latest revision) and applies only the forward or reverse
+        patches in between, so at most half a keyframe interval of diffs is loaded and applied.
+        """
+        # Get the current note; its body is loaded only if replay starts from it
         current_note = db.query(Note).filter(Note.id == note_id).first()
         if not current_note:
             return None
         
-        # Get all revisions for the note
-        revisions = db.query(NoteRevision).filter(
-            NoteRevision.note_id == note_id
-        ).order_by(NoteRevision.revision_number.desc()).all()
+        # Latest revision and the nearest keyframes at or below / at or above the target
+        keyframe = NoteRevision.raw_content_snapshot.isnot(None)
+        latest, below, above = db.query(
+            func.max(NoteRevision.revision_number),
+            func.max(NoteRevision.revision_number).filter(
+                and_(keyframe, NoteRevision.revision_number <= target_revision_number)
+            ),
+            func.min(NoteRevision.revision_number).filter(
+                and_(keyframe, NoteRevision.revision_number >= target_revision_number)
+            ),
+        ).filter(NoteRevision.note_id == note_id).one()
         
-        # If no revisions or target is beyond revisions, return current note
-        if not revisions or target_revision_number > revisions[0].revision_number:
+        # If no revisions or target is the latest or beyond, return current note
+        if latest is None or target_revision_number >= latest:
             return {
                 "title": current_note.title,
                 "raw_content": current_note.raw_content,
@@ -71,20 +109,25 @@ class RevisionService:
                 "tags": current_note.tags
             }
         
-        # Start with current content
-        raw_content = current_note.raw_content
-        content = current_note.content
-        
-        # Apply revisions in reverse order until we reach the target
-        for revision in revisions:
-            if revision.revision_number <= target_revision_number:
-                break
-                
-            # Apply diffs in reverse to go backwards in time
-            raw_content = diff_service.apply_diff(raw_content, 
-                                               diff_service.revert_diff("", revision.content_raw_diff))
-            content = diff_service.apply_diff(content,
-                                           diff_service.revert_diff("", revision.content_diff))
+        upper = above if above is not None else latest
+        if below is not None and target_revision_number - below <= upper - target_revision_number:
+            # Forwards from the keyframe below: diffs of revisions (below, target]
+            raw_content, content = self._keyframe(db, note_id, below)
+            for revision in self._revisions_between(db, note_id, below, target_revision_number):
+                raw_content = diff_service.apply_diff(raw_content, revision.content_raw_diff)
+                content = diff_service.apply_diff(content, revision.content_diff)
+        else:
+            # Backwards from the keyframe above, or the current note: revisions (target, upper]
+            if above is not None:
+                raw_content, content = self._keyframe(db, note_id, above)
+            else:
+                raw_content, content = current_note.raw_content, current_note.content
+            for revision in reversed(
+                self._revisions_between(db, note_id, target_revision_number, upper, reverse=True)
+            ):
+                # Reverse patches go backwards in time
+                raw_content = diff_service.apply_diff(raw_content, revision.content_raw_reverse_diff)
+                content = diff_service.apply_diff(content, revision.content_reverse_diff)
         
         # Return reconstructed note data
         return {
@@ -104,7 +147,7 @@ class RevisionService:
             return None
             
         # Get the note
-        note = db.query(Note).filter(Note.id == revision.note_id).first()
+        note = db.query(Note).options(undefer_group("body")).filter(Note.id == revision.note_id).first()
         if not note:
             return None
             
@@ -134,7 +177,17 @@ class RevisionService:
         # Update the note
         note.raw_content = reconstructed["raw_content"]
         note.content = reconstructed["content"]
+        link_service.sync(db, note.id, diff_service.extract_linked_notes(note.raw_content))
+        
+        # Restored text was embedded before, so this is normally an embedding cache hit
+        if settings.DEFERRED_INDEXING:
+            job_service.enqueue(db, note, "embedding")
+        else:
+            note.vector_data = embedding_service.generate_embedding(
+                note.title + " " + note.raw_content, db=db
+            )
         
+        note_cache.invalidate(db, [note.id])
         db.commit()
         db.refresh(note)
         
@@ -155,6 +208,56 @@ class RevisionService:
         # Render the diff
         return diff_service.render_diff(before_raw, after_raw)
     
+    def _is_keyframe_due(self, db: Session, note_id: str, revision_number: int,
+                         diff_size: int) -> bool:
+        """Whether a new revision should snapshot the contents, after REVISION_KEYFRAME_INTERVAL
+        revisions or REVISION_KEYFRAME_DELTA_BYTES of diff text since the last keyframe"""
+        interval = settings.REVISION_KEYFRAME_INTERVAL
+        max_delta = settings.REVISION_KEYFRAME_DELTA_BYTES
+        if interval <= 0 and max_delta <= 0:
+            return False
+        
+        last_keyframe = db.query(
+            func.coalesce(func.max(NoteRevision.revision_number), 0)
+        ).filter(
+            NoteRevision.note_id == note_id,
+            NoteRevision.raw_content_snapshot.isnot(None)
+        ).scalar()
+        if interval > 0 and revision_number - last_keyframe >= interval:
+            return True
+        if max_delta <= 0:
+            return False
+        
+        accumulated = db.query(
+            func.coalesce(func.sum(
+                func.length(NoteRevision.content_raw_diff) + func.length(NoteRevision.content_diff)
+            ), 0)
+        ).filter(
+            NoteRevision.note_id == note_id,
+            NoteRevision.revision_number > last_keyframe
+        ).scalar()
+        return accumulated + diff_size >= max_delta
+    
+    def _keyframe(self, db: Session, note_id: str, revision_number: int):
+        # (raw_content, content) stored on a keyframe revision
+        revision = db.query(NoteRevision).options(undefer_group("snapshot")).filter(
+            NoteRevision.note_id == note_id,
+            NoteRevision.revision_number == revision_number
+        ).first()
+        return revision.raw_content_snapshot, revision.content_snapshot
+    
+    def _revisions_between(self, db: Session, note_id: str, after: int, upto: int,
+                           reverse: bool = False) -> List[NoteRevision]:
+        # Revisions numbered (after, upto], oldest first; with their reverse diffs if asked
+        query = db.query(NoteRevision)
+        if reverse:
+            query = query.options(undefer_group("reverse"))
+        return query.filter(
+            NoteRevision.note_id == note_id,
+            NoteRevision.revision_number > after,
+            NoteRevision.revision_number <= upto
+        ).order_by(NoteRevision.revision_number).all()
+    
     def _get_next_revision_number(self, db: Session, note_id: str) -> int:
         """Get the next revision number for a note"""
         # Get the highest current revision number
@@ -0,0 +1,40 @@
+# services/tag_service.py
+from typing import List, Dict, Any, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.db.models import Note, NoteTag, TagStat
+
+class TagService:
+    """Reads over note_tags and tag_stats, which a trigger on notes keeps current"""
+
+    def normalize(self, tags: Optional[List[str]]) -> List[str]:
+        """Lowercased, deduplicated tags in the form stored in note_tags"""
+        return sorted({tag.lower() for tag in tags or []})
+
+    def filter(self, tags: List[str]):
+        """Clause matching notes that carry every one of the tags (served by note_tags indexes)"""
+        tags = self.normalize(tags)
+        return Note.id.in_(
+            select(NoteTag.note_id)
+            .where(NoteTag.tag.in_(tags))
+            .group_by(NoteTag.note_id)
+            .having(func.count() == len(tags))
+        )
+
+    def get_all_tags(self, db: Session) -> List[str]:
+        """Tags carried by at least one non-archived note"""
+        return [
+            row.tag for row in
+            db.query(TagStat.tag).filter(TagStat.note_count > 0).order_by(TagStat.tag)
+        ]
+
+    def get_tag_counts(self, db: Session) -> List[Dict[str, Any]]:
+        """Non-archived note count per tag, most used first"""
+        rows = db.query(TagStat).filter(TagStat.note_count > 0).order_by(
+            TagStat.note_count.desc(), TagStat.tag
+        )
+        return [{"tag": row.tag, "note_count": row.note_count} for row in rows]
+
+# Singleton instance
+tag_service = TagService()
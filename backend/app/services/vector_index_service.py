@@ -0,0 +1,239 @@
+# services/vector_index_service.py
+import logging
+import time
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.models import VECTOR_INDEX_NAME
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX_TYPES = ("hnsw", "ivfflat")
+
+# First pgvector release with hnsw.iterative_scan and ivfflat.iterative_scan
+ITERATIVE_SCAN_MIN_VERSION = (0, 8)
+
+# Build parameters accepted per index type (they end up in DDL, so only known keys are allowed)
+VECTOR_INDEX_PARAM_NAMES = {
+    "hnsw": ("m", "ef_construction"),
+    "ivfflat": ("lists",),
+}
+
+class VectorIndexService:
+    def apply_search_settings(self, db: Session, ef_search: Optional[int] = None,
+                              probes: Optional[int] = None) -> None:
+        """Override query-time ANN settings for the current transaction
+
+        Pooled connections already carry the configured values (see db/session.py).
+        """
+        # set_config(..., true) is the bind-parameter friendly form of SET LOCAL
+        db.execute(
+            text("SELECT set_config('hnsw.ef_search', :ef_search, true), "
+                 "set_config('ivfflat.probes', :probes, true)"),
+            {
+                "ef_search": str(ef_search or settings.HNSW_EF_SEARCH),
+                "probes": str(probes or settings.IVFFLAT_PROBES),
+            }
+        )
+
+    def extension_version(self, db: Session) -> Optional[Tuple[int, ...]]:
+        """Installed pgvector version as a tuple, None if the extension is missing"""
+        version = db.execute(
+            text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        ).scalar()
+        if version is None:
+            return None
+        return tuple(int(part) for part in version.split(".") if part.isdigit())
+
+    def check_iterative_scan(self, db: Session) -> bool:
+        """Turn VECTOR_ITERATIVE_SCAN off if the installed pgvector cannot honour it
+
+        Older servers silently drop the iterative_scan settings, and semantic search would
+        then treat every filtered pass that comes up short as final and rank exactly instead
+        of overfetching. Returns True if the setting was changed.
+        """
+        if settings.VECTOR_ITERATIVE_SCAN == "off":
+            return False
+        version = self.extension_version(db)
+        if version is not None and version >= ITERATIVE_SCAN_MIN_VERSION:
+            return False
+        logger.warning(
+            "pgvector %s has no iterative index scans; filtered semantic search will overfetch "
+            "instead (VECTOR_ITERATIVE_SCAN=off)",
+            ".".join(map(str, version)) if version else "(not installed)"
+        )
+        settings.VECTOR_ITERATIVE_SCAN = "off"
+        return True
+
+    def get_index_status(self, db: Session) -> Dict[str, Any]:
+        """Describe the vector index and any index build in progress on notes"""
+        index = db.execute(
+            text("""
+            SELECT am.amname AS index_type, pg_get_indexdef(c.oid) AS definition,
+                   c.reloptions AS options, x.indisvalid AS is_valid,
+                   pg_relation_size(c.oid) AS size_bytes
+            FROM pg_class c
+            JOIN pg_index x ON x.indexrelid = c.oid
+            JOIN pg_am am ON am.oid = c.relam
+            WHERE c.relname = :name
+            """),
+            {"name": VECTOR_INDEX_NAME}
+        ).first()
+
+        progress = db.execute(
+            text("""
+            SELECT p.phase, p.blocks_done, p.blocks_total, p.tuples_done, p.tuples_total
+            FROM pg_stat_progress_create_index p
+            WHERE p.relid = 'notes'::regclass
+            """)
+        ).first()
+
+        return {
+            "name": VECTOR_INDEX_NAME,
+            "exists": index is not None,
+            "index_type": index.index_type if index else None,
+            "definition": index.definition if index else None,
+            "options": list(index.options or []) if index else [],
+            "is_valid": index.is_valid if index else None,
+            "size_bytes": index.size_bytes if index else None,
+            "build_progress": dict(progress._mapping) if progress else None,
+            "ef_search": settings.HNSW_EF_SEARCH,
+            "probes": settings.IVFFLAT_PROBES,
+        }
+
+    def build_params(self, index_type: str, overrides: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+        """Merge configured build parameters with overrides, validating names and values"""
+        if index_type not in VECTOR_INDEX_TYPES:
+            raise ValueError(f"Unsupported vector index type: {index_type}")
+
+        params = settings.vector_index_params(index_type)
+        for name, value in (overrides or {}).items():
+            if value is None:
+                continue
+            if name not in VECTOR_INDEX_PARAM_NAMES[index_type]:
+                raise ValueError(f"Parameter '{name}' does not apply to {index_type} indexes")
+            if int(value) <= 0:
+                raise ValueError(f"Parameter '{name}' must be positive")
+            params[name] = int(value)
+        return params
+
+    def index_ddl(self, name: str, index_type: str, params: Dict[str, int],
+                  concurrently: bool = False, column: str = "vector_data") -> str:
+        """CREATE INDEX statement for the notes vector index (or one on a shadow column)"""
+        with_clause = ", ".join(f"{key} = {int(value)}" for key, value in params.items())
+        return (
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} "
+            f"ON notes USING {index_type} ({column} vector_cosine_ops)"
+            + (f" WITH ({with_clause})" if with_clause else "")
+        )
+
+    def rebuild_index(self, index_type: Optional[str] = None,
+                      params: Optional[Dict[str, int]] = None,
+                      concurrently: bool = True) -> None:
+        """Build a replacement index (possibly with a new type/parameters) and swap it in
+
+        Notes always have an index under VECTOR_INDEX_NAME: both renames commit together, and
+        the old index is only dropped once the new one has taken its name.
+        """
+        index_type = index_type or settings.VECTOR_INDEX_TYPE
+        params = self.build_params(index_type, params)
+        new_name = f"{VECTOR_INDEX_NAME}_new"
+        old_name = f"{VECTOR_INDEX_NAME}_old"
+        concurrently_sql = "CONCURRENTLY " if concurrently else ""
+
+        # CONCURRENTLY cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            # A failed concurrent build or drop leaves an index behind; clear them first
+            conn.execute(text(f"DROP INDEX {concurrently_sql}IF EXISTS {new_name}"))
+            conn.execute(text(f"DROP INDEX {concurrently_sql}IF EXISTS {old_name}"))
+            conn.execute(text(self.index_ddl(new_name, index_type, params, concurrently)))
+
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER INDEX IF EXISTS {VECTOR_INDEX_NAME} RENAME TO {old_name}"))
+            conn.execute(text(f"ALTER INDEX {new_name} RENAME TO {VECTOR_INDEX_NAME}"))
+
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(f"DROP INDEX {concurrently_sql}IF EXISTS {old_name}"))
+
+    def reindex(self, concurrently: bool = True) -> None:
+        """Rebuild the existing index in place, keeping its type and parameters"""
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(
+                f"REINDEX INDEX {'CONCURRENTLY ' if concurrently else ''}{VECTOR_INDEX_NAME}"
+            ))
+
+    def recall_report(self, db: Session, sample_size: int = 20, k: int = 10,
+                      ef_search: Optional[int] = None,
+                      probes: Optional[int] = None) -> Dict[str, Any]:
+        """Compare exact and index-assisted top-k search on a sample of live notes"""
+        # Sampled notes act as queries; their own vectors are realistic query points
+        samples = db.execute(
+            text("""
+            SELECT id, vector_data::text AS query
+            FROM notes
+            WHERE archived = false AND vector_data IS NOT NULL
+            ORDER BY random()
+            LIMIT :sample_size
+            """),
+            {"sample_size": sample_size}
+        ).fetchall()
+
+        search_sql = text("""
+            SELECT id FROM notes
+            WHERE id != :note_id AND archived = false
+            ORDER BY vector_data <=> CAST(:query AS vector)
+            LIMIT :k
+        """)
+
+        self.apply_search_settings(db, ef_search=ef_search, probes=probes)
+
+        recalls: List[float] = []
+        exact_ms: List[float] = []
+        indexed_ms: List[float] = []
+        try:
+            for sample in samples:
+                params = {"note_id": sample.id, "query": sample.query, "k": k}
+
+                # Exact: forbid index scans so the planner sorts every row by distance
+                db.execute(text("SELECT set_config('enable_indexscan', 'off', true)"))
+                start = time.perf_counter()
+                exact = [row.id for row in db.execute(search_sql, params)]
+                exact_ms.append((time.perf_counter() - start) * 1000)
+
+                db.execute(text("SELECT set_config('enable_indexscan', 'on', true)"))
+                start = time.perf_counter()
+                indexed = [row.id for row in db.execute(search_sql, params)]
+                indexed_ms.append((time.perf_counter() - start) * 1000)
+
+                recalls.append(len(set(exact) & set(indexed)) / len(exact) if exact else 1.0)
+        finally:
+            # Drop the transaction-local planner settings
+            db.rollback()
+
+        return {
+            "index": self.get_index_status(db),
+            "sample_size": len(samples),
+            "k": k,
+            "ef_search": ef_search or settings.HNSW_EF_SEARCH,
+            "probes": probes or settings.IVFFLAT_PROBES,
+            "mean_recall": float(np.mean(recalls)) if recalls else None,
+            "min_recall": float(np.min(recalls)) if recalls else None,
+            "exact_latency_ms": self._latency_stats(exact_ms),
+            "indexed_latency_ms": self._latency_stats(indexed_ms),
+        }
+
+    def _latency_stats(self, samples: List[float]) -> Optional[Dict[str, float]]:
+        """Summarize latency samples in milliseconds"""
+        if not samples:
+            return None
+        return {
+            "p50": float(np.percentile(samples, 50)),
+            "p95": float(np.percentile(samples, 95)),
+            "mean": float(np.mean(samples)),
+        }
+
+# Singleton instance
+vector_index_service = VectorIndexService()
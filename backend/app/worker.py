@@ -0,0 +1,55 @@
+# worker.py
+"""Background worker that drains note_jobs (embeddings and backlinks).
+
+Run one or more alongside the API when DEFERRED_INDEXING is enabled:
+
+    python -m app.worker
+    python -m app.worker --kinds embedding --batch-size 128
+"""
+import argparse
+import logging
+import time
+from typing import List
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.job_service import job_service, JOB_KINDS
+
+logger = logging.getLogger("app.worker")
+
+def run(kinds: List[str], batch_size: int, poll_interval: float, once: bool = False) -> None:
+    """Process job batches until the queue is empty (once) or forever"""
+    db = SessionLocal()
+    try:
+        while True:
+            processed = 0
+            for kind in kinds:
+                try:
+                    count = job_service.run_batch(db, kind, batch_size)
+                except Exception:
+                    # Database errors (e.g. a lost connection): start over with a clean session
+                    logger.exception("Failed to process %s jobs", kind)
+                    db.close()
+                    db = SessionLocal()
+                    continue
+                if count:
+                    logger.info("Processed %d %s jobs", count, kind)
+                processed += count
+
+            if not processed:
+                if once:
+                    return
+                time.sleep(poll_interval)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drain the note_jobs queue")
+    parser.add_argument("--kinds", nargs="+", choices=JOB_KINDS, default=list(JOB_KINDS))
+    parser.add_argument("--batch-size", type=int, default=settings.WORKER_BATCH_SIZE)
+    parser.add_argument("--poll-interval", type=float, default=settings.WORKER_POLL_INTERVAL)
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    run(args.kinds, args.batch_size, args.poll_interval, once=args.once)
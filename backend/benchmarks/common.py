@@ -0,0 +1,96 @@
+# benchmarks/common.py
+"""Shared helpers for the benchmark scripts in this directory.
+
+Benchmarks run against settings.DATABASE_URI. Synthetic notes are only inserted when
+--seed is given and always use ids prefixed with BENCH_PREFIX, so they can be removed
+again with --cleanup.
+"""
+import argparse
+import random
+import time
+import numpy as np
+from typing import Callable, Dict, List
+from psycopg2.extras import execute_values
+from sqlalchemy import text
+from app.core.config import settings
+from app.db.session import engine
+
+BENCH_PREFIX = "bench-"
+
+WORDS = (
+    "python postgres vector index search note link graph revision diff tag archive "
+    "markdown embedding model query latency cache worker batch cursor merge title "
+    "content history snapshot keyframe schema migration backfill cluster replica"
+).split()
+
+def base_parser(description: str) -> argparse.ArgumentParser:
+    """Argument parser with the options every benchmark shares"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--seed", type=int, default=0,
+                        help="insert this many synthetic notes before measuring")
+    parser.add_argument("--cleanup", action="store_true",
+                        help="delete synthetic notes when done")
+    parser.add_argument("--iterations", type=int, default=200,
+                        help="measured calls per scenario")
+    return parser
+
+def random_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def seed_notes(count: int, batch_size: int = 5000, seed: int = 42) -> None:
+    """Insert synthetic notes with random unit vectors (no model inference needed)"""
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        for offset in range(0, count, batch_size):
+            rows = []
+            for i in range(offset, min(offset + batch_size, count)):
+                vector = np_rng.standard_normal(settings.VECTOR_DIMENSIONS)
+                vector /= np.linalg.norm(vector)
+                body = random_text(rng, rng.randint(50, 400))
+                rows.append((
+                    f"{BENCH_PREFIX}{i}", body, random_text(rng, 5), f"<p>{body}</p>",
+                    False, [rng.choice(WORDS) for _ in range(rng.randint(0, 3))],
+                    "[" + ",".join(f"{x:.6f}" for x in vector) + "]",
+                ))
+            execute_values(
+                cursor,
+                "INSERT INTO notes (id, raw_content, title, content, archived, tags, vector_data) "
+                "VALUES %s ON CONFLICT (id) DO NOTHING",
+                rows,
+            )
+            raw.commit()
+        cursor.execute("ANALYZE notes")
+        raw.commit()
+    finally:
+        raw.close()
+
+def cleanup_notes() -> None:
+    """Remove synthetic notes"""
+    with engine.begin() as conn:
+        # Revisions do not cascade with their note
+        conn.execute(text("DELETE FROM notes_revision WHERE note_id LIKE :prefix"), {"prefix": BENCH_PREFIX + "%"})
+        conn.execute(text("DELETE FROM notes WHERE id LIKE :prefix"), {"prefix": BENCH_PREFIX + "%"})
+
+def measure(fn: Callable[[int], object], iterations: int, warmup: int = 10) -> Dict[str, float]:
+    """Call fn(i) repeatedly and return latency percentiles in milliseconds"""
+    for i in range(warmup):
+        fn(i)
+    samples: List[float] = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50": float(np.percentile(samples, 50)),
+        "p99": float(np.percentile(samples, 99)),
+        "mean": float(np.mean(samples)),
+    }
+
+def print_table(title: str, rows: Dict[str, Dict[str, float]]) -> None:
+    print(f"\n{title}")
+    print(f"{'scenario':<40}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for name, stats in rows.items():
+        print(f"{name:<40}{stats['p50']:>10.2f}{stats['p99']:>10.2f}{stats['mean']:>10.2f}")
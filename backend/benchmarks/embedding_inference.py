@@ -0,0 +1,123 @@
+# benchmarks/embedding_inference.py
+"""Per-note encode latency, resident memory and parity of each embedding inference mode.
+
+Every mode is loaded in a fresh process, so resident memory is not shared between
+modes. Parity is the cosine agreement with the fp32 vectors already in notes.vector_data
+(sampled from settings.DATABASE_URI). Example:
+
+    python -m benchmarks.embedding_inference --modes torch,torch_int8,onnx --iterations 200
+"""
+import multiprocessing
+import os
+import resource
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+from pgvector.sqlalchemy import Vector
+from app.core.config import settings
+from app.db.session import SessionLocal
+from benchmarks.common import base_parser, cleanup_notes, measure, seed_notes
+
+def resident_memory_mb() -> float:
+    """Current resident set size (falls back to the peak where /proc is unavailable)"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def profile_mode(inference: str, onnx_file: Optional[str], texts: List[str],
+                 stored: Optional[np.ndarray], iterations: int) -> Dict[str, Any]:
+    """Runs in a child process: load one mode and measure it"""
+    from app.services.embedding_backends import cosine_agreement, load_sentence_transformer
+    import sentence_transformers  # noqa: F401 - library import is not part of the model cost
+
+    before = resident_memory_mb()
+    start = time.perf_counter()
+    model = load_sentence_transformer(settings.EMBEDDING_MODEL, inference, onnx_file)
+    load_s = time.perf_counter() - start
+
+    # One note per call, as on the write path
+    latency = measure(
+        lambda i: model.encode([texts[i % len(texts)]], show_progress_bar=False), iterations
+    )
+    result: Dict[str, Any] = {
+        "load_s": load_s,
+        "model_rss_mb": resident_memory_mb() - before,
+        "total_rss_mb": resident_memory_mb(),
+        "latency": latency,
+    }
+    if stored is not None:
+        result.update(cosine_agreement(stored, model.encode(texts, show_progress_bar=False)))
+    return result
+
+def load_sample(sample_size: int):
+    """Note texts and their stored vectors"""
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            text("""
+            SELECT title, raw_content, vector_data FROM notes
+            WHERE vector_data IS NOT NULL AND NOT ('embedding' = ANY(stale))
+              AND id NOT LIKE 'bench-%'
+            ORDER BY random() LIMIT :sample_size
+            """).columns(vector_data=Vector(settings.VECTOR_DIMENSIONS)),
+            {"sample_size": sample_size}
+        ).fetchall()
+    finally:
+        db.close()
+    return ([row.title + " " + row.raw_content for row in rows],
+            np.stack([row.vector_data for row in rows]) if rows else None)
+
+def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument("--modes", default="torch,torch_int8,onnx")
+    parser.add_argument("--onnx-file", default=settings.EMBEDDING_ONNX_FILE)
+    parser.add_argument("--sample-size", type=int, default=500,
+                        help="stored notes used for the parity check")
+    args = parser.parse_args()
+
+    if args.seed:
+        seed_notes(args.seed)
+
+    # Synthetic notes carry random vectors, so they are excluded from the parity sample
+    texts, stored = load_sample(args.sample_size)
+    if not texts:
+        print("No embedded notes found; measuring latency on placeholder text only")
+        texts = ["Meeting notes: migrate the search index and update the tag filters"] * 8
+
+    context = multiprocessing.get_context("spawn")
+    results: Dict[str, Dict[str, Any]] = {}
+    for mode in args.modes.split(","):
+        with context.Pool(1) as pool:
+            try:
+                results[mode] = pool.apply(
+                    profile_mode, (mode, args.onnx_file, texts, stored, args.iterations)
+                )
+            except Exception as e:
+                results[mode] = {"error": repr(e)}
+
+    print(f"\nEmbedding inference modes ({settings.EMBEDDING_MODEL}, {os.cpu_count()} CPUs, "
+          f"parity on {len(texts) if stored is not None else 0} stored vectors)")
+    print(f"{'mode':<14}{'p50 ms':>9}{'p99 ms':>9}{'model MB':>10}{'RSS MB':>9}"
+          f"{'mean cos':>10}{'min cos':>9}{'>=0.99':>8}")
+    for mode, result in results.items():
+        if "error" in result:
+            print(f"{mode:<14}failed: {result['error']}")
+            continue
+        latency = result["latency"]
+        print(f"{mode:<14}{latency['p50']:>9.2f}{latency['p99']:>9.2f}"
+              f"{result['model_rss_mb']:>10.1f}{result['total_rss_mb']:>9.1f}"
+              f"{result.get('mean_cosine', float('nan')):>10.4f}"
+              f"{result.get('min_cosine', float('nan')):>9.4f}"
+              f"{result.get('above_0_99', float('nan')):>8.2f}")
+
+    if args.cleanup:
+        cleanup_notes()
+
+if __name__ == "__main__":
+    main()
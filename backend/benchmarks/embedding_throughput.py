@@ -0,0 +1,92 @@
+# benchmarks/embedding_throughput.py
+"""Embedding throughput (texts/s) by inference backend and core count.
+
+Each configuration serves --callers concurrent single-text requests through an
+EmbeddingBatcher, the way API threads call generate_embedding. "local" is the in-process
+model; "pool xN" runs N replicas with --threads torch threads each. No database is needed.
+Example:
+
+    python -m benchmarks.embedding_throughput --texts 2000 --callers 32 --max-workers 8
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from typing import Dict, List
+from app.core.config import settings
+from app.services.embedding_backends import (
+    LocalEmbeddingBackend, ProcessPoolEmbeddingBackend
+)
+from app.services.embedding_service import EmbeddingBatcher
+from benchmarks.common import random_text
+
+def run_callers(backend, texts: List[str], callers: int) -> float:
+    """Push texts through a batcher from concurrent threads and return texts per second"""
+    batcher = EmbeddingBatcher(
+        backend.encode,
+        max_batch_size=settings.EMBEDDING_MAX_BATCH_SIZE,
+        max_wait_ms=settings.EMBEDDING_MAX_WAIT_MS,
+        max_in_flight=backend.concurrency,
+    )
+    # Warm up every replica
+    backend.encode(texts[:backend.concurrency * 4])
+
+    shares = [texts[i::callers] for i in range(callers)]
+    def caller(share: List[str]) -> None:
+        for text in share:
+            batcher.submit(text)
+
+    threads = [threading.Thread(target=caller, args=(share,)) for share in shares]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(texts) / (time.perf_counter() - start)
+
+def worker_counts(max_workers: int) -> List[int]:
+    counts, n = [], 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    return counts + [max_workers]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=1000, help="texts encoded per configuration")
+    parser.add_argument("--callers", type=int, default=32, help="concurrent request threads")
+    parser.add_argument("--threads", type=int, default=1, help="torch threads per pool replica")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1,
+                        help="largest replica count to try")
+    parser.add_argument("--pin-cpus", action="store_true", help="pin replicas to cores")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    texts = [random_text(rng, rng.randint(20, 200)) for _ in range(args.texts)]
+
+    results: Dict[str, float] = {}
+    results["local"] = run_callers(
+        LocalEmbeddingBackend(settings.EMBEDDING_MODEL, settings.EMBEDDING_MAX_BATCH_SIZE),
+        texts, args.callers
+    )
+    for workers in worker_counts(args.max_workers):
+        backend = ProcessPoolEmbeddingBackend(
+            settings.EMBEDDING_MODEL, workers=workers, torch_threads=args.threads,
+            batch_size=settings.EMBEDDING_MAX_BATCH_SIZE, pin_cpus=args.pin_cpus
+        )
+        try:
+            results[f"pool x{workers} ({workers * args.threads} cores)"] = run_callers(
+                backend, texts, args.callers
+            )
+        finally:
+            backend.shutdown()
+
+    print(f"\nEmbedding throughput ({args.texts} texts, {args.callers} callers, "
+          f"{os.cpu_count()} CPUs)")
+    print(f"{'backend':<40}{'texts/s':>12}{'speedup':>10}")
+    for name, rate in results.items():
+        print(f"{name:<40}{rate:>12.1f}{rate / results['local']:>10.2f}")
+
+if __name__ == "__main__":
+    main()
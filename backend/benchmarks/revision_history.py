@@ -0,0 +1,134 @@
+# benchmarks/revision_history.py
+"""p50/p99 latency of reconstructing a note at a revision, against history length.
+
+For each --lengths value a synthetic note with that many revisions is written through
+RevisionService.save_revision (so keyframes follow --interval). "legacy" reproduces the
+original walk back from the current note, which re-diffed text at every step; "current"
+calls RevisionService.reconstruct_note_at_revision (nearest keyframe plus stored forward or
+reverse patches). Targets are the oldest revision and random ones, e.g.:
+
+    python -m benchmarks.revision_history --lengths 100,500,2000 --iterations 50 --cleanup
+"""
+import random
+from typing import Any, Dict, List
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.models import Note, NoteRevision
+from app.db.session import SessionLocal
+from app.services.diff_service import diff_service
+from app.services.revision_service import revision_service
+from benchmarks.common import (
+    BENCH_PREFIX, base_parser, cleanup_notes, measure, print_table, random_text
+)
+
+def legacy_reconstruct(db: Session, note_id: str, target_revision_number: int) -> Dict[str, Any]:
+    note = db.query(Note).filter(Note.id == note_id).first()
+    revisions = db.query(NoteRevision).filter(
+        NoteRevision.note_id == note_id
+    ).order_by(NoteRevision.revision_number.desc()).all()
+    raw_content, content = note.raw_content, note.content
+    for revision in revisions:
+        if revision.revision_number <= target_revision_number:
+            break
+        # The original revert_diff: apply the forward patch to "" and diff again
+        for attr in ("content_raw_diff", "content_diff"):
+            old_text = diff_service.apply_diff("", getattr(revision, attr))
+            patch = diff_service.create_diff("", old_text)
+            if attr == "content_raw_diff":
+                raw_content = diff_service.apply_diff(raw_content, patch)
+            else:
+                content = diff_service.apply_diff(content, patch)
+    return {"raw_content": raw_content, "content": content}
+
+def edit(rng: random.Random, paragraphs: List[str]) -> List[str]:
+    """Append, rewrite or drop a paragraph, keeping the note between 10 and 40 paragraphs"""
+    paragraphs = list(paragraphs)
+    roll = rng.random()
+    if len(paragraphs) < 10 or (roll < 0.5 and len(paragraphs) < 40):
+        paragraphs.insert(rng.randint(0, len(paragraphs)), random_text(rng, rng.randint(20, 80)))
+    elif roll < 0.85:
+        paragraphs[rng.randrange(len(paragraphs))] = random_text(rng, rng.randint(20, 80))
+    else:
+        del paragraphs[rng.randrange(len(paragraphs))]
+    return paragraphs
+
+def build_history(db: Session, note_id: str, length: int, rng: random.Random) -> None:
+    paragraphs = [random_text(rng, 50) for _ in range(20)]
+    raw_content = "\n\n".join(paragraphs)
+    content = "".join(f"<p>{p}</p>" for p in paragraphs)
+    db.execute(
+        text("INSERT INTO notes (id, title, raw_content, content, archived, tags) "
+             "VALUES (:id, :title, :raw, :content, false, '{}')"),
+        {"id": note_id, "title": note_id, "raw": raw_content, "content": content}
+    )
+    db.commit()
+    for _ in range(length):
+        paragraphs = edit(rng, paragraphs)
+        new_raw = "\n\n".join(paragraphs)
+        new_content = "".join(f"<p>{p}</p>" for p in paragraphs)
+        revision_service.save_revision(db, note_id, raw_content, content, new_raw, new_content)
+        raw_content, content = new_raw, new_content
+    db.execute(
+        text("UPDATE notes SET raw_content = :raw, content = :content WHERE id = :id"),
+        {"id": note_id, "raw": raw_content, "content": content}
+    )
+    db.commit()
+
+def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument("--lengths", default="100,500,2000",
+                        help="comma-separated revision counts")
+    parser.add_argument("--interval", type=int, default=settings.REVISION_KEYFRAME_INTERVAL,
+                        help="REVISION_KEYFRAME_INTERVAL while building histories")
+    parser.add_argument("--skip-legacy", action="store_true",
+                        help="measure only the current reconstruction (legacy is O(history))")
+    args = parser.parse_args()
+    settings.REVISION_KEYFRAME_INTERVAL = args.interval
+
+    rng = random.Random(7)
+    db = SessionLocal()
+    try:
+        for length in [int(n) for n in args.lengths.split(",")]:
+            note_id = f"{BENCH_PREFIX}history-{length}"
+            if db.query(NoteRevision).filter(NoteRevision.note_id == note_id).count() != length:
+                db.execute(text("DELETE FROM notes_revision WHERE note_id = :id"), {"id": note_id})
+                db.execute(text("DELETE FROM notes WHERE id = :id"), {"id": note_id})
+                db.commit()
+                build_history(db, note_id, length, rng)
+
+            targets = [rng.randint(1, length) for _ in range(64)]
+
+            def run(fn, pick):
+                def call(i):
+                    fn(db, note_id, pick(i))
+                    # Each call starts with a clean identity map, like a fresh request
+                    db.rollback()
+                    db.expunge_all()
+                return call
+
+            def oldest(i):
+                return 1
+
+            def random_target(i):
+                return targets[i % len(targets)]
+
+            results = {}
+            if not args.skip_legacy:
+                results["oldest legacy"] = measure(run(legacy_reconstruct, oldest), args.iterations)
+            results["oldest current"] = measure(
+                run(revision_service.reconstruct_note_at_revision, oldest), args.iterations
+            )
+            if not args.skip_legacy:
+                results["random legacy"] = measure(run(legacy_reconstruct, random_target), args.iterations)
+            results["random current"] = measure(
+                run(revision_service.reconstruct_note_at_revision, random_target), args.iterations
+            )
+            print_table(f"revisions={length} keyframe_interval={args.interval}", results)
+    finally:
+        db.close()
+        if args.cleanup:
+            cleanup_notes()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/semantic_search.py
+"""p50/p99 latency of semantic_search and find_similar_notes.
+
+"legacy" reproduces the original implementation (f-string SQL, one extra query per hit);
+"current" calls EmbeddingService. Example:
+
+    python -m benchmarks.semantic_search --seed 100000 --limit 50 --iterations 300
+"""
+import random
+from typing import Any, Dict, List
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.db.models import Note
+from app.db.session import SessionLocal
+from app.services.embedding_service import embedding_service
+from benchmarks.common import (
+    base_parser, cleanup_notes, measure, print_table, random_text, seed_notes
+)
+
+def legacy_semantic_search(db: Session, query_text: str, limit: int) -> List[Dict[str, Any]]:
+    embedding_str = str(embedding_service.generate_embedding(query_text).tolist())
+    rows = db.execute(text(f"""
+        SELECT id, title, 1 - (vector_data <=> '{embedding_str}'::vector) as score
+        FROM notes WHERE archived = false
+        ORDER BY vector_data <=> '{embedding_str}'::vector LIMIT {limit}
+    """)).fetchall()
+    return [{"note": db.query(Note).filter(Note.id == row.id).first(),
+             "similarity_score": float(row.score)} for row in rows]
+
+def legacy_find_similar_notes(db: Session, note_id: str, limit: int) -> List[Dict[str, Any]]:
+    source = db.query(Note).filter(Note.id == note_id).first()
+    vector = source.vector_data
+    vector_str = str(vector.tolist()) if hasattr(vector, 'tolist') else str(vector)
+    rows = db.execute(text(f"""
+        SELECT id, title, 1 - (vector_data <=> '{vector_str}'::vector) as score
+        FROM notes WHERE id != '{note_id}' AND archived = false
+        ORDER BY vector_data <=> '{vector_str}'::vector LIMIT {limit}
+    """)).fetchall()
+    return [{"note": db.query(Note).filter(Note.id == row.id).first(),
+             "similarity_score": float(row.score)} for row in rows]
+
+def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed_notes(args.seed)
+
+    rng = random.Random(7)
+    queries = [random_text(rng, 6) for _ in range(64)]
+
+    db = SessionLocal()
+    try:
+        note_ids = [row.id for row in db.execute(
+            text("SELECT id FROM notes WHERE vector_data IS NOT NULL ORDER BY random() LIMIT 64")
+        )]
+
+        def run(fn, arg_for):
+            def call(i):
+                fn(db, arg_for(i), args.limit)
+                # Each call starts with a clean identity map, like a fresh request
+                db.rollback()
+                db.expunge_all()
+            return call
+
+        results = {
+            "semantic_search legacy": measure(
+                run(legacy_semantic_search, lambda i: queries[i % len(queries)]), args.iterations),
+            "semantic_search current": measure(
+                run(embedding_service.semantic_search, lambda i: queries[i % len(queries)]),
+                args.iterations),
+            "find_similar_notes legacy": measure(
+                run(legacy_find_similar_notes, lambda i: note_ids[i % len(note_ids)]), args.iterations),
+            "find_similar_notes current": measure(
+                run(embedding_service.find_similar_notes, lambda i: note_ids[i % len(note_ids)]),
+                args.iterations),
+        }
+        print_table(f"limit={args.limit}", results)
+    finally:
+        db.close()
+        if args.cleanup:
+            cleanup_notes()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/text_search.py
+"""p50/p99 latency of non-semantic search_notes.
+
+"legacy" reproduces the original ILIKE scan over title and raw_content; "current" calls
+NoteService.search_notes (GIN-indexed full-text search, ranked, with snippets). Use a corpus
+of at least 100k notes to see the difference, e.g.:
+
+    python -m benchmarks.text_search --seed 100000 --limit 20 --iterations 300
+"""
+import random
+from typing import Any, Dict, List
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.db.models import Note
+from app.db.session import SessionLocal
+from app.services.note_service import note_service
+from benchmarks.common import (
+    WORDS, base_parser, cleanup_notes, measure, print_table, seed_notes
+)
+
+def legacy_search_notes(db: Session, query: str, limit: int) -> List[Dict[str, Any]]:
+    results = db.query(Note).filter(
+        Note.archived == False,
+        Note.title.ilike(f'%{query}%') | Note.raw_content.ilike(f'%{query}%')
+    ).order_by(Note.updated_at.desc()).limit(limit).all()
+    return [{"note": note, "similarity_score": 1.0} for note in results]
+
+def current_search_notes(db: Session, query: str, limit: int) -> List[Dict[str, Any]]:
+    return note_service.search_notes(db, query, limit=limit)
+
+def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed_notes(args.seed)
+
+    rng = random.Random(7)
+    # Single common words match many notes; word pairs are selective
+    single = [rng.choice(WORDS) for _ in range(64)]
+    pairs = [f"{rng.choice(WORDS)} {rng.choice(WORDS)}" for _ in range(64)]
+
+    db = SessionLocal()
+    try:
+        total = db.execute(text("SELECT count(*) FROM notes")).scalar()
+
+        def run(fn, queries):
+            def call(i):
+                fn(db, queries[i % len(queries)], args.limit)
+                # Each call starts with a clean identity map, like a fresh request
+                db.rollback()
+                db.expunge_all()
+            return call
+
+        results = {
+            "one word legacy": measure(run(legacy_search_notes, single), args.iterations),
+            "one word current": measure(run(current_search_notes, single), args.iterations),
+            "two words legacy": measure(run(legacy_search_notes, pairs), args.iterations),
+            "two words current": measure(run(current_search_notes, pairs), args.iterations),
+        }
+        print_table(f"notes={total} limit={args.limit}", results)
+    finally:
+        db.close()
+        if args.cleanup:
+            cleanup_notes()
+
+if __name__ == "__main__":
+    main()
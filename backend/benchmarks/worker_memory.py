@@ -0,0 +1,99 @@
+# benchmarks/worker_memory.py
+"""Per-worker memory of the preforked server (gunicorn.conf.py) for several worker counts.
+
+For each count a server is started, warmed with semantic searches, and the
+master and every worker are measured from /proc/<pid>/smaps_rollup (Linux only):
+
+    RSS  resident pages, counting shared (copy-on-write) pages in full for every process
+    PSS  shared pages divided among the processes sharing them; sums to real usage
+    USS  pages private to the process
+
+Example (run from the backend directory):
+
+    python -m benchmarks.worker_memory --workers 1,4,8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List
+
+def smaps_rollup(pid: int) -> Dict[str, float]:
+    """RSS/PSS/USS in MB for one process"""
+    fields: Dict[str, int] = {}
+    with open(f"/proc/{pid}/smaps_rollup") as rollup:
+        for line in rollup:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss": fields.get("Rss", 0) / 1024,
+        "pss": fields.get("Pss", 0) / 1024,
+        "uss": (fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / 1024,
+    }
+
+def children(pid: int) -> List[int]:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+def request(url: str, body: Dict = None) -> None:
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    urllib.request.urlopen(req, timeout=60).read()
+
+def wait_ready(base_url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            request(f"{base_url}/health/ready")
+            return
+        except Exception:
+            time.sleep(0.5)
+    raise RuntimeError("server did not become ready")
+
+def measure_workers(workers: int, port: int, requests: int, timeout: float) -> Dict[str, object]:
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app.main:app"], env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_ready(base_url, timeout)
+
+        # Distinct semantic queries miss the embedding cache, so every worker runs the model
+        for i in range(requests):
+            request(f"{base_url}/api/v1/notes/search",
+                    {"query": f"postgres vectors {i}", "semantic": True})
+
+        master = smaps_rollup(server.pid)
+        per_worker = [smaps_rollup(pid) for pid in children(server.pid)]
+        return {"master": master, "workers": per_worker}
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", default="1,4,8", help="comma separated worker counts")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for readiness")
+    args = parser.parse_args()
+
+    print(f"\n{'workers':>8}{'master RSS':>12}{'worker RSS':>12}{'worker PSS':>12}"
+          f"{'worker USS':>12}{'total PSS':>11}")
+    for count in (int(n) for n in args.workers.split(",")):
+        result = measure_workers(count, args.port, args.requests, args.timeout)
+        workers = result["workers"]
+        mean = {key: sum(w[key] for w in workers) / len(workers) for key in ("rss", "pss", "uss")}
+        total_pss = result["master"]["pss"] + sum(w["pss"] for w in workers)
+        print(f"{count:>8}{result['master']['rss']:>12.1f}{mean['rss']:>12.1f}"
+              f"{mean['pss']:>12.1f}{mean['uss']:>12.1f}{total_pss:>11.1f}")
+    print("(MB; worker columns are means across workers)")
+
+if __name__ == "__main__":
+    main()
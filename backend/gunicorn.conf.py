@@ -0,0 +1,51 @@
+# gunicorn.conf.py
+"""Preforked multi-worker serving: `gunicorn app.main:app` (from the backend directory).
+
+The master imports the app, creates the schema and loads the embedding model once, then
+forks WEB_CONCURRENCY workers that share the model weights copy-on-write. Each worker
+starts with an empty connection pool of its own.
+"""
+import gc
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+def when_ready(server):
+    """Runs in the master after the app is imported and before any worker is forked"""
+    from app.core.config import settings
+    from app.db.session import engine
+    from app.main import prepare_database
+    from app.services.embedding_service import embedding_service
+
+    prepare_database()
+    # Workers must not inherit the master's sockets
+    engine.dispose()
+
+    # Model replicas in child processes cannot be shared across fork; pool workers load their own
+    if settings.EMBEDDING_BACKEND == "local":
+        import torch
+        # A single-threaded warm-up never starts an OpenMP thread team, which would not survive fork
+        torch.set_num_threads(1)
+        embedding_service.warm_up()
+        if not embedding_service.ready:
+            server.log.warning("Model preload failed; workers will load it themselves")
+
+    # Move everything allocated so far out of the collector's reach: gc passes would otherwise
+    # write to the model's object headers and un-share their pages in every worker
+    gc.freeze()
+
+def post_fork(server, worker):
+    """Runs in each worker right after fork"""
+    from app.core.config import settings
+    from app.db.session import engine
+
+    # Drop pooled connections inherited from the master without closing the master's sockets
+    engine.dispose(close=False)
+
+    if settings.EMBEDDING_BACKEND == "local":
+        import torch
+        torch.set_num_threads(settings.EMBEDDING_TORCH_THREADS)
@@ -0,0 +1,63 @@
+"""Initial schema: notes and notes_revision
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+
+    # Databases created by the app's create_all() already have these tables
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table("notes"):
+        op.create_table(
+            "notes",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("raw_content", sa.Text(), nullable=False),
+            sa.Column("title", sa.String(), nullable=False),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+            sa.Column("archived", sa.Boolean(), nullable=False),
+            sa.Column("tags", postgresql.ARRAY(sa.String())),
+            sa.Column("links_to", postgresql.ARRAY(sa.String())),
+            sa.Column("links_from", postgresql.ARRAY(sa.String())),
+            sa.Column("vector_data", Vector(384)),
+        )
+
+    if not inspector.has_table("notes_revision"):
+        op.create_table(
+            "notes_revision",
+            sa.Column("note_id", sa.String(), sa.ForeignKey("notes.id"), nullable=False),
+            sa.Column("revision_id", postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column("content_raw_diff", sa.Text(), nullable=False),
+            sa.Column("content_diff", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+            sa.Column("revision_name", sa.String(), nullable=True),
+            sa.Column("revision_note", sa.String(), nullable=True),
+            sa.Column("revision_number", sa.Integer(), nullable=False),
+            sa.Column("parent_revision_id", postgresql.UUID(as_uuid=True),
+                      sa.ForeignKey("notes_revision.revision_id"), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("notes_revision")
+    op.drop_table("notes")
@@ -0,0 +1,52 @@
+"""ANN index on notes.vector_data
+
+Build parameters default to the VECTOR_INDEX_* / HNSW_* / IVFFLAT_* settings and
+can be overridden per run, e.g.:
+
+    alembic -x index_type=hnsw -x m=24 -x ef_construction=128 upgrade head
+    alembic -x index_type=ivfflat -x lists=1000 upgrade head
+
+The index is built CONCURRENTLY so writes keep flowing on large tables.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+
+from app.core.config import settings
+from app.db.models import VECTOR_INDEX_NAME
+from app.services.vector_index_service import VECTOR_INDEX_PARAM_NAMES, vector_index_service
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    x_args = context.get_x_argument(as_dictionary=True)
+    index_type = x_args.pop("index_type", settings.VECTOR_INDEX_TYPE)
+    if index_type == "none":
+        return
+
+    # Other revisions take -x arguments of their own (e.g. trigram_content)
+    overrides = {
+        name: value for name, value in x_args.items()
+        if name in VECTOR_INDEX_PARAM_NAMES.get(index_type, ())
+    }
+    params = vector_index_service.build_params(index_type, overrides)
+    with op.get_context().autocommit_block():
+        op.execute(vector_index_service.index_ddl(
+            VECTOR_INDEX_NAME, index_type, params, concurrently=True
+        ))
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {VECTOR_INDEX_NAME}")
@@ -0,0 +1,50 @@
+"""Background job queue and stale-field tracking
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases created by the app's create_all() may already have these
+    inspector = sa.inspect(op.get_bind())
+
+    if "stale" not in {c["name"] for c in inspector.get_columns("notes")}:
+        op.add_column(
+            "notes",
+            sa.Column("stale", postgresql.ARRAY(sa.String()), nullable=False, server_default="{}")
+        )
+
+    if not inspector.has_table("note_jobs"):
+        op.create_table(
+            "note_jobs",
+            sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+            sa.Column("note_id", sa.String(), sa.ForeignKey("notes.id"), nullable=False),
+            sa.Column("kind", sa.String(), nullable=False),
+            sa.Column("payload", postgresql.JSONB(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+            sa.Column("run_after", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+            sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("last_error", sa.Text(), nullable=True),
+        )
+        op.create_index("ix_note_jobs_kind_id", "note_jobs", ["kind", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_note_jobs_kind_id", table_name="note_jobs")
+    op.drop_table("note_jobs")
+    op.drop_column("notes", "stale")
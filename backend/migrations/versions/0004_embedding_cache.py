@@ -0,0 +1,37 @@
+"""Content-addressed embedding cache
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases created by the app's create_all() may already have it
+    if sa.inspect(op.get_bind()).has_table("embedding_cache"):
+        return
+
+    op.create_table(
+        "embedding_cache",
+        sa.Column("key", sa.String(), primary_key=True),
+        sa.Column("model", sa.String(), nullable=False),
+        sa.Column("vector", Vector(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("embedding_cache")
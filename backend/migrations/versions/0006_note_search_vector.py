@@ -0,0 +1,52 @@
+"""Full-text search document on notes
+
+Adds a stored generated tsvector over title (weight A) and raw_content (weight B) and a GIN
+index on it. Adding a stored generated column rewrites the notes table once; the index is
+then built CONCURRENTLY so writes keep flowing.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases created by the app's create_all() may already have it
+    inspector = sa.inspect(op.get_bind())
+
+    if "search_vector" not in {c["name"] for c in inspector.get_columns("notes")}:
+        op.add_column(
+            "notes",
+            sa.Column("search_vector", postgresql.TSVECTOR(), sa.Computed(
+                f"setweight(to_tsvector('{settings.SEARCH_TEXT_CONFIG}', title), 'A') || "
+                f"setweight(to_tsvector('{settings.SEARCH_TEXT_CONFIG}', raw_content), 'B')",
+                persisted=True
+            ))
+        )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notes_search_vector "
+            "ON notes USING gin (search_vector)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_notes_search_vector")
+    op.drop_column("notes", "search_vector")
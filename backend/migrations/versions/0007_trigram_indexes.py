@@ -0,0 +1,48 @@
+"""Trigram indexes for fuzzy and substring title search
+
+The raw_content index is optional (TRIGRAM_INDEX_CONTENT, or per run):
+
+    alembic -x trigram_content=true upgrade head
+
+Indexes are built CONCURRENTLY so writes keep flowing on large tables.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    x_args = context.get_x_argument(as_dictionary=True)
+    index_content = x_args.get("trigram_content", str(settings.TRIGRAM_INDEX_CONTENT)).lower() == "true"
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notes_title_trgm "
+            "ON notes USING gin (title gin_trgm_ops)"
+        )
+        if index_content:
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notes_raw_content_trgm "
+                "ON notes USING gin (raw_content gin_trgm_ops)"
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_notes_raw_content_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_notes_title_trgm")
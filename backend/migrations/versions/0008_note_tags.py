@@ -0,0 +1,55 @@
+"""Normalized note tags and maintained tag counts
+
+note_tags holds one lowercased row per (note, tag) and tag_stats the number of non-archived
+notes per tag. A trigger on notes keeps both current; existing notes are copied in once.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.models import NOTES_SYNC_TAGS_FUNCTION, NOTES_SYNC_TAGS_TRIGGER
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases created by the app's create_all() may already have these
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table("note_tags"):
+        op.create_table(
+            "note_tags",
+            sa.Column("note_id", sa.String(), sa.ForeignKey("notes.id", ondelete="CASCADE"),
+                      primary_key=True),
+            sa.Column("tag", sa.String(), primary_key=True),
+        )
+        op.create_index("ix_note_tags_tag_note_id", "note_tags", ["tag", "note_id"])
+
+    if not inspector.has_table("tag_stats"):
+        op.create_table(
+            "tag_stats",
+            sa.Column("tag", sa.String(), primary_key=True),
+            sa.Column("note_count", sa.Integer(), nullable=False, server_default="0"),
+        )
+
+    op.execute(NOTES_SYNC_TAGS_FUNCTION)
+    op.execute(NOTES_SYNC_TAGS_TRIGGER)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS notes_sync_tags ON notes")
+    op.execute("DROP FUNCTION IF EXISTS notes_sync_tags()")
+    op.drop_table("tag_stats")
+    op.drop_index("ix_note_tags_tag_note_id", table_name="note_tags")
+    op.drop_table("note_tags")
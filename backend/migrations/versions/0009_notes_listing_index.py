@@ -0,0 +1,34 @@
+"""Keyset pagination index for note listings
+
+Serves ORDER BY updated_at DESC, id with the (updated_at, id) cursor predicate, for the
+default (non-archived) listing and the per-tag listing. Built CONCURRENTLY so writes keep
+flowing on large tables.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notes_archived_updated_at_id "
+            "ON notes (archived, updated_at DESC, id)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_notes_archived_updated_at_id")
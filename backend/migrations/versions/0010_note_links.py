@@ -0,0 +1,60 @@
+"""Link graph edge table replacing the links_to/links_from arrays
+
+note_links holds one row per (source, target) link, indexed in both directions. Existing
+links are copied from notes.links_to (links_from was derived from the same links), then
+both array columns are dropped.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases created by the app's create_all() may already have the table
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table("note_links"):
+        op.create_table(
+            "note_links",
+            sa.Column("source_id", sa.String(), sa.ForeignKey("notes.id", ondelete="CASCADE"),
+                      primary_key=True),
+            sa.Column("target_id", sa.String(), primary_key=True),
+        )
+        op.create_index("ix_note_links_target_id_source_id", "note_links", ["target_id", "source_id"])
+
+    if "links_to" in {c["name"] for c in inspector.get_columns("notes")}:
+        op.execute("""
+            INSERT INTO note_links (source_id, target_id)
+            SELECT DISTINCT n.id, t.target_id
+            FROM notes n, unnest(n.links_to) AS t(target_id)
+            WHERE t.target_id IS NOT NULL AND t.target_id <> ''
+            ON CONFLICT DO NOTHING
+        """)
+        op.drop_column("notes", "links_from")
+        op.drop_column("notes", "links_to")
+
+
+def downgrade() -> None:
+    op.add_column("notes", sa.Column("links_to", postgresql.ARRAY(sa.String()), server_default="{}"))
+    op.add_column("notes", sa.Column("links_from", postgresql.ARRAY(sa.String()), server_default="{}"))
+    op.execute("""
+        UPDATE notes n SET
+            links_to = ARRAY(SELECT target_id FROM note_links WHERE source_id = n.id ORDER BY target_id),
+            links_from = ARRAY(SELECT source_id FROM note_links WHERE target_id = n.id ORDER BY source_id)
+    """)
+    op.drop_index("ix_note_links_target_id_source_id", table_name="note_links")
+    op.drop_table("note_links")
@@ -0,0 +1,91 @@
+"""Alias index resolving [[links]] written as note titles as well as ids
+
+note_aliases maps normalized ids and titles to notes. note_links gains target_alias, the link
+text as written, which becomes part of the key; target_id is now what the alias resolves to,
+or the alias itself while no note has it. Existing links are re-resolved, so title links
+written before this revision start pointing at their notes.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQL counterpart of link_service.normalize (lower() rather than casefold())
+NORMALIZE = "lower(regexp_replace(btrim({0}), '\\s+', ' ', 'g'))"
+
+
+def upgrade() -> None:
+    # Databases created by the app's create_all() may already have the table
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table("note_aliases"):
+        op.create_table(
+            "note_aliases",
+            sa.Column("alias", sa.String(), primary_key=True),
+            sa.Column("note_id", sa.String(), sa.ForeignKey("notes.id", ondelete="CASCADE"),
+                      primary_key=True),
+            sa.Column("kind", sa.Integer(), nullable=False),
+        )
+        op.create_index("ix_note_aliases_note_id", "note_aliases", ["note_id"])
+
+    op.execute(f"""
+        INSERT INTO note_aliases (alias, note_id, kind)
+        SELECT {NORMALIZE.format('id')}, id, 0 FROM notes
+        UNION ALL
+        SELECT {NORMALIZE.format('title')}, id, 1 FROM notes
+        ON CONFLICT DO NOTHING
+    """)
+
+    if "target_alias" not in {c["name"] for c in inspector.get_columns("note_links")}:
+        op.add_column("note_links", sa.Column("target_alias", sa.String()))
+        op.execute(f"UPDATE note_links SET target_alias = {NORMALIZE.format('target_id')}")
+        # [[Foo]] and [[foo]] in one note are now the same link
+        op.execute("""
+            DELETE FROM note_links l USING note_links d
+            WHERE l.source_id = d.source_id AND l.target_alias = d.target_alias
+              AND l.target_id > d.target_id
+        """)
+        op.alter_column("note_links", "target_alias", nullable=False)
+        op.drop_constraint("note_links_pkey", "note_links", type_="primary")
+        op.create_primary_key("note_links_pkey", "note_links", ["source_id", "target_alias"])
+        op.create_index("ix_note_links_target_alias", "note_links", ["target_alias"])
+
+    op.execute("""
+        UPDATE note_links l SET target_id = coalesce(r.note_id, l.target_alias)
+        FROM note_links k
+        LEFT JOIN LATERAL (
+            SELECT a.note_id FROM note_aliases a JOIN notes n ON n.id = a.note_id
+            WHERE a.alias = k.target_alias
+            ORDER BY a.kind, n.created_at, n.id
+            LIMIT 1
+        ) r ON true
+        WHERE k.source_id = l.source_id AND k.target_alias = l.target_alias
+          AND l.target_id <> coalesce(r.note_id, l.target_alias)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_note_links_target_alias", table_name="note_links")
+    # One row per (source, target) again
+    op.execute("""
+        DELETE FROM note_links l USING note_links d
+        WHERE l.source_id = d.source_id AND l.target_id = d.target_id
+          AND l.target_alias > d.target_alias
+    """)
+    op.drop_constraint("note_links_pkey", "note_links", type_="primary")
+    op.create_primary_key("note_links_pkey", "note_links", ["source_id", "target_id"])
+    op.drop_column("note_links", "target_alias")
+    op.drop_index("ix_note_aliases_note_id", table_name="note_aliases")
+    op.drop_table("note_aliases")
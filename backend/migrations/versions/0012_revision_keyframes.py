@@ -0,0 +1,48 @@
+"""Keyframe snapshots on note revisions
+
+Revisions may carry the full raw and processed contents after them, written every
+REVISION_KEYFRAME_INTERVAL revisions or REVISION_KEYFRAME_DELTA_BYTES of diff text, so
+reconstruction replays only the diffs between the target and its nearest keyframe. Existing
+histories get no keyframes; they are reconstructed from the current note as before until
+new revisions add some. Also indexes revisions by (note_id, revision_number).
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases created by the app's create_all() may already have the columns
+    inspector = sa.inspect(op.get_bind())
+    columns = {c["name"] for c in inspector.get_columns("notes_revision")}
+
+    if "raw_content_snapshot" not in columns:
+        op.add_column("notes_revision", sa.Column("raw_content_snapshot", sa.Text(), nullable=True))
+        op.add_column("notes_revision", sa.Column("content_snapshot", sa.Text(), nullable=True))
+
+    if "ix_notes_revision_note_id_revision_number" not in {
+        i["name"] for i in inspector.get_indexes("notes_revision")
+    }:
+        op.create_index(
+            "ix_notes_revision_note_id_revision_number", "notes_revision",
+            ["note_id", "revision_number"]
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notes_revision_note_id_revision_number", table_name="notes_revision")
+    op.drop_column("notes_revision", "content_snapshot")
+    op.drop_column("notes_revision", "raw_content_snapshot")
@@ -0,0 +1,67 @@
+"""Reverse diffs on note revisions
+
+Each revision stores its raw and processed diffs inverted (new text to old), so walking
+history backwards applies patches and never computes a diff. Existing revisions are
+converted by inverting their stored patches, which needs no text reconstruction.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.diff_service import diff_service
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0013'
+down_revision: Union[str, None] = '0012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    # Databases created by the app's create_all() may already have the columns
+    bind = op.get_bind()
+    columns = {c["name"] for c in sa.inspect(bind).get_columns("notes_revision")}
+    if "content_raw_reverse_diff" not in columns:
+        op.add_column("notes_revision", sa.Column("content_raw_reverse_diff", sa.Text(), nullable=True))
+        op.add_column("notes_revision", sa.Column("content_reverse_diff", sa.Text(), nullable=True))
+
+    select_batch = sa.text("""
+        SELECT revision_id, content_raw_diff, content_diff FROM notes_revision
+        WHERE content_raw_reverse_diff IS NULL
+        ORDER BY revision_id
+        LIMIT :limit
+    """)
+    update = sa.text("""
+        UPDATE notes_revision
+        SET content_raw_reverse_diff = :raw_reverse, content_reverse_diff = :reverse
+        WHERE revision_id = :revision_id
+    """)
+    while True:
+        rows = bind.execute(select_batch, {"limit": BATCH_SIZE}).all()
+        if not rows:
+            break
+        bind.execute(update, [
+            {
+                "revision_id": row.revision_id,
+                "raw_reverse": diff_service.invert_diff(row.content_raw_diff),
+                "reverse": diff_service.invert_diff(row.content_diff),
+            }
+            for row in rows
+        ])
+
+    op.alter_column("notes_revision", "content_raw_reverse_diff", nullable=False)
+    op.alter_column("notes_revision", "content_reverse_diff", nullable=False)
+
+
+def downgrade() -> None:
+    op.drop_column("notes_revision", "content_reverse_diff")
+    op.drop_column("notes_revision", "content_raw_reverse_diff")
@@ -8,8 +8,10 @@ from fastapi.testclient import TestClient
 from app.main import app
 from app.db.session import get_db
 from app.db.models import Base
+from app.db.init_db import init_db
 from app.services.note_service import NoteService
 from app.services.revision_service import RevisionService
+from app.services.note_cache import note_cache
 from tests.factories import NoteFactory
 
 # Test database URL - use PostgreSQL for tests
@@ -27,6 +29,13 @@ def test_engine():
     # Create a test database connection
     engine = create_engine(TEST_DATABASE_URL)
     
+    # Extensions first; the app only creates them when it starts up
+    session = sessionmaker(bind=engine)()
+    try:
+        init_db(session)
+    finally:
+        session.close()
+    
     # Create all tables
     Base.metadata.create_all(bind=engine)
     
@@ -45,6 +54,7 @@ def db_session(test_engine) -> Generator[Session, Any, None]:
     for table in reversed(Base.metadata.sorted_tables):
         session.execute(table.delete())
     session.commit()
+    note_cache.clear()
     
     try:
         yield session
@@ -0,0 +1,41 @@
+import pytest
+from fastapi import status
+
+class TestVectorIndex:
+    def test_vector_index_status(self, client, sample_notes):
+        """TC-ADMIN-001: Vector Index Status"""
+        # Act
+        response = client.get("/api/v1/admin/vector-index")
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["name"] == "ix_notes_vector_data"
+        assert data["exists"] == True
+        assert data["index_type"] in ("hnsw", "ivfflat")
+        assert data["is_valid"] == True
+    
+    def test_vector_recall_report(self, client, similar_notes):
+        """TC-ADMIN-002: Exact vs Indexed Recall Report"""
+        # Act
+        response = client.get("/api/v1/admin/vector-index/report?sample_size=3&k=2")
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        report = response.json()
+        assert report["sample_size"] == len(similar_notes)
+        assert report["k"] == 2
+        assert 0 <= report["mean_recall"] <= 1
+        assert report["exact_latency_ms"]["p50"] >= 0
+        assert report["indexed_latency_ms"]["p50"] >= 0
+    
+    def test_rebuild_rejects_unknown_parameters(self, client):
+        """TC-ADMIN-003: Rebuild Parameter Validation"""
+        # Act - "lists" only applies to ivfflat indexes
+        response = client.post(
+            "/api/v1/admin/vector-index/rebuild",
+            json={"index_type": "hnsw", "lists": 100}
+        )
+        
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,217 @@
+import threading
+import numpy as np
+import pytest
+from fastapi import status
+from app.services.embedding_service import EmbeddingBatcher
+
+class TestEmbeddingBatching:
+    def test_concurrent_requests_are_batched(self):
+        """TC-EMBED-001: Concurrent Embedding Requests Share a Batch"""
+        # Arrange - an encoder that records batch sizes and encodes each text distinctly
+        batch_sizes = []
+        def encode_batch(texts):
+            batch_sizes.append(len(texts))
+            return np.array([[float(len(text)), float(i)] for i, text in enumerate(texts)])
+        
+        batcher = EmbeddingBatcher(encode_batch, max_batch_size=8, max_wait_ms=200)
+        texts = ["x" * (n + 1) for n in range(8)]
+        results = {}
+        barrier = threading.Barrier(len(texts))
+        
+        def worker(text):
+            barrier.wait()
+            results[text] = batcher.submit(text)
+        
+        # Act
+        threads = [threading.Thread(target=worker, args=(text,)) for text in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        # Assert - every caller got the vector for its own text, in fewer model calls
+        for text in texts:
+            assert results[text][0] == len(text)
+        assert len(batch_sizes) < len(texts)
+        
+        metrics = batcher.metrics()
+        assert metrics["items"] == len(texts)
+        assert metrics["batches"] == len(batch_sizes)
+        assert metrics["queue_depth"] == 0
+    
+    def test_batches_run_concurrently_on_multiple_replicas(self):
+        """TC-EMBED-004: Batches Overlap When the Backend Has Several Replicas"""
+        # Arrange - an encoder that only returns once two batches are in flight together
+        both_running = threading.Barrier(2, timeout=5)
+        def encode_batch(texts):
+            both_running.wait()
+            return np.array([[float(len(text))] for text in texts])
+        
+        batcher = EmbeddingBatcher(encode_batch, max_batch_size=1, max_wait_ms=0, max_in_flight=2)
+        results = {}
+        
+        def worker(text):
+            results[text] = batcher.submit(text)
+        
+        # Act
+        threads = [threading.Thread(target=worker, args=(text,)) for text in ("a", "bb")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        
+        # Assert - a serial dispatcher would have broken the barrier instead
+        assert results["a"][0] == 1
+        assert results["bb"][0] == 2
+        assert batcher.metrics()["batches"] == 2
+    
+    def test_embedding_metrics_endpoint(self, client, sample_note):
+        """TC-EMBED-002: Embedding Batch Metrics"""
+        # Act
+        response = client.get("/api/v1/admin/embedding/metrics")
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        metrics = response.json()
+        assert metrics["items"] >= 1
+        assert metrics["batches"] >= 1
+        assert "queue_depth" in metrics
+
+class TestEmbeddingCache:
+    def test_identical_text_is_encoded_once(self, db_session):
+        """TC-EMBED-003: Content-Addressed Embedding Cache"""
+        from app.services.embedding_service import embedding_service
+        cache = embedding_service.cache
+        text = "A note body that is embedded once and then served from the cache."
+        
+        # Act - First call encodes and persists
+        before = cache.metrics()
+        first = embedding_service.generate_embedding(text, db=db_session)
+        db_session.commit()
+        after_first = cache.metrics()
+        
+        # Act - Second call is answered in-process
+        second = embedding_service.generate_embedding(text, db=db_session)
+        after_second = cache.metrics()
+        
+        # Act - With the in-process cache cleared it comes from the table
+        cache.clear()
+        third = embedding_service.generate_embedding(text, db=db_session)
+        after_third = cache.metrics()
+        
+        # Assert
+        assert after_first["misses"] == before["misses"] + 1
+        assert after_second["memory_hits"] == after_first["memory_hits"] + 1
+        assert after_third["db_hits"] == after_second["db_hits"] + 1
+        assert np.allclose(first, second)
+        assert np.allclose(first, third, atol=1e-6)
+
+class TestEmbeddingParity:
+    def test_parity_with_stored_vectors(self, client, sample_note):
+        """TC-EMBED-005: Inference Parity with Stored Vectors"""
+        # Act
+        response = client.get("/api/v1/admin/embedding/parity", params={"sample_size": 10})
+        
+        # Assert - the configured mode reproduces the vectors it stored
+        assert response.status_code == status.HTTP_200_OK
+        report = response.json()
+        assert report["sample_size"] >= 1
+        assert report["mean_cosine"] == pytest.approx(1.0, abs=1e-4)
+        assert report["above_0_99"] == 1.0
+        
+        # An unknown mode is rejected
+        response = client.get("/api/v1/admin/embedding/parity", params={"inference": "fp8"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_parity_mode_validation_and_reuse(self, client, db_session, monkeypatch):
+        """TC-EMBED-008: Parity Modes Validated Up Front and Loaded Once"""
+        from app.services import embedding_service as module
+        from app.services.embedding_service import embedding_service
+        
+        # Assert - an unknown mode is rejected even with nothing to sample
+        response = client.get("/api/v1/admin/embedding/parity", params={"inference": "fp8"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        
+        # Arrange - another mode whose replica records how often it is built
+        other = next(mode for mode in ("torch", "onnx") if mode != module.settings.EMBEDDING_INFERENCE)
+        built = []
+        class ReplicaBackend:
+            def encode(self, texts):
+                return embedding_service.backend.encode(texts)
+        def create_backend(kind, inference=None):
+            built.append(inference)
+            return ReplicaBackend()
+        monkeypatch.setattr(module, "create_embedding_backend", create_backend)
+        monkeypatch.setattr(embedding_service, "_parity_backends", {})
+        response = client.post("/api/v1/notes", json={"title": "Parity", "raw_content": "Parity replica"})
+        assert response.status_code == status.HTTP_200_OK
+        
+        # Act
+        for _ in range(3):
+            response = client.get("/api/v1/admin/embedding/parity", params={"inference": other})
+            assert response.status_code == status.HTTP_200_OK
+        
+        # Assert - the replica was loaded by the first report and reused by the others
+        assert response.json()["sample_size"] >= 1
+        assert built == [other]
+
+class TestEmbeddingBackfill:
+    def test_in_place_backfill(self, client, db_session, sample_notes):
+        """TC-EMBED-006: Resumable In-Place Re-Embedding Backfill"""
+        from sqlalchemy import text
+        from app.services.backfill_service import backfill_service
+        
+        # Arrange - vectors lost (e.g. written by an incompatible model)
+        db_session.execute(text("UPDATE notes SET vector_data = NULL"))
+        db_session.commit()
+        
+        # Act
+        backfill = backfill_service.run(db_session, batch_size=2)
+        
+        # Assert - every note has a vector again and the checkpoint is finished
+        missing = db_session.execute(
+            text("SELECT count(*) FROM notes WHERE vector_data IS NULL")
+        ).scalar()
+        assert missing == 0
+        assert backfill.phase == "completed"
+        assert backfill.last_id == max(note["id"] for note in sample_notes)
+        
+        response = client.get("/api/v1/admin/embedding/backfills")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()[0]["phase"] == "completed"
+        assert response.json()[0]["processed"] >= len(sample_notes)
+    
+    def test_shadow_backfill_swap(self, client, db_session, sample_notes):
+        """TC-EMBED-007: Shadow Column Backfill Swapped in Atomically"""
+        from sqlalchemy import text
+        from app.services.backfill_service import backfill_service, SHADOW_COLUMN
+        
+        # Act - fill the shadow column, stopping before the swap
+        backfill = backfill_service.run(db_session, shadow=True, batch_size=2)
+        
+        # Assert - search still reads vector_data while the shadow column is complete
+        assert backfill.phase == "ready"
+        filled = db_session.execute(
+            text(f"SELECT count({SHADOW_COLUMN}) FROM notes")
+        ).scalar()
+        assert filled == len(sample_notes)
+        response = client.post("/api/v1/notes/search", json={"query": "note", "semantic": True})
+        assert response.status_code == status.HTTP_200_OK
+        
+        # Act - swap
+        backfill = backfill_service.run(db_session, shadow=True, swap=True)
+        
+        # Assert - the shadow column and its index took over
+        assert backfill.phase == "completed"
+        columns = {
+            row.attname for row in db_session.execute(text(
+                "SELECT attname FROM pg_attribute "
+                "WHERE attrelid = 'notes'::regclass AND NOT attisdropped"
+            ))
+        }
+        assert "vector_data" in columns
+        assert SHADOW_COLUMN not in columns
+        response = client.get("/api/v1/admin/vector-index")
+        assert response.json()["exists"] == True
+        response = client.get(f"/api/v1/notes/{sample_notes[0]['id']}/similar")
+        assert response.status_code == status.HTTP_200_OK
@@ -0,0 +1,33 @@
+import pytest
+from fastapi import status
+from app.services.embedding_service import embedding_service
+
+class TestHealth:
+    def test_liveness(self, client):
+        """TC-HEALTH-001: Liveness Probe"""
+        # Act
+        response = client.get("/health/live")
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["status"] == "alive"
+    
+    def test_readiness_waits_for_model(self, client, monkeypatch):
+        """TC-HEALTH-002: Readiness Probe Waits for Model Warm-Up"""
+        # Arrange - model not warm yet
+        monkeypatch.setattr(embedding_service, "ready", False)
+        
+        # Act
+        response = client.get("/health/ready")
+        
+        # Assert
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json()["checks"] == {"model": False, "database": True}
+        
+        # Act - warm up (loads the model and runs a dummy encode)
+        embedding_service.warm_up()
+        response = client.get("/health/ready")
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["status"] == "ready"
@@ -0,0 +1,58 @@
+import pytest
+from fastapi import status
+from app.core.config import settings
+from app.services.job_service import job_service
+
+@pytest.fixture
+def deferred_indexing(monkeypatch):
+    """Leave embeddings and backlinks to the background workers"""
+    monkeypatch.setattr(settings, "DEFERRED_INDEXING", True)
+
+class TestBackgroundIndexing:
+    def test_deferred_note_creation(self, client, db_session, deferred_indexing):
+        """TC-JOB-001: Deferred Embedding on Create"""
+        # Act - Create a note; its embedding is left to the workers
+        response = client.post("/api/v1/notes", json={
+            "title": "Deferred Note",
+            "raw_content": "Content that will be embedded in the background.",
+            "tags": ["jobs"]
+        })
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        note = response.json()
+        assert note["stale"] == ["embedding"]
+        
+        response = client.get("/api/v1/admin/jobs")
+        lag = {job["kind"]: job for job in response.json()["jobs"]}
+        assert lag["embedding"]["pending"] == 1
+        
+        # Act - Run a worker batch
+        processed = job_service.run_batch(db_session, "embedding")
+        
+        # Assert - The note is fresh and the queue is drained
+        assert processed == 1
+        response = client.get(f"/api/v1/notes/{note['id']}")
+        assert response.json()["stale"] == []
+        
+        response = client.get("/api/v1/admin/jobs")
+        lag = {job["kind"]: job for job in response.json()["jobs"]}
+        assert lag["embedding"]["pending"] == 0
+    
+    def test_deferred_backlinks(self, client, db_session, sample_note, deferred_indexing):
+        """TC-JOB-002: Backlinks Without Deferral"""
+        # Act - Link to an existing note
+        response = client.post("/api/v1/notes", json={
+            "title": "Linking Note",
+            "raw_content": f"See [[{sample_note['id']}]].",
+            "tags": []
+        })
+        note = response.json()
+        
+        # Assert - Edges are written with the note, so nothing is queued for links
+        assert sample_note["id"] in note["links_to"]
+        assert "links" not in note["stale"]
+        assert job_service.run_batch(db_session, "links") == 0
+        
+        response = client.get(f"/api/v1/notes/{sample_note['id']}")
+        assert note["id"] in response.json()["links_from"]
@@ -71,4 +71,79 @@ class TestNoteLinking:
         # Check that note2 is no longer linked from note1
         response2 = client.get(f"/api/v1/notes/{note2_id}")
         note2_data = response2.json()
-        assert note1_id not in note2_data["links_from"] 
\ No newline at end of file
+        assert note1_id not in note2_data["links_from"]
+    
+    def test_links_in_listing(self, client, linked_notes):
+        """TC-LINK-004: Links in Note Listings"""
+        # Act
+        response = client.get("/api/v1/notes")
+        
+        # Assert - every listed note carries both directions of its links
+        assert response.status_code == status.HTTP_200_OK
+        notes = {note["id"]: note for note in response.json()}
+        for note in notes.values():
+            for target in note["links_to"]:
+                if target in notes:
+                    assert note["id"] in notes[target]["links_from"]
+        assert any(note["links_to"] for note in notes.values())
+
+    def test_title_link_resolution(self, client, sample_note):
+        """TC-LINK-006: Title Links and Rename Propagation"""
+        # Arrange - link by title, spelled loosely, and to a title nobody has yet
+        note_data = {
+            "title": "Links by Title",
+            "raw_content": f"See [[ {sample_note['title'].upper()} ]] and [[Future  Plans]].",
+            "tags": []
+        }
+        linking = client.post("/api/v1/notes", json=note_data).json()
+        assert sample_note["id"] in linking["links_to"]
+        
+        # Act - a note taking the pending title claims the link
+        future = client.post("/api/v1/notes", json={
+            "title": "future plans", "raw_content": "Not written yet.", "tags": []
+        }).json()
+        
+        # Assert
+        linking = client.get(f"/api/v1/notes/{linking['id']}").json()
+        assert future["id"] in linking["links_to"]
+        assert linking["id"] in client.get(f"/api/v1/notes/{future['id']}").json()["links_from"]
+        
+        # Act - rename the target; links written as the old title follow it
+        client.put(f"/api/v1/notes/{sample_note['id']}", json={"title": "Renamed Note"})
+        
+        # Assert
+        renamed = client.get(f"/api/v1/notes/{sample_note['id']}").json()
+        assert linking["id"] in renamed["links_from"]
+    
+    def test_note_graph(self, client, linked_notes):
+        """TC-LINK-005: Link Graph Neighbourhood"""
+        note1_id = linked_notes[0]["id"]
+        note2_id = linked_notes[1]["id"]
+        
+        # Act
+        response = client.get(f"/api/v1/notes/{note2_id}/graph?depth=1")
+        
+        # Assert - backlinks are followed too, with the link as an edge
+        assert response.status_code == status.HTTP_200_OK
+        graph = response.json()
+        depths = {node["id"]: node["depth"] for node in graph["nodes"]}
+        assert depths[note2_id] == 0
+        assert depths[note1_id] == 1
+        assert {"source": note1_id, "target": note2_id} in graph["edges"]
+        assert graph["similar"] == []
+        
+        # Conditional request for the cached graph
+        response = client.get(
+            f"/api/v1/notes/{note2_id}/graph?depth=1",
+            headers={"If-None-Match": response.headers["ETag"]}
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        
+        # Removing the link changes the graph
+        client.put(f"/api/v1/notes/{note1_id}", json={"raw_content": "No links any more."})
+        response = client.get(f"/api/v1/notes/{note2_id}/graph?depth=1")
+        assert [node["id"] for node in response.json()["nodes"]] == [note2_id]
+        
+        # Unknown note
+        response = client.get("/api/v1/notes/nonexistent-id/graph")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
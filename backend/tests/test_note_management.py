@@ -1,6 +1,7 @@
 import pytest
 from fastapi import status
 from app.db.models import Note
+from tests.factories import NoteFactory
 
 # Note Management Tests
 class TestNoteManagement:
@@ -137,4 +138,142 @@ class TestNoteManagement:
         # Assert
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
-        assert len(data) == len(sample_notes) 
\ No newline at end of file
+        assert len(data) == len(sample_notes)
+    
+    def test_list_notes_with_cursor(self, client, sample_notes):
+        """TC-NOTE-008: List Notes with Cursor Pagination"""
+        # Act - walk all pages of two notes, editing a note from the first page meanwhile
+        response = client.get("/api/v1/notes?limit=2")
+        seen = [note["id"] for note in response.json()]
+        client.put(f"/api/v1/notes/{seen[0]}", json={"tags": ["edited"]})
+        while "X-Next-Cursor" in response.headers:
+            response = client.get(f"/api/v1/notes?limit=2&cursor={response.headers['X-Next-Cursor']}")
+            assert response.status_code == status.HTTP_200_OK
+            seen.extend(note["id"] for note in response.json())
+        
+        # Assert - every note exactly once
+        assert sorted(seen) == sorted(note["id"] for note in sample_notes)
+        
+        # An invalid cursor is rejected
+        response = client.get("/api/v1/notes?cursor=not-a-cursor")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_list_notes_summary(self, client, db_session):
+        """TC-NOTE-009: List Notes as Summaries"""
+        # Arrange
+        long_body = "Summary projection body. " * 40
+        NoteFactory.create(db_session, title="Projected", raw_content=long_body, tags=["summary"])
+        
+        # Act
+        response = client.get("/api/v1/notes?fields=summary")
+        search = client.post(
+            "/api/v1/notes/search",
+            json={"query": "projection", "fields": "summary"}
+        )
+        
+        # Assert - titles and a short excerpt, no bodies
+        assert response.status_code == status.HTTP_200_OK
+        note = response.json()[0]
+        assert note["title"] == "Projected"
+        assert note["excerpt"] == long_body[:200]
+        assert "raw_content" not in note and "content" not in note
+        
+        assert search.status_code == status.HTTP_200_OK
+        result = search.json()[0]["note"]
+        assert result["excerpt"] == long_body[:200]
+        assert "raw_content" not in result
+    
+    def test_conditional_get_note(self, client, sample_note):
+        """TC-NOTE-010: Conditional GET of a Note"""
+        # Act
+        response = client.get(f"/api/v1/notes/{sample_note['id']}")
+        etag = response.headers["ETag"]
+        cached = client.get(f"/api/v1/notes/{sample_note['id']}", headers={"If-None-Match": etag})
+        
+        # Assert - unchanged note is not re-sent
+        assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+        assert cached.headers["ETag"] == etag
+        
+        # Act - edit the note, then revalidate
+        client.put(f"/api/v1/notes/{sample_note['id']}", json={"raw_content": "Changed body"})
+        response = client.get(f"/api/v1/notes/{sample_note['id']}", headers={"If-None-Match": etag})
+        
+        # Assert - the new version is sent with a new ETag
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["raw_content"] == "Changed body"
+        assert response.headers["ETag"] != etag
+    
+    def test_note_cache_invalidation(self, client, sample_note):
+        """TC-NOTE-011: Note Cache Invalidation"""
+        # Arrange - the second read is served from the note cache
+        client.get(f"/api/v1/notes/{sample_note['id']}")
+        hits = client.get("/api/v1/admin/note-cache").json()["hits"]
+        client.get(f"/api/v1/notes/{sample_note['id']}")
+        assert client.get("/api/v1/admin/note-cache").json()["hits"] > hits
+        
+        # Act
+        client.put(f"/api/v1/notes/{sample_note['id']}", json={"title": "Renamed while cached"})
+        response = client.get(f"/api/v1/notes/{sample_note['id']}")
+        
+        # Assert - the edit is visible at once
+        assert response.json()["title"] == "Renamed while cached"
+    
+    def test_note_cache_drops_racing_read(self):
+        """TC-NOTE-013: Note Cache Ignores Reads Overtaken by an Eviction"""
+        from app.services.note_cache import NoteCache
+        
+        # Arrange - a read starts, then the note is evicted before its row is cached
+        cache = NoteCache(max_entries=2, ttl=60)
+        sequence = cache.sequence()
+        cache.evict(["a"])
+        
+        # Act
+        cache.put("a", {"title": "old"}, sequence)
+        cache.put("b", {"title": "unrelated"}, sequence)
+        
+        # Assert - only the evicted note's row is discarded
+        assert cache.get("a") is None
+        assert cache.get("b") == {"title": "unrelated"}
+        
+        # Act - more evictions than the cache remembers per note
+        cache.evict(["c", "d", "e"])
+        cache.put("f", {"title": "old"}, sequence)
+        
+        # Assert - reads older than a forgotten eviction are discarded, later ones are cached
+        assert cache.get("f") is None
+        cache.put("f", {"title": "new"}, cache.sequence())
+        assert cache.get("f") == {"title": "new"}
+    
+    def test_cached_read_keeps_unflushed_changes(self, db_session, note_service, sample_note):
+        """TC-NOTE-014: Cached Reads Keep a Session's Unflushed Changes"""
+        # Arrange - the note is cached, and loaded into a fresh identity map
+        db_session.expunge_all()
+        note = note_service.get_note(db_session, sample_note["id"])
+        note.title = "Not flushed yet"
+        
+        # Act
+        again = note_service.get_note(db_session, sample_note["id"])
+        
+        # Assert - the session's own instance, not the cached columns merged over it
+        assert again is note
+        assert again.title == "Not flushed yet"
+        db_session.rollback()
+    
+    def test_list_notes_with_cursor_edit_ahead(self, client, sample_notes):
+        """TC-NOTE-012: Cursor Pagination with a Later Page Edited"""
+        # Arrange - the note that the walk would return last
+        last_id = client.get("/api/v1/notes").json()[-1]["id"]
+        
+        # Act - take the first page, edit the last note, walk the remaining pages
+        response = client.get("/api/v1/notes?limit=2")
+        seen = [note["id"] for note in response.json()]
+        client.put(f"/api/v1/notes/{last_id}", json={"tags": ["edited"]})
+        while "X-Next-Cursor" in response.headers:
+            response = client.get(f"/api/v1/notes?limit=2&cursor={response.headers['X-Next-Cursor']}")
+            seen.extend(note["id"] for note in response.json())
+        
+        # Assert - the edited note moved in front of the cursor and is missed by this walk,
+        # every other note is returned once, and a walk from the first page starts with it
+        assert len(seen) == len(set(seen))
+        assert sorted(seen) == sorted(note["id"] for note in sample_notes if note["id"] != last_id)
+        assert client.get("/api/v1/notes?limit=2").json()[0]["id"] == last_id
@@ -1,5 +1,7 @@
+import uuid
 import pytest
 from fastapi import status
+from tests.factories import NoteFactory
 
 class TestRevisions:
     def test_revision_creation_on_update(self, client, notes_with_revisions):
@@ -100,4 +102,54 @@ class TestRevisions:
         current_note = current_response.json()
         
         # The content at revision 1 should be different from the current content
-        assert content["raw_content"] != current_note["raw_content"] 
\ No newline at end of file
+        assert content["raw_content"] != current_note["raw_content"]
+    
+    def test_revision_caching(self, client, notes_with_revisions):
+        """TC-REVISION-005: Revision Caching Headers"""
+        note_id = notes_with_revisions["id"]
+        revision_id = client.get(f"/api/v1/notes/{note_id}/revisions").json()[0]["revision_id"]
+        
+        # Act
+        response = client.get(f"/api/v1/notes/revision/{revision_id}")
+        etag = response.headers["ETag"]
+        cached = client.get(f"/api/v1/notes/revision/{revision_id}", headers={"If-None-Match": etag})
+        
+        # Assert - cacheable forever, and revalidated without a body
+        assert "immutable" in response.headers["Cache-Control"]
+        assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+        assert cached.content == b""
+        
+        # The diff view's rendering may still change, so it is only revalidated
+        diff = client.get(f"/api/v1/notes/revision/{revision_id}/diff")
+        assert diff.headers["Cache-Control"] == "no-cache"
+        assert diff.headers["ETag"].endswith('-diff-v1"')
+        
+        # An unknown revision is not found, whatever the client claims to hold
+        unknown = uuid.uuid4()
+        for etag in ("*", f'"{unknown}"'):
+            for path in (f"/api/v1/notes/revision/{unknown}", f"/api/v1/notes/revision/{unknown}/diff"):
+                response = client.get(path, headers={"If-None-Match": etag})
+                assert response.status_code == status.HTTP_404_NOT_FOUND
+    
+    def test_reconstruction_from_keyframes(self, client, db_session, monkeypatch):
+        """TC-REVISION-006: Reconstruction from Keyframes"""
+        from app.core.config import settings
+        from app.db.models import NoteRevision
+        
+        # Arrange - a keyframe every 3 revisions
+        monkeypatch.setattr(settings, "REVISION_KEYFRAME_INTERVAL", 3)
+        note = NoteFactory.create_with_revisions(db_session, 7)
+        keyframes = db_session.query(NoteRevision.revision_number).filter(
+            NoteRevision.note_id == note.id,
+            NoteRevision.raw_content_snapshot.isnot(None)
+        ).order_by(NoteRevision.revision_number).all()
+        assert [number for number, in keyframes] == [3, 6]
+        
+        # Act / Assert - every revision shows exactly the paragraphs added up to it, whether
+        # replayed forwards from a keyframe or backwards from a keyframe or the current note
+        for number in range(1, 8):
+            response = client.get(f"/api/v1/notes/{note.id}/revision/{number}/content")
+            assert response.status_code == status.HTTP_200_OK
+            raw_content = response.json()["raw_content"]
+            assert f"Revision {number}:" in raw_content
+            assert f"Revision {number + 1}:" not in raw_content
@@ -1,5 +1,26 @@
 import pytest
+from contextlib import contextmanager
 from fastapi import status
+from sqlalchemy import event, text
+from tests.factories import NoteFactory
+
+@contextmanager
+def search_queries(db_session):
+    """Collect the semantic search statements (passes, exhaustion check, exact search) run"""
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("PREPARE"):
+            return
+        if "notes_semantic_search" in statement or "vector_data" in statement:
+            statements.append(statement)
+    
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
 
 class TestSearch:
     def test_full_text_search(self, client, similar_notes):
@@ -25,6 +46,100 @@ class TestSearch:
             assert "note" in result
             assert "similarity_score" in result
     
+    def test_full_text_search_ranking(self, client, similar_notes):
+        """TC-SEARCH-004: Ranked Full-Text Search with Highlights"""
+        # Act - web search syntax: a quoted phrase and an excluded word
+        response = client.post(
+            "/api/v1/notes/search",
+            json={"query": '"python tutorial" -overview', "semantic": False}
+        )
+        
+        # Assert - only the tutorial note matches, with its terms highlighted
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()
+        assert [r["note"]["title"] for r in results] == ["python tutorial"]
+        assert 0 < results[0]["similarity_score"] < 1
+        assert "<mark>" in results[0]["highlight"]
+        
+        # Act - a term that only appears in titles and bodies of the topic notes
+        response = client.post("/api/v1/notes/search", json={"query": "pythons"})
+        
+        # Assert - stemming matches the plural, best rank first
+        scores = [r["similarity_score"] for r in response.json()]
+        assert len(scores) == len(similar_notes)
+        assert scores == sorted(scores, reverse=True)
+    
+    def test_fuzzy_title_search(self, client, similar_notes):
+        """TC-SEARCH-005: Fuzzy and Substring Title Search"""
+        # Act - a typo
+        response = client.post(
+            "/api/v1/notes/search",
+            json={"query": "pyhton tutorial", "fuzzy": True}
+        )
+        
+        # Assert - the closest title ranks first
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()
+        assert results[0]["note"]["title"] == "python tutorial"
+        assert 0 < results[0]["similarity_score"] <= 1
+        
+        # Act - a fragment of a word, with a threshold nothing reaches by similarity
+        response = client.post(
+            "/api/v1/notes/search",
+            json={"query": "utoria", "fuzzy": True, "similarity_threshold": 1.0}
+        )
+        
+        # Assert - substring matches are still found
+        assert [r["note"]["title"] for r in response.json()] == ["python tutorial"]
+    
+    def test_fuzzy_search_uses_trigram_index(self, client, similar_notes):
+        """TC-SEARCH-006: Fuzzy Search Plan Uses the Trigram Index"""
+        # Act - forbid sequential scans, which a tiny table would otherwise prefer
+        response = client.get(
+            "/api/v1/admin/search/explain",
+            params={"query": "pyhton", "fuzzy": True, "seqscan": False}
+        )
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert "ix_notes_title_trgm" in response.json()["indexes"]
+    
+    def test_hybrid_search(self, client, similar_notes, sample_note):
+        """TC-SEARCH-007: Hybrid Search with Filters on Both Sides"""
+        # Act
+        response = client.post(
+            "/api/v1/notes/search",
+            json={"query": "python tutorial", "hybrid": True}
+        )
+        
+        # Assert - ranking first in both lists gives the top fused score
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()
+        assert results[0]["note"]["title"] == "python tutorial"
+        assert results[0]["similarity_score"] == pytest.approx(1.0)
+        scores = [r["similarity_score"] for r in results]
+        assert scores == sorted(scores, reverse=True)
+        
+        # Act - a tag only the sample note has
+        response = client.post(
+            "/api/v1/notes/search",
+            json={"query": "python tutorial", "hybrid": True, "tags": ["Sample"]}
+        )
+        
+        # Assert - the vector side is filtered too, not just the text side
+        assert [r["note"]["id"] for r in response.json()] == [sample_note["id"]]
+        
+        # Act - archive the tutorial note
+        tutorial_id = results[0]["note"]["id"]
+        client.post(f"/api/v1/notes/{tutorial_id}/archive")
+        response = client.post(
+            "/api/v1/notes/search",
+            json={"query": "python tutorial", "hybrid": True}
+        )
+        
+        # Assert
+        assert tutorial_id not in [r["note"]["id"] for r in response.json()]
+    
     def test_semantic_search(self, client, similar_notes):
         """TC-SEARCH-002: Semantic Search"""
         # Search for a semantically related term
@@ -51,6 +166,127 @@ class TestSearch:
             # The similarity score should be between 0 and 1
             assert 0 <= result["similarity_score"] <= 1
     
+    def test_semantic_search_with_selective_tag(self, db_session, monkeypatch):
+        """TC-SEARCH-008: Filtered Semantic Search with a Very Selective Tag"""
+        from app.core.config import settings
+        from app.services.embedding_service import embedding_service
+        
+        # Arrange - many notes close to the query, one rare-tagged note far from it
+        NoteFactory.create_batch(db_session, 20, raw_content="Python programming tips", tags=["common"])
+        rare = NoteFactory.create(
+            db_session, title="Sourdough starter", raw_content="Feed the starter with rye flour.",
+            tags=["Rare"]
+        )
+        # Small candidate sets, so the filter empties the first ANN passes
+        monkeypatch.setattr(settings, "VECTOR_ITERATIVE_SCAN", "off")
+        monkeypatch.setattr(settings, "VECTOR_FILTER_OVERFETCH", 2)
+        monkeypatch.setattr(settings, "HNSW_EF_SEARCH", 1)
+        # Transaction-local like the search's own overrides (pooled connections carry the
+        # configured values): without them a 21-row table is simply scanned sequentially
+        db_session.execute(text(
+            "SELECT set_config('enable_seqscan', 'off', true), set_config('enable_sort', 'off', true)"
+        ))
+        
+        # Act
+        with search_queries(db_session) as statements:
+            results = embedding_service.semantic_search(
+                db_session, "python programming", limit=5, tags=["rare"]
+            )
+        db_session.rollback()
+        
+        # Assert - the rare note is still found, and nothing else, after the first pass missed it
+        assert [r["note"].id for r in results] == [rare.id]
+        assert len(statements) > 2
+        assert any("SELECT EXISTS" in statement for statement in statements)
+    
+    def test_semantic_search_small_corpus(self, db_session):
+        """TC-SEARCH-011: Semantic Search over Fewer Notes than the Limit"""
+        from app.services.embedding_service import embedding_service
+        
+        # Arrange
+        notes = NoteFactory.create_batch(db_session, 3, tags=[])
+        
+        # Act
+        with search_queries(db_session) as statements:
+            results = embedding_service.semantic_search(db_session, "anything at all", limit=10)
+        db_session.rollback()
+        
+        # Assert - every note, from a single search statement
+        assert {r["note"].id for r in results} == {note.id for note in notes}
+        assert len(statements) == 1
+    
+    def test_iterative_scan_requires_pgvector_0_8(self, db_session, monkeypatch):
+        """TC-SEARCH-013: Iterative Scans Turned Off on Older pgvector"""
+        from app.core.config import settings
+        from app.services.vector_index_service import vector_index_service
+        
+        # Arrange
+        monkeypatch.setattr(settings, "VECTOR_ITERATIVE_SCAN", "relaxed_order")
+        
+        # Assert - the test server's version is read from pg_extension
+        assert vector_index_service.extension_version(db_session) is not None
+        
+        # Act - a release with iterative scans keeps the setting
+        monkeypatch.setattr(vector_index_service, "extension_version", lambda db: (0, 8, 0))
+        assert vector_index_service.check_iterative_scan(db_session) == False
+        assert settings.VECTOR_ITERATIVE_SCAN == "relaxed_order"
+        
+        # Act - an older release turns it off, so filtered searches overfetch
+        monkeypatch.setattr(vector_index_service, "extension_version", lambda db: (0, 5, 1))
+        assert vector_index_service.check_iterative_scan(db_session) == True
+        assert settings.VECTOR_ITERATIVE_SCAN == "off"
+    
+    def test_semantic_search_with_broad_tag(self, client, db_session):
+        """TC-SEARCH-009: Filtered Semantic Search with a Very Broad Tag"""
+        # Arrange - most notes carry the tag, a few archived ones too
+        NoteFactory.create_batch(db_session, 15, tags=["common"])
+        archived = [NoteFactory.create(db_session, tags=["common"], archived=True) for _ in range(3)]
+        NoteFactory.create_batch(db_session, 3, tags=["other"])
+        
+        # Act
+        response = client.post(
+            "/api/v1/notes/search",
+            json={"query": "anything at all", "semantic": True, "tags": ["common"], "limit": 10}
+        )
+        
+        # Assert - a full page, all tagged, none archived, in descending similarity
+        results = response.json()
+        assert len(results) == 10
+        assert all("common" in r["note"]["tags"] for r in results)
+        assert not {note.id for note in archived} & {r["note"]["id"] for r in results}
+        scores = [r["similarity_score"] for r in results]
+        assert scores == sorted(scores, reverse=True)
+    
+    def test_faceted_search(self, client, db_session):
+        """TC-SEARCH-010: Faceted Search Counts"""
+        # Arrange - more matches than fit on one page, plus a non-matching note
+        NoteFactory.create_batch(db_session, 4, raw_content="Kubernetes rollout notes", tags=["ops"])
+        NoteFactory.create_batch(db_session, 2, raw_content="Kubernetes cluster sizing", tags=["ops", "capacity"])
+        NoteFactory.create(db_session, raw_content="Gardening schedule", tags=["home"])
+        
+        # Act
+        response = client.post(
+            "/api/v1/notes/search",
+            json={"query": "kubernetes", "limit": 2, "facets": True}
+        )
+        
+        # Assert - one page of hits, counts over all six matches
+        assert response.status_code == status.HTTP_200_OK
+        body = response.json()
+        assert len(body["results"]) == 2
+        assert body["facets"]["tags"] == [
+            {"value": "ops", "count": 6},
+            {"value": "capacity", "count": 2},
+        ]
+        assert sum(month["count"] for month in body["facets"]["months"]) == 6
+        
+        # Facets are not offered for semantic search
+        response = client.post(
+            "/api/v1/notes/search",
+            json={"query": "kubernetes", "semantic": True, "facets": True}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
     def test_similar_notes(self, client, similar_notes):
         """TC-SEARCH-003: Similar Notes"""
         # Get the ID of the first note
@@ -75,4 +311,48 @@ class TestSearch:
             assert 0 <= result["similarity_score"] <= 1
             
             # The result should not be the same note
-            assert result["note"]["id"] != note_id 
\ No newline at end of file
+            assert result["note"]["id"] != note_id
+    
+    def test_statements_prepared_per_connection(self, test_engine):
+        """TC-SEARCH-012: Statements Prepared Once per Connection"""
+        from sqlalchemy.orm import Session
+        from app.db.prepared import PreparedStatementCache
+        
+        # Arrange - a statement no other test prepares, and a record of PREPAREs issued
+        cache = PreparedStatementCache()
+        cache.register("tc_search_012_add", [("value", "integer")], "SELECT $1 + 1")
+        prepares = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("PREPARE tc_search_012_add"):
+                prepares.append(conn.connection.dbapi_connection)
+        
+        event.listen(test_engine, "before_cursor_execute", record)
+        first, second = Session(bind=test_engine), Session(bind=test_engine)
+        try:
+            # Act - repeated calls on one connection
+            results = [cache.execute(first, "tc_search_012_add", {"value": n}).scalar() for n in range(3)]
+            
+            # Assert - prepared by the first call and executed by all three
+            assert results == [1, 2, 3]
+            assert len(prepares) == 1
+            
+            # Act - a call on another pooled connection while the first is checked out
+            assert cache.execute(second, "tc_search_012_add", {"value": 9}).scalar() == 10
+            
+            # Assert - the new connection prepared its own copy
+            assert len(prepares) == 2
+            assert prepares[0] is not prepares[1]
+            
+            # Act - the first connection is released and checked out again
+            dbapi_connection = first.connection().connection.dbapi_connection
+            first.commit()
+            assert cache.execute(first, "tc_search_012_add", {"value": 4}).scalar() == 5
+            
+            # Assert - only a connection that has not seen the statement prepares it
+            reused = first.connection().connection.dbapi_connection is dbapi_connection
+            assert len(prepares) == (2 if reused else 3)
+        finally:
+            first.close()
+            second.close()
+            event.remove(test_engine, "before_cursor_execute", record)
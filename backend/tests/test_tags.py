@@ -0,0 +1,48 @@
+import pytest
+from fastapi import status
+from tests.factories import NoteFactory
+
+class TestTags:
+    def test_notes_by_tag_is_case_insensitive(self, client, db_session):
+        """TC-TAG-002: Find Notes by Tag"""
+        # Arrange
+        tagged = NoteFactory.create(db_session, tags=["Python", "guide"])
+        NoteFactory.create(db_session, tags=["rust"])
+        
+        # Act
+        response = client.get("/api/v1/notes/tag/PYTHON")
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert [note["id"] for note in response.json()] == [tagged.id]
+    
+    def test_tag_counts_follow_edits(self, client, db_session):
+        """TC-TAG-004: Maintained Tag Counts"""
+        # Arrange
+        first = NoteFactory.create(db_session, tags=["Python", "guide"])
+        NoteFactory.create(db_session, tags=["python"])
+        
+        # Assert - spellings are merged
+        response = client.get("/api/v1/notes/tags/counts")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [
+            {"tag": "python", "note_count": 2},
+            {"tag": "guide", "note_count": 1},
+        ]
+        
+        # Act - retag one note and archive it
+        client.put(f"/api/v1/notes/{first.id}", json={"tags": ["python", "draft"]})
+        client.post(f"/api/v1/notes/{first.id}/archive")
+        
+        # Assert - unused tags disappear, archived notes are not counted
+        counts = {c["tag"]: c["note_count"] for c in client.get("/api/v1/notes/tags/counts").json()}
+        assert counts == {"python": 1}
+        response = client.get("/api/v1/notes/tags/all")
+        assert response.json()["tags"] == ["python"]
+        
+        # Act - unarchive
+        client.put(f"/api/v1/notes/{first.id}", json={"archived": False})
+        
+        # Assert
+        counts = {c["tag"]: c["note_count"] for c in client.get("/api/v1/notes/tags/counts").json()}
+        assert counts == {"python": 2, "draft": 1}
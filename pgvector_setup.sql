@@ -1,5 +1,6 @@
 -- Create extension if it doesn't exist
 CREATE EXTENSION IF NOT EXISTS vector;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- Verify it's installed
 SELECT * FROM pg_extension WHERE extname = 'vector'; 
\ No newline at end of file